@@ -5,12 +5,17 @@
 import streamlit as st
 from PIL import Image
 
+from utils.aquecimento import iniciar_aquecimento, mostrar_aquecimento
+
 #===========================================================================================================================================================================                             
                                                                                 # Título
 #===========================================================================================================================================================================
 
 st.set_page_config(page_title = "Home")
 
+# Aquecimento: na primeira execução do servidor, carrega os dados e calcula os gráficos padrão das páginas numa thread
+aquecimento = iniciar_aquecimento()
+
 #===========================================================================================================================================================================                             
                                                                                 # Sidebar
 #===========================================================================================================================================================================
@@ -41,4 +46,6 @@ st.markdown(
     
         - Acompanhamento de métricas semanais de crescimento
     """
-)
\ No newline at end of file
+)
+
+mostrar_aquecimento(aquecimento)
@@ -0,0 +1,3 @@
+# ==================================================================================================================================================================#
+                                                                # BENCHMARKS DO DASHBOARD
+# ==================================================================================================================================================================#
@@ -0,0 +1,119 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from utils import configuracao
+from utils.consultas import CONSULTAS_PAGINAS, BackendDuckDB, BackendPandas
+from utils.ranking import consulta_estatisticas_entregadores
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE COMPARAÇÃO DE UMA CONSULTA
+
+def comparar(nome, consulta, pandas_, duckdb_, filtros, folga_quantis):
+    """ Executa a consulta nos dois backends e compara as tabelas: mesmas linhas e grupos, valores iguais a menos de
+    arredondamento. Os quantis (pXX) são o mesmo quantil discreto nos dois backends; a folga é o erro relativo alfa
+    dos sketches, que os respondem no pandas sem faixa de distância (com ela, os dois são exatos e iguais).
+
+    Entrada: nome, consulta, backends, filtros (argumentos nomeados de agregar), folga dos quantis
+    Saída: (passou, tempo no pandas, tempo no DuckDB)
+    """
+    inicio = time.perf_counter()
+    esperado = pandas_.agregar(consulta, **filtros)
+    meio = time.perf_counter()
+    obtido = duckdb_.agregar(consulta, **filtros)
+    fim = time.perf_counter()
+
+    quantis = [medida for medida, funcao, _ in consulta.medidas if funcao in ("p50", "p90", "p99")]
+    try:
+        pd.testing.assert_frame_equal(
+            esperado.drop(columns=quantis), obtido.drop(columns=quantis),
+            check_dtype=False, check_categorical=False, check_exact=False, rtol=1e-6,
+        )
+        for medida in quantis:
+            pd.testing.assert_series_equal(esperado[medida], obtido[medida], check_dtype=False, rtol=folga_quantis, atol=0.0)
+        passou = True
+    except AssertionError as erro:
+        print(f"{nome}: {erro}")
+        passou = False
+    return passou, meio - inicio, fim - meio
+
+                                            # FUNÇÃO DOS FILTROS DA SUÍTE
+
+def filtros_paridade(backend):
+    """ Filtros com que cada consulta é comparada: sem filtros e com alguns filtros da sidebar (inclusive faixas de
+    distância) e dos relatórios, montados a partir das datas, tráfegos e cidades do backend.
+
+    Saída: dicionário rótulo -> argumentos nomeados de agregar
+    """
+    data_inicial, data_final = backend.limites_data()
+    trafegos = backend.valores("Road_traffic_density")
+    return {
+        "sem filtros": dict(data_limite=data_final, trafegos=trafegos),
+        "meio do período, 2 tráfegos": dict(data_limite=data_inicial + (data_final - data_inicial) / 2, trafegos=trafegos[:2]),
+        "sem tráfego": dict(data_limite=data_final, trafegos=[]),
+        # todas as datas: o perfil sai da dimensão dos entregadores, filtrada por tráfego ou por cidade
+        "todas as datas, 2 tráfegos": dict(data_limite=data_final, trafegos=trafegos[:2]),
+        "todas as datas, 1 cidade": dict(data_limite=data_final, trafegos=trafegos, cidades=backend.valores("City")[:1]),
+        "faixa de distância": dict(data_limite=data_final, trafegos=trafegos, distancia=(2.0, 8.0)),
+        "faixa aberta, 2 tráfegos": dict(data_limite=data_final, trafegos=trafegos[:2], distancia=(10.0, float("inf"))),
+        "relatório: período e 1 cidade": dict(
+            data_limite=data_final - (data_final - data_inicial) / 4, trafegos=trafegos,
+            data_inicial=data_inicial + (data_final - data_inicial) / 4, cidades=backend.valores("City")[:1],
+        ),
+        "relatório: sem cidade": dict(data_limite=data_final, trafegos=trafegos, cidades=[]),
+    }
+
+                                            # FUNÇÃO DAS CONSULTAS DA SUÍTE
+
+def consultas_paridade():
+    """ Consultas comparadas: as das páginas (utils.consultas) e a do ranking de entregadores. Com a contagem distinta
+    aproximada, as do pandas vêm do HyperLogLog e a paridade exata não se aplica a elas.
+
+    Saída: dicionário nome -> consulta
+    """
+    consultas = dict(CONSULTAS_PAGINAS, estatisticas_entregadores=consulta_estatisticas_entregadores())
+    if configuracao.CONTAGEM_DISTINTA == "aproximada":
+        consultas = {nome: consulta for nome, consulta in consultas.items() if all(funcao != "nunique" for _, funcao, _ in consulta.medidas)}
+    return consultas
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Suíte de paridade dos backends de consultas: executa todas as consultas das páginas no pandas e no DuckDB com os
+    filtros de filtros_paridade e confere que as tabelas são as mesmas (tests/test_consultas.py faz a mesma conferência
+    no pytest). Sai com código 1 se alguma consulta divergir.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default="dataset/train.csv")
+    args = parser.parse_args()
+
+    pandas_ = BackendPandas(args.csv)
+    duckdb_ = BackendDuckDB(args.csv)
+    if duckdb_.limites_data() != pandas_.limites_data():
+        print("FALHOU: limites de data diferentes")
+        sys.exit(1)
+
+    ok = True
+    for rotulo, argumentos in filtros_paridade(pandas_).items():
+        print(f"--- {rotulo}")
+        for nome, consulta in consultas_paridade().items():
+            passou, tempo_pandas, tempo_duckdb = comparar(nome, consulta, pandas_, duckdb_, argumentos, configuracao.ERRO_RELATIVO_QUANTIS)
+            print(f"{nome:>36}: {'ok' if passou else 'DIFERENTE':>9} | pandas {tempo_pandas * 1000:7.1f} ms | duckdb {tempo_duckdb * 1000:7.1f} ms")
+            ok &= passou
+
+    if not ok:
+        print("FALHOU: backends divergentes")
+        sys.exit(1)
+    print("OK: pandas e DuckDB devolvem as mesmas tabelas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import time
+
+import haversine
+import numpy as np
+import pandas as pd
+
+from utils.distancia import distancia_entrega
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE GERAÇÃO DE COORDENADAS
+
+def gerar_coordenadas(n_linhas, semente=0):
+    """ Função que gera um dataframe com coordenadas de restaurante e de entrega parecidas com as do dataset:
+    1 - sorteia as coordenadas dos restaurantes dentro da Índia
+    2 - desloca o local de entrega até ~0,1 grau do restaurante
+
+    Entrada: quantidade de linhas, semente
+    Saída: dataframe com as quatro colunas de coordenadas
+    """
+    rng = np.random.default_rng(semente)
+    lat = rng.uniform(10, 30, n_linhas)
+    lon = rng.uniform(70, 88, n_linhas)
+    return pd.DataFrame({
+        "Restaurant_latitude": lat,
+        "Restaurant_longitude": lon,
+        "Delivery_location_latitude": lat + rng.uniform(-0.1, 0.1, n_linhas),
+        "Delivery_location_longitude": lon + rng.uniform(-0.1, 0.1, n_linhas),
+    })
+
+                                            # FUNÇÃO DO CAMINHO ANTIGO (APPLY LINHA A LINHA)
+
+def distancia_apply(df1):
+    """ Função que reproduz o cálculo antigo da página Visão Restaurante, com apply linha a linha.
+
+    Entrada: dataframe
+    Saída: série de distâncias
+    """
+    return df1.apply(
+        lambda x: haversine.haversine(
+            (x['Restaurant_latitude'], x['Restaurant_longitude']),
+            (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1
+    )
+
+                                            # FUNÇÃO DE MEDIÇÃO
+
+def medir(funcao, df1):
+    inicio = time.perf_counter()
+    resultado = funcao(df1)
+    return resultado, time.perf_counter() - inicio
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Compara o apply linha a linha com o haversine vetorizado em 45 mil, 1 milhão e 10 milhões de linhas.
+
+    Acima de --limite-apply linhas o apply é medido numa amostra desse tamanho e o tempo é extrapolado,
+    já que rodá-lo inteiro em 10 milhões de linhas leva vários minutos.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[45_000, 1_000_000, 10_000_000])
+    parser.add_argument("--limite-apply", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>12} {'apply (s)':>12} {'vetorizado (s)':>15} {'ganho':>8} {'erro máx (km)':>14}")
+    for n_linhas in args.tamanhos:
+        df1 = gerar_coordenadas(n_linhas)
+        vetorizado, tempo_vetorizado = medir(distancia_entrega, df1)
+
+        amostra = df1.iloc[:min(n_linhas, args.limite_apply)]
+        antigo, tempo_apply = medir(distancia_apply, amostra)
+        tempo_apply *= n_linhas / len(amostra)
+
+        erro = np.abs(vetorizado.iloc[:len(amostra)].to_numpy() - antigo.to_numpy()).max()
+        extrapolado = "*" if len(amostra) < n_linhas else " "
+        print(f"{n_linhas:>12,} {tempo_apply:>11.2f}{extrapolado} {tempo_vetorizado:>15.3f} "
+              f"{tempo_apply / tempo_vetorizado:>7.0f}x {erro:>14.2e}")
+    print("* tempo extrapolado a partir da amostra")
+
+
+if __name__ == "__main__":
+    main()
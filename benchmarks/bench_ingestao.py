@@ -0,0 +1,68 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pyarrow as pa
+
+from utils.dados import ler_e_limpar_csv
+from utils.ingestao import calcular_tamanho_bloco, ingerir_para_parquet
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE MEDIÇÃO
+
+def medir_pico(funcao, *args, **kwargs):
+    """ Mede tempo e pico de memória de uma função: alocações do Python/NumPy (tracemalloc) + pool do Arrow.
+    """
+    pool = pa.default_memory_pool()
+    pico_arrow_inicial = pool.max_memory() or 0
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao(*args, **kwargs)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pico_arrow = max((pool.max_memory() or 0) - pico_arrow_inicial, 0)
+    return tempo, (pico + pico_arrow) / 1024 ** 2
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Compara o pico de memória da leitura inteira com o da ingestão em blocos e confere a memória alvo.
+    Sai com código 1 se a ingestão em blocos passar da memória alvo (pode ser usado como checagem automática).
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default="dataset/train.csv")
+    parser.add_argument("--limite-memoria-mb", type=float, default=64.0)
+    parser.add_argument("--tamanho-bloco", type=int, default=None)
+    parser.add_argument("--pular-leitura-inteira", action="store_true")
+    args = parser.parse_args()
+
+    linhas = calcular_tamanho_bloco(args.csv, args.tamanho_bloco, args.limite_memoria_mb)
+    print(f"Linhas por bloco: {linhas:,}")
+
+    if not args.pular_leitura_inteira:
+        tempo, pico = medir_pico(ler_e_limpar_csv, args.csv)
+        print(f"{'leitura inteira':>16}: {tempo:8.2f} s | pico {pico:10.1f} MB")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        destino = Path(pasta) / "ingestao.parquet"
+        tempo, pico = medir_pico(ingerir_para_parquet, args.csv, destino, tamanho_bloco=linhas)
+    print(f"{'em blocos':>16}: {tempo:8.2f} s | pico {pico:10.1f} MB (alvo {args.limite_memoria_mb:.0f} MB)")
+
+    if pico > args.limite_memoria_mb:
+        print("FALHOU: pico acima da memória alvo")
+        sys.exit(1)
+    print("OK: pico dentro da memória alvo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.legado import limpar_colunas_texto, padronizar_colunas
+from utils.limpeza import COLUNAS_HORARIO, limpar_dados
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DO PIPELINE ANTIGO
+
+def limpar_legado(df):
+    return padronizar_colunas(limpar_colunas_texto(df.copy()))
+
+                                            # FUNÇÃO DE COMPARAÇÃO COM O PIPELINE ANTIGO
+
+def comparar_com_legado(df_legado, df_novo):
+    """ Função que confere, linha a linha, que o motor novo gera os mesmos dados do pipeline antigo:
+    1 - converte os horários antigos (datetime.time) para segundos desde a meia-noite
+    2 - converte as colunas category de volta para texto
+    3 - compara índice, colunas e valores ignorando apenas a diferença de tipos
+
+    Entrada: dataframe do pipeline antigo, dataframe do motor novo
+    Saída: nenhuma (levanta AssertionError se houver diferença)
+    """
+    esperado = df_legado.copy()
+    for coluna in COLUNAS_HORARIO:
+        esperado[coluna] = [h.hour * 3600 + h.minute * 60 + h.second for h in esperado[coluna]]
+
+    obtido = df_novo.copy()
+    for coluna in obtido.select_dtypes(include="category").columns:
+        obtido[coluna] = obtido[coluna].astype(object)
+
+    pd.testing.assert_frame_equal(esperado, obtido, check_dtype=False, check_exact=True)
+
+                                            # FUNÇÃO DE MEDIÇÃO
+
+def medir(funcao, df):
+    """ Mede o tempo e o pico de memória alocada (tracemalloc) de uma função de limpeza.
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, tempo, pico / 1024 ** 2
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Compara o pipeline antigo de limpeza com utils.limpeza.limpar_dados: paridade, tempo, pico de memória e tamanho final.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default="dataset/train.csv")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df_legado, tempo_legado, pico_legado = medir(limpar_legado, df)
+    df_novo, tempo_novo, pico_novo = medir(limpar_dados, df)
+
+    comparar_com_legado(df_legado, df_novo)
+    print(f"Paridade: OK ({len(df_novo):,} linhas idênticas)")
+
+    print(f"{'pipeline':>10} {'tempo (s)':>10} {'pico (MB)':>10} {'resultado (MB)':>15}")
+    for nome, tempo, pico, resultado in [
+        ("antigo", tempo_legado, pico_legado, df_legado),
+        ("novo", tempo_novo, pico_novo, df_novo),
+    ]:
+        tamanho = resultado.memory_usage(deep=True).sum() / 1024 ** 2
+        print(f"{nome:>10} {tempo:>10.3f} {pico:>10.1f} {tamanho:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
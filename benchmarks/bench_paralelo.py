@@ -0,0 +1,71 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.cubo import montar_cubo
+from utils.dados import ler_e_limpar_csv
+from utils.filtros import ordenar_por_data
+from utils.paralelo import executor, quantidade_processos
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE AMPLIAÇÃO DO DATASET
+
+def ampliar(df1, linhas):
+    """ Repete os pedidos até chegar a `linhas` (as mesmas categorias e datas, só mais linhas por grupo).
+    """
+    repeticoes = int(np.ceil(linhas / len(df1)))
+    return ordenar_por_data(pd.concat([df1] * repeticoes, ignore_index=True).iloc[:linhas])
+
+                                            # FUNÇÃO DE MEDIÇÃO
+
+def medir(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Compara a montagem do cubo diário num processo com a agregação particionada no pool de processos
+    (CURRY_PROCESSOS) e confere que os dois cubos são iguais. Sai com código 1 se forem diferentes.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default="dataset/train.csv")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[1_000_000, 5_000_000, 20_000_000])
+    args = parser.parse_args()
+
+    base = ler_e_limpar_csv(args.csv)
+    _, tempo_pool = medir(lambda: executor().submit(int).result())
+    print(f"Processos: {quantidade_processos()} (pool criado em {tempo_pool:.2f} s, só na primeira vez)")
+
+    ok = True
+    for linhas in args.linhas:
+        df1 = ampliar(base, linhas)
+        sequencial, tempo_sequencial = medir(montar_cubo, df1, paralelo=False)
+        particionado, tempo_particionado = medir(montar_cubo, df1, paralelo=True)
+        try:
+            pd.testing.assert_frame_equal(sequencial, particionado, check_exact=False, rtol=1e-9)
+            igual = "iguais"
+        except AssertionError:
+            igual, ok = "DIFERENTES", False
+        print(f"{linhas:>12,} linhas: um processo {tempo_sequencial:7.2f} s | particionado {tempo_particionado:7.2f} s "
+              f"({tempo_sequencial / tempo_particionado:4.1f}x) | cubos {igual}")
+        del df1
+
+    if not ok:
+        print("FALHOU: cubo particionado diferente do sequencial")
+        sys.exit(1)
+    print("OK: cubos iguais")
+
+
+if __name__ == "__main__":
+    main()
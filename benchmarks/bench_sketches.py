@@ -0,0 +1,99 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from utils.dados import ler_e_limpar_csv
+from utils.enriquecimento import semana_do_ano
+from utils.sketches import estimar_hll, montar_sketches, posicoes_hll
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE CONFERÊNCIA DOS DISTINTOS
+
+def conferir_distintos(df1, sketches, grupos, limite_erro):
+    """ Compara a estimativa do HyperLogLog com o nunique exato por grupo e devolve o maior erro relativo.
+    """
+    chaves = {grupo: semana_do_ano(df1["Order_Date"]) if grupo == "Week" else df1[grupo] for grupo in grupos}
+    exato = df1.groupby(list(chaves.values()), observed=True)["Delivery_person_ID"].nunique().to_numpy()
+    estimado = sketches.distintos(grupos)["Delivery_person_ID"].to_numpy()
+    erro = np.abs(estimado - exato) / exato
+    print(f"{'distintos por ' + '/'.join(grupos):>32}: erro médio {erro.mean():6.2%} | máximo {erro.max():6.2%} (limite {limite_erro:.1%})")
+    return erro.max() <= limite_erro
+
+                                            # FUNÇÃO DE CONFERÊNCIA POR CARDINALIDADE
+
+def conferir_cardinalidades(precisao, limite_erro, cardinalidades=(10, 100, 1_000, 10_000, 100_000, 1_000_000)):
+    """ Estima a quantidade de ids sintéticos distintos em várias ordens de grandeza (o dataset tem poucos entregadores)
+    e devolve se todos os erros relativos ficaram dentro do limite.
+    """
+    ok = True
+    for cardinalidade in cardinalidades:
+        ids = np.array([f"ENTREGADOR{i:08d}" for i in range(cardinalidade)], dtype=object)
+        registro, posto = posicoes_hll(np.concatenate([ids, ids[: cardinalidade // 2]]), precisao)
+        registros = np.zeros((1, 1 << precisao), dtype=np.uint8)
+        np.maximum.at(registros[0], registro, posto)
+        erro = abs(estimar_hll(registros)[0] - cardinalidade) / cardinalidade
+        print(f"{f'{cardinalidade:,} ids distintos':>32}: erro {erro:6.2%} (limite {limite_erro:.1%})")
+        ok &= erro <= limite_erro
+    return ok
+
+                                            # FUNÇÃO DE CONFERÊNCIA DOS QUANTIS
+
+def conferir_quantis(df1, sketches, grupos, quantis=(0.5, 0.9, 0.99)):
+    """ Compara os quantis do sketch com os quantis discretos exatos por grupo: o erro relativo não pode passar de alfa.
+    """
+    aproximados = sketches.quantis(grupos, quantis)
+    erro_maximo = 0.0
+    for (_, linhas), (_, aproximado) in zip(df1.groupby(grupos, observed=True, sort=True), aproximados.iterrows()):
+        exatos = np.quantile(linhas["time_taken"].to_numpy(dtype=np.float64), quantis, method="inverted_cdf")
+        valores = aproximado[[f"p{round(quantil * 100):02d}" for quantil in quantis]].to_numpy(dtype=np.float64)
+        erro_maximo = max(erro_maximo, float(np.max(np.abs(valores - exatos) / exatos)))
+    print(f"{'quantis por ' + '/'.join(grupos):>32}: erro máximo {erro_maximo:6.2%} (limite {sketches.alfa:.1%})")
+    return erro_maximo <= sketches.alfa + 1e-9
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Confere os sketches diários contra os valores exatos (entregadores distintos e quantis do tempo de entrega)
+    e a combinação de sketches montados em partes. Sai com código 1 se algum erro passar do limite documentado.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default="dataset/train.csv")
+    parser.add_argument("--desvios", type=float, default=3.0, help="erros padrões tolerados no HyperLogLog")
+    args = parser.parse_args()
+
+    df1 = ler_e_limpar_csv(args.csv)
+    inicio = time.perf_counter()
+    sketches = montar_sketches(df1)
+    print(f"Sketches: {len(sketches):,} linhas em {time.perf_counter() - inicio:.2f} s "
+          f"({(sketches.registros.nbytes + sketches.histogramas.nbytes) / 1024 ** 2:.1f} MB)")
+
+    limite_hll = args.desvios * 1.04 / np.sqrt(sketches.registros.shape[1])
+    ok = True
+    for grupos in (["City"], ["Week"], ["age_range"], ["City", "Road_traffic_density"]):
+        ok &= conferir_distintos(df1, sketches, grupos, limite_hll)
+    ok &= conferir_cardinalidades(int(np.log2(sketches.registros.shape[1])), limite_hll)
+    for grupos in (["City"], ["Road_traffic_density"], ["City", "age_range"]):
+        ok &= conferir_quantis(df1, sketches, grupos)
+
+    metade = len(df1) // 2
+    combinados = montar_sketches(df1.iloc[:metade]).combinar(montar_sketches(df1.iloc[metade:]))
+    mesmos = np.array_equal(combinados.registros, sketches.registros) and np.array_equal(combinados.histogramas, sketches.histogramas)
+    print(f"{'combinação em duas partes':>32}: {'idêntica' if mesmos else 'DIFERENTE'} da montagem inteira")
+    ok &= mesmos
+
+    if not ok:
+        print("FALHOU: erro acima do limite")
+        sys.exit(1)
+    print("OK: sketches dentro dos limites")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+#===========================================================================================================================================================================
+                                                                                # PIPELINE ANTIGO DE LIMPEZA
+#===========================================================================================================================================================================
+# Cópia fiel de limpar_colunas_texto / padronizar_colunas como eram nas páginas, mantida só como referência
+# para os benchmarks e para conferir que o motor novo (utils.limpeza) gera exatamente as mesmas linhas.
+
+                                            # FUNÇÃO DE LIMPEZA DE COLUNAS DE TEXTO
+
+def limpar_colunas_texto (df1):
+    ''' Função que limpa as colunas com formato texto em um data frame:
+    1 - cria uma cópia do dataframe
+    2 - Cria uma variável para alocar as colunas do tipo texto
+    3 - Percorre a variável (lista) e, para cada item, aplicar a padronização de texto e substituição dos valores de texto NaN por none
+    4 - retorna o data frame limpo
+
+    Parâmetro: Data frame a ser limpo
+
+    Retorno: Data frame com colunas do tipo objetos limpas e padronizadas para letra minúscula
+    '''
+#1.1
+    df_limpo = df1.copy()
+#1.2
+    colunas = df_limpo.select_dtypes(include = ["object"]).columns
+#1.3
+    for coluna in colunas:
+        df_limpo[coluna] = df_limpo[coluna].str.strip().str.casefold()
+        df_limpo[coluna] = df_limpo[coluna].replace("nan",np.nan)
+#1.5
+    return df_limpo
+
+
+                                            # FUNÇÃO DE PADRONIZAÇÃO DAS COLUNAS
+
+def padronizar_colunas (df1):
+    ''' Função que padroniza as colunas em um data frame:
+        1 - Modifica todas as colunas com dados em formato equivocado para o seu formato adequado
+        2 - Retorna um data frame padronizado
+    '''
+
+    df_padronizado = df1.copy()
+    df_padronizado["Delivery_person_Age"] = pd.to_numeric(df_padronizado["Delivery_person_Age"], errors='coerce')
+    df_padronizado["Delivery_person_Ratings"] = pd.to_numeric(df_padronizado["Delivery_person_Ratings"], errors='coerce')
+    df_padronizado["multiple_deliveries"] = pd.to_numeric(df_padronizado["multiple_deliveries"], errors='coerce')
+    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].str.removeprefix("(min)")
+    df_padronizado["Time_taken(min)"] = pd.to_numeric(df_padronizado["Time_taken(min)"], errors='coerce')
+    df_padronizado["Order_Date"] = pd.to_datetime(df_padronizado["Order_Date"],format = "%d-%m-%Y", errors='coerce')
+    df_padronizado['Time_Orderd'] = pd.to_datetime(df_padronizado['Time_Orderd'],format='%H:%M:%S', errors='coerce').dt.time
+    df_padronizado['Time_Order_picked'] = pd.to_datetime(df_padronizado['Time_Order_picked'],format='%H:%M:%S', errors='coerce').dt.time
+    df_padronizado.dropna(inplace=True)
+    df_padronizado["Delivery_person_Age"] = df_padronizado["Delivery_person_Age"].astype(int)
+    df_padronizado["multiple_deliveries"] = df_padronizado["multiple_deliveries"].astype(int)
+    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].astype(int)
+    df_padronizado["Weatherconditions"] = df_padronizado["Weatherconditions"].str.removeprefix("conditions ")
+    df_padronizado = df_padronizado.rename(columns = {"Time_taken(min)" : "time_taken"})
+    return df_padronizado
+
+                                        # FUNÇÃO DO PIPELINE ANTIGO COMPLETO
+
+def carregar_e_limpar_legado(caminho):
+    """
+    Função que reproduz o carregamento antigo: read_csv + limpar_colunas_texto + padronizar_colunas.
+
+    Entrada: caminho do csv
+    Saída: dataframe limpo (com os horários como datetime.time)
+    """
+    df = pd.read_csv(caminho)
+    df1 = df.copy()
+    df1 = limpar_colunas_texto(df1)
+    df1 = padronizar_colunas(df1)
+    return df1
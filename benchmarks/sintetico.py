@@ -0,0 +1,181 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Valores brutos (com o espaço no fim e o texto "NaN " dos nulos, como no csv original) e a frequência de cada um
+CIDADES = {"Metropolitian ": 0.748, "Urban ": 0.222, "Semi-Urban ": 0.004, "NaN ": 0.026}
+TRAFEGOS = {"Low ": 0.34, "Jam ": 0.31, "Medium ": 0.24, "High ": 0.097, "NaN ": 0.013}
+FESTIVAIS = {"No ": 0.975, "Yes ": 0.02, "NaN ": 0.005}
+CLIMAS = {f"conditions {clima}": 0.987 / 6 for clima in ["Sunny", "Stormy", "Sandstorms", "Cloudy", "Fog", "Windy"]} | {"conditions NaN": 0.013}
+TIPOS_PEDIDO = {"Snack ": 0.25, "Meal ": 0.25, "Drinks ": 0.25, "Buffet ": 0.25}
+VEICULOS = {"motorcycle ": 0.58, "scooter ": 0.335, "electric_scooter ": 0.084, "bicycle ": 0.001}
+ENTREGAS_MULTIPLAS = {"0": 0.31, "1": 0.62, "2": 0.04, "3": 0.008, "NaN ": 0.022}
+CONDICOES_VEICULO = {0: 0.33, 1: 0.33, 2: 0.334, 3: 0.006}
+
+# Minutos a mais no tempo de entrega por tráfego e em dia de festival
+EFEITO_TRAFEGO = {"Low ": -5, "Medium ": 1, "High ": 2, "Jam ": 6, "NaN ": 0}
+EFEITO_FESTIVAL = {"No ": 0, "Yes ": 18, "NaN ": 0}
+
+# Cidades dos entregadores (prefixo do Delivery_person_ID) e coordenadas aproximadas de cada uma:
+# 22 cidades x 20 restaurantes x 3 entregadores = 1.320 entregadores, como no dataset original
+CENTROS = {
+    "INDO": (22.72, 75.86), "BANG": (12.97, 77.59), "COIMB": (11.02, 76.96), "CHEN": (13.08, 80.27), "HYD": (17.39, 78.49),
+    "RANCHI": (23.34, 85.31), "MYS": (12.30, 76.64), "DEH": (30.32, 78.03), "KOC": (9.93, 76.27), "PUNE": (18.52, 73.86),
+    "LUDH": (30.90, 75.86), "KNP": (26.45, 80.33), "MUM": (19.08, 72.88), "KOL": (22.57, 88.36), "JAP": (26.91, 75.79),
+    "SUR": (21.17, 72.83), "GOA": (15.50, 73.83), "AURG": (19.88, 75.34), "AGR": (27.18, 78.01), "VAD": (22.31, 73.18),
+    "ALH": (25.44, 81.85), "BHP": (23.26, 77.41),
+}
+RESTAURANTES_POR_CIDADE = 20
+ENTREGADORES_POR_RESTAURANTE = 3
+
+# Proporção de nulos ("NaN ") nas colunas numéricas e de coordenadas zeradas (inválidas)
+PROPORCAO_NULOS = 0.04
+PROPORCAO_COORDENADAS_ZERADAS = 0.01
+
+# Primeiro dia dos pedidos
+DATA_INICIAL = "2022-02-11"
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE SORTEIO DE CATEGORIAS
+
+def _sortear(rng, frequencias, n):
+    valores = np.array(list(frequencias), dtype=object)
+    pesos = np.array(list(frequencias.values()), dtype=np.float64)
+    return valores[rng.choice(len(valores), size=n, p=pesos / pesos.sum())]
+
+                                            # FUNÇÃO DE NULOS NO TEXTO
+
+def _com_nulos(rng, valores, proporcao=PROPORCAO_NULOS):
+    texto = valores.astype(str).astype(object)
+    texto[rng.random(len(texto)) < proporcao] = "NaN "
+    return texto
+
+                                            # FUNÇÃO DE GERAÇÃO DE PEDIDOS
+
+def gerar_pedidos(linhas, semente=0, inicio=0, dias=55):
+    """ Função que gera pedidos sintéticos com as colunas e o formato bruto de dataset/train.csv:
+    1 - entregadores no formato CIDADERESxxDELyy (1.320 distintos) e restaurantes perto do centro da cidade do entregador
+    2 - cidade, tráfego, clima, festival, veículo e tipo de pedido com as frequências do dataset original
+    3 - tempo de entrega que depende do tráfego, do festival e da distância (os gráficos têm diferenças para mostrar)
+    4 - texto bruto: espaços no fim, "NaN " nos nulos, "conditions ..." e "(min) ..."
+
+    Entrada: quantidade de linhas, semente, posição da primeira linha (para gerar em blocos com IDs únicos), dias de pedidos
+    Saída: dataframe bruto (como lido do csv, antes da limpeza)
+    """
+    rng = np.random.default_rng([semente, inicio])
+    n = linhas
+
+    ids_entregador = np.array([
+        f"{cidade}RES{restaurante:02d}DEL{numero:02d} "
+        for cidade in CENTROS
+        for restaurante in range(1, RESTAURANTES_POR_CIDADE + 1)
+        for numero in range(1, ENTREGADORES_POR_RESTAURANTE + 1)
+    ], dtype=object)
+    entregador = rng.integers(0, len(ids_entregador), n)
+    cidade_entregador = entregador // (RESTAURANTES_POR_CIDADE * ENTREGADORES_POR_RESTAURANTE)
+    restaurante = (entregador // ENTREGADORES_POR_RESTAURANTE) % RESTAURANTES_POR_CIDADE + 1
+
+    centros = np.array(list(CENTROS.values()))[cidade_entregador]
+    # cada restaurante fica num ponto fixo perto do centro; a entrega cai a até ~10 km dele
+    deslocamento_restaurante = np.random.default_rng(semente).uniform(-0.15, 0.15, (len(CENTROS) * RESTAURANTES_POR_CIDADE, 2))
+    lat_restaurante = centros[:, 0] + deslocamento_restaurante[cidade_entregador * RESTAURANTES_POR_CIDADE + restaurante - 1, 0]
+    lon_restaurante = centros[:, 1] + deslocamento_restaurante[cidade_entregador * RESTAURANTES_POR_CIDADE + restaurante - 1, 1]
+    lat_entrega = lat_restaurante + rng.uniform(-0.09, 0.09, n)
+    lon_entrega = lon_restaurante + rng.uniform(-0.09, 0.09, n)
+    zeradas = rng.random(n) < PROPORCAO_COORDENADAS_ZERADAS
+    lat_restaurante[zeradas] = 0.0
+    lon_restaurante[zeradas] = 0.0
+
+    trafego = _sortear(rng, TRAFEGOS, n)
+    festival = _sortear(rng, FESTIVAIS, n)
+    distancia_km = np.hypot((lat_entrega - lat_restaurante) * 111, (lon_entrega - lon_restaurante) * 105)
+    tempo = 22 + pd.Series(trafego).map(EFEITO_TRAFEGO).to_numpy() + pd.Series(festival).map(EFEITO_FESTIVAL).to_numpy() \
+        + np.where(zeradas, 0, distancia_km) * 0.8 + rng.normal(0, 6, n)
+    tempo = np.clip(np.rint(tempo), 10, 54).astype(np.int64)
+
+    # horário do pedido em quartos de hora (08:00 a 23:45, alguns depois da meia-noite); coleta 5, 10 ou 15 minutos depois
+    quartos = np.where(rng.random(n) < 0.02, rng.integers(0, 4, n), rng.integers(32, 96, n))
+    coleta = (quartos * 15 + rng.choice([5, 10, 15], n)) % (24 * 60)
+    horarios = np.array([f"{minuto // 60:02d}:{minuto % 60:02d}:00" for minuto in range(24 * 60)], dtype=object)
+    horario_pedido = horarios[quartos * 15]
+    horario_pedido[rng.random(n) < PROPORCAO_NULOS] = "NaN "
+
+    datas = pd.date_range(DATA_INICIAL, periods=dias).strftime("%d-%m-%Y").to_numpy(dtype=object)
+    notas = np.clip(np.round(rng.normal(4.65, 0.3, n), 1), 2.5, 5.0)
+    notas[rng.random(n) < 0.001] = 6.0
+
+    return pd.DataFrame({
+        "ID": np.char.add(np.char.add("0x", np.char.mod("%04x", np.arange(inicio, inicio + n))), " ").astype(object),
+        "Delivery_person_ID": ids_entregador[entregador],
+        "Delivery_person_Age": _com_nulos(rng, np.clip(np.rint(rng.normal(29.5, 5.7, n)), 15, 50).astype(np.int64)),
+        "Delivery_person_Ratings": _com_nulos(rng, notas),
+        "Restaurant_latitude": lat_restaurante,
+        "Restaurant_longitude": lon_restaurante,
+        "Delivery_location_latitude": lat_entrega,
+        "Delivery_location_longitude": lon_entrega,
+        "Order_Date": datas[rng.integers(0, dias, n)],
+        "Time_Orderd": horario_pedido,
+        "Time_Order_picked": horarios[coleta],
+        "Weatherconditions": _sortear(rng, CLIMAS, n),
+        "Road_traffic_density": trafego,
+        "Vehicle_condition": _sortear(rng, CONDICOES_VEICULO, n).astype(np.int64),
+        "Type_of_order": _sortear(rng, TIPOS_PEDIDO, n),
+        "Type_of_vehicle": _sortear(rng, VEICULOS, n),
+        "multiple_deliveries": _sortear(rng, ENTREGAS_MULTIPLAS, n),
+        "Festival": festival,
+        "City": _sortear(rng, CIDADES, n),
+        "Time_taken(min)": "(min) " + pd.Series(tempo).astype(str),
+    })
+
+                                            # FUNÇÃO DE GRAVAÇÃO DO CSV SINTÉTICO
+
+def gerar_csv(caminho, linhas, semente=0, tamanho_bloco=1_000_000):
+    """ Função que grava um csv sintético de `linhas` pedidos em blocos (a memória usada é a de um bloco,
+    mesmo para dezenas de milhões de linhas). Se o arquivo já existe, é reaproveitado.
+
+    Entrada: caminho do csv, quantidade de linhas, semente, linhas por bloco
+    Saída: caminho do csv
+    """
+    caminho = Path(caminho)
+    if caminho.exists():
+        return caminho
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(".csv.tmp")
+    for inicio in range(0, linhas, tamanho_bloco):
+        bloco = gerar_pedidos(min(tamanho_bloco, linhas - inicio), semente, inicio)
+        bloco.to_csv(temporario, mode="w" if inicio == 0 else "a", header=inicio == 0, index=False)
+    temporario.replace(caminho)
+    return caminho
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Grava um csv sintético com o formato de dataset/train.csv (para testar o dashboard com mais dados:
+    CURRY_... apontando para ele ou copiado para dataset/train.csv).
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("destino")
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    caminho = gerar_csv(args.destino, args.linhas, args.semente)
+    print(f"{args.linhas:,} pedidos em {caminho} ({caminho.stat().st_size / 1024 ** 2:,.1f} MB, {time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from benchmarks.bench_ingestao import medir_pico
+from benchmarks.sintetico import gerar_csv
+from utils.consultas import BackendDuckDB, BackendPandas, ConsultasFiltradas
+from utils.cubo import montar_cubo, montar_entregadores_dia
+from utils.dados import carregar_e_limpar_dados, carregar_versionado, ler_e_limpar_csv
+from utils.distancia import distancia_entrega
+from utils.enriquecimento import enriquecer_dados
+from utils.filtros import IndiceFiltro, ordenar_por_data
+from utils.limpeza import limpar_dados
+from utils.perfil_entregadores import montar_dimensao, montar_perfil
+from utils.ranking import estatisticas_entregadores, ranking_extremos
+from utils.sketches import montar_sketches
+from utils.visualizacoes import (
+    delivery_by_age, distancia_media, entregas_no_raio, festival_comparison, map, mapa_agregado, meantime_by_citytrafic, meantime_by_delivery,
+    media_de_notas_por_trafego, order_by_city_and_traffic, order_by_date, order_by_deliver, order_by_traffic, order_by_week, percentis_por_cidade,
+    time_by_city,
+)
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Funções de gráfico medidas (utils.visualizacoes), pela página que as mostra; a previsão fica de fora (recebe os
+# modelos já ajustados, não as consultas)
+PAGINAS = {
+    "1_visao_empresa": [order_by_date, order_by_traffic, order_by_city_and_traffic, order_by_week, order_by_deliver, map, mapa_agregado],
+    "2_visao_entregadores": [media_de_notas_por_trafego, delivery_by_age],
+    "3_visao_restaurante": [
+        distancia_media, time_by_city, meantime_by_delivery, meantime_by_citytrafic, percentis_por_cidade, festival_comparison, entregas_no_raio,
+    ],
+}
+
+# Versão do formato do json de resultados
+VERSAO_RESULTADOS = 1
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE MONTAGEM DOS CASOS
+
+def montar_casos(caminho_csv, backend):
+    """ Função que prepara, para um csv, a lista de casos medidos (nome, função sem argumentos). As entradas de cada
+    caso (csv bruto, pedidos limpos, consultas) são preparadas antes, para que cada medição cubra só a função.
+
+    Entrada: caminho do csv, backend das consultas ("pandas" ou "duckdb")
+    Saída: lista de (nome, função)
+    """
+    bruto = pd.read_csv(caminho_csv)
+    limpo = limpar_dados(bruto)
+    df1 = ordenar_por_data(enriquecer_dados(limpar_dados(bruto)))
+    indice = IndiceFiltro(df1)
+    trafegos = indice.valores("Road_traffic_density")
+    data_limite = df1["Order_Date"].max()
+    # garante o feather em disco, para medir o carregamento com o cache colunar quente
+    carregar_versionado(caminho_csv)
+
+    casos = [
+        ("leitura do csv", lambda: pd.read_csv(caminho_csv)),
+        ("limpar_dados", lambda: limpar_dados(bruto)),
+        ("enriquecer_dados", lambda: enriquecer_dados(limpo.copy())),
+        ("distancia_entrega", lambda: distancia_entrega(df1)),
+        ("ler_e_limpar_csv (sem cache)", lambda: ler_e_limpar_csv(caminho_csv)),
+        ("carregar_versionado (feather)", lambda: carregar_versionado(caminho_csv)),
+        ("carregar_e_limpar_dados (memória)", lambda: carregar_e_limpar_dados(caminho_csv)),
+        ("ordenar_por_data", lambda: ordenar_por_data(df1)),
+        ("IndiceFiltro", lambda: IndiceFiltro(df1)),
+        ("IndiceFiltro.filtrar", lambda: indice.filtrar(df1, data_limite, {"Road_traffic_density": trafegos[:2]})),
+        ("montar_cubo", lambda: montar_cubo(df1)),
+        ("montar_entregadores_dia", lambda: montar_entregadores_dia(df1)),
+        ("montar_sketches", lambda: montar_sketches(df1)),
+        ("montar_perfil", lambda: montar_perfil(df1)),
+        ("montar_dimensao", lambda: montar_dimensao(df1)),
+    ]
+
+    base = BackendDuckDB(caminho_csv) if backend == "duckdb" else BackendPandas(caminho_csv)
+    consultas = ConsultasFiltradas(base, data_limite, trafegos)
+    estatisticas = estatisticas_entregadores(consultas)
+    casos += [
+        ("estatisticas_entregadores", lambda: estatisticas_entregadores(consultas)),
+        ("ranking_extremos", lambda: ranking_extremos(estatisticas, "time_taken", 10)),
+    ]
+
+    # busca por raio em volta do restaurante com mais pedidos, como a página começa
+    restaurante = base.restaurantes().iloc[0]
+    argumentos = {
+        "mapa_agregado": ("Entregas", "Mapa de calor", "hex", 2.0, "folium"),
+        "entregas_no_raio": (float(restaurante.iloc[0]), float(restaurante.iloc[1]), 3.0, 5),
+    }
+    for pagina, funcoes in PAGINAS.items():
+        for funcao in funcoes:
+            extras = argumentos.get(funcao.__name__, ())
+            casos.append((f"{pagina}.{funcao.__name__}", lambda funcao=funcao, extras=extras: funcao(consultas, *extras)))
+    return casos
+
+                                            # FUNÇÃO DE MEDIÇÃO DE UM CASO
+
+def medir_caso(funcao, repeticoes):
+    """ Mede um caso: o tempo é o menor de `repeticoes` execuções (menos ruído de outros processos) e a mediana fica
+    junto; o pico de memória é medido numa execução separada, porque o tracemalloc deixa as alocações mais lentas.
+
+    Saída: dicionário com tempo_s, tempo_mediana_s e pico_mb
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    _, pico = medir_pico(funcao)
+    return {"tempo_s": min(tempos), "tempo_mediana_s": statistics.median(tempos), "pico_mb": pico}
+
+                                            # FUNÇÃO DE DESCRIÇÃO DO AMBIENTE
+
+def ambiente():
+    """ Função que descreve onde a rodada foi feita (para comparar só rodadas comparáveis).
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+                                            # FUNÇÃO DE COMPARAÇÃO COM A BASE
+
+def comparar_com_base(resultados, base, tolerancia, folga_s, folga_mb):
+    """ Função que compara uma rodada com a rodada base (mesma função e mesma quantidade de linhas):
+    é regressão quando o tempo (ou o pico de memória) passa da base em mais de `tolerancia` (fração) E em mais
+    da folga absoluta (funções de milissegundos oscilam bem mais que 20% sem ter piorado).
+
+    Entrada: resultados da rodada, resultados da base, tolerância, folgas absolutas de tempo (s) e memória (MB)
+    Saída: lista de regressões (textos)
+    """
+    anteriores = {(item["funcao"], item["linhas"]): item for item in base["resultados"]}
+    regressoes = []
+    print(f"\n{'função':>48} {'linhas':>12} {'tempo':>10} {'base':>10} {'Δ':>8} {'pico':>10} {'base':>10} {'Δ':>8}")
+    for item in resultados:
+        anterior = anteriores.get((item["funcao"], item["linhas"]))
+        if anterior is None:
+            continue
+        variacao_tempo = item["tempo_s"] / anterior["tempo_s"] - 1 if anterior["tempo_s"] else 0.0
+        variacao_pico = item["pico_mb"] / anterior["pico_mb"] - 1 if anterior["pico_mb"] else 0.0
+        piorou_tempo = variacao_tempo > tolerancia and item["tempo_s"] - anterior["tempo_s"] > folga_s
+        piorou_pico = variacao_pico > tolerancia and item["pico_mb"] - anterior["pico_mb"] > folga_mb
+        marca = " <- REGRESSÃO" if piorou_tempo or piorou_pico else ""
+        print(f"{item['funcao']:>48} {item['linhas']:>12,} {item['tempo_s']:>9.4f}s {anterior['tempo_s']:>9.4f}s {variacao_tempo:>+8.0%} "
+              f"{item['pico_mb']:>8.1f}MB {anterior['pico_mb']:>8.1f}MB {variacao_pico:>+8.0%}{marca}")
+        if piorou_tempo:
+            regressoes.append(f"{item['funcao']} ({item['linhas']:,} linhas): tempo {variacao_tempo:+.0%}")
+        if piorou_pico:
+            regressoes.append(f"{item['funcao']} ({item['linhas']:,} linhas): pico de memória {variacao_pico:+.0%}")
+    return regressoes
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Mede, isoladamente, cada etapa do dashboard sobre pedidos sintéticos (benchmarks.sintetico) de vários tamanhos:
+    leitura e limpeza, cache em disco, distância, índice de filtros, cubo, sketches, perfil dos entregadores, ranking e cada função de gráfico
+    das páginas. Grava tempo e pico de memória num json e, com --base, marca as regressões em relação a uma rodada
+    anterior (sai com código 1 se houver alguma).
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="tamanhos (até dezenas de milhões)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--pasta", default=None, help="onde guardar os csvs sintéticos (reaproveitados entre rodadas); padrão: temporária")
+    parser.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas", help="backend das consultas dos gráficos")
+    parser.add_argument("--filtro", default=None, help="expressão regular: mede só as funções cujo nome casa")
+    parser.add_argument("--saida", default="benchmarks/resultados.json")
+    parser.add_argument("--base", default=None, help="json de uma rodada anterior para marcar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.20)
+    parser.add_argument("--folga-s", type=float, default=0.005)
+    parser.add_argument("--folga-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    temporaria = tempfile.TemporaryDirectory() if args.pasta is None else None
+    pasta = Path(args.pasta or temporaria.name)
+    resultados = []
+    try:
+        for linhas in args.linhas:
+            inicio = time.perf_counter()
+            caminho = gerar_csv(pasta / f"pedidos_{linhas}_{args.semente}.csv", linhas, args.semente)
+            print(f"--- {linhas:,} pedidos sintéticos ({caminho.stat().st_size / 1024 ** 2:,.1f} MB, pronto em {time.perf_counter() - inicio:.1f} s)")
+            for nome, funcao in montar_casos(caminho, args.backend):
+                if args.filtro and not re.search(args.filtro, nome):
+                    continue
+                medida = medir_caso(funcao, args.repeticoes)
+                resultados.append({"funcao": nome, "linhas": linhas, **medida})
+                print(f"{nome:>48}: {medida['tempo_s']:9.4f} s (mediana {medida['tempo_mediana_s']:9.4f} s) | pico {medida['pico_mb']:9.1f} MB")
+            # libera a base compartilhada deste tamanho antes do próximo
+            st.cache_resource.clear()
+    finally:
+        if temporaria is not None:
+            temporaria.cleanup()
+
+    rodada = {"versao": VERSAO_RESULTADOS, "ambiente": ambiente(), "backend": args.backend, "repeticoes": args.repeticoes, "resultados": resultados}
+    Path(args.saida).parent.mkdir(parents=True, exist_ok=True)
+    Path(args.saida).write_text(json.dumps(rodada, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados gravados em {args.saida}")
+
+    if args.base:
+        base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+        if base.get("ambiente", {}).get("plataforma") != rodada["ambiente"]["plataforma"]:
+            print("Aviso: a base foi medida em outra plataforma; as diferenças podem não ser do código")
+        if base.get("backend") != rodada["backend"]:
+            print(f"Aviso: a base usou o backend {base.get('backend')} e esta rodada usou {rodada['backend']}")
+        regressoes = comparar_com_base(resultados, base, args.tolerancia, args.folga_s, args.folga_mb)
+        if regressoes:
+            print("\nFALHOU: regressões em relação à base")
+            for regressao in regressoes:
+                print(f"  - {regressao}")
+            sys.exit(1)
+        print("\nOK: nenhuma regressão em relação à base")
+
+
+if __name__ == "__main__":
+    main()
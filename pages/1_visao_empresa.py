@@ -1,203 +1,27 @@
 # ==================================================================================================================================================================#
                                                                             # BIBLIOTECAS E IMPORT
 # ==================================================================================================================================================================#
-import numpy as np
-import haversine
-import pandas as pd
-import plotly.express as px
 import streamlit as st
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
+from utils import configuracao
+from utils.aquecimento import iniciar_aquecimento
+from utils.consultas import ConsultasFiltradas, carregar_backend, faixa_distancia
+from utils.dados import memorizar, mostrar_estatisticas_cache
+from utils.graficos import mostrar_figura
+from utils.geo import OPCOES_TAMANHO_CELULA_KM
+from utils.instrumentacao import iniciar_execucao, mostrar_painel_instrumentacao, trecho
+from utils.previsao import MEDIDAS_PREVISAO, TODAS_CIDADES, previsoes_compartilhadas
+from utils.secoes import secoes_visiveis
+from utils.visualizacoes import map, mapa_agregado, order_by_city_and_traffic, order_by_date, order_by_deliver, order_by_traffic, order_by_week, order_forecast
 
-#===========================================================================================================================================================================                             
-                                                                                # FUNÇÕES
-#===========================================================================================================================================================================
-
-                                            # FUNÇÃO DE LIMPEZA DE COLUNAS DE TEXTO
-
-def limpar_colunas_texto (df1):
-    ''' Função que limpa as colunas com formato texto em um data frame:
-    1 - cria uma cópia do dataframe
-    2 - Cria uma variável para alocar as colunas do tipo texto
-    3 - Percorre a variável (lista) e, para cada item, aplicar a padronização de texto e substituição dos valores de texto NaN por none
-    4 - retorna o data frame limpo
-
-    Parâmetro: Data frame a ser limpo
-
-    Retorno: Data frame com colunas do tipo objetos limpas e padronizadas para letra minúscula
-    '''
-#1.1
-    df_limpo = df1.copy()
-#1.2
-    colunas = df_limpo.select_dtypes(include = ["object"]).columns
-#1.3
-    for coluna in colunas:
-        df_limpo[coluna] = df_limpo[coluna].str.strip().str.casefold()
-        df_limpo[coluna] = df_limpo[coluna].replace("nan",np.nan)
-#1.5
-    return df_limpo
-
-
-                                            # FUNÇÃO DE PADRONIZAÇÃO DAS COLUNAS
-
-def padronizar_colunas (df1):
-    ''' Função que padroniza as colunas em um data frame:
-        1 - Modifica todas as colunas com dados em formato equivocado para o seu formato adequado
-        2 - Retorna um data frame padronizado
-    '''
-
-    df_padronizado = df1.copy()
-    df_padronizado["Delivery_person_Age"] = pd.to_numeric(df_padronizado["Delivery_person_Age"], errors='coerce')
-    df_padronizado["Delivery_person_Ratings"] = pd.to_numeric(df_padronizado["Delivery_person_Ratings"], errors='coerce')
-    df_padronizado["multiple_deliveries"] = pd.to_numeric(df_padronizado["multiple_deliveries"], errors='coerce')
-    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].str.removeprefix("(min)")
-    df_padronizado["Time_taken(min)"] = pd.to_numeric(df_padronizado["Time_taken(min)"], errors='coerce')
-    df_padronizado["Order_Date"] = pd.to_datetime(df_padronizado["Order_Date"],format = "%d-%m-%Y", errors='coerce')
-    df_padronizado['Time_Orderd'] = pd.to_datetime(df_padronizado['Time_Orderd'],format='%H:%M:%S', errors='coerce').dt.time
-    df_padronizado['Time_Order_picked'] = pd.to_datetime(df_padronizado['Time_Order_picked'],format='%H:%M:%S', errors='coerce').dt.time
-    df_padronizado.dropna(inplace=True)
-    df_padronizado["Delivery_person_Age"] = df_padronizado["Delivery_person_Age"].astype(int)
-    df_padronizado["multiple_deliveries"] = df_padronizado["multiple_deliveries"].astype(int)
-    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].astype(int)
-    df_padronizado["Weatherconditions"] = df_padronizado["Weatherconditions"].str.removeprefix("conditions ")
-    df_padronizado = df_padronizado.rename(columns = {"Time_taken(min)" : "time_taken"})
-    return df_padronizado
-                                        # FUNÇÃO DE CARREGAMENTO E LIMPEZA COM CACHE
-@st.cache_data
-def carregar_e_limpar_dados():
-    """
-    Função que carrega, limpa e padroniza os dados do arquivo csv principal, guardando as ações no cache do streamlit
-    para otimizar o carregamento da página.
-    
-    1 - Recebe um dataset
-    2 - aplica as funções de limpeza e padronização
-    3 - retorna o dataset limpo e padronizado e armazena em cache
-    
-    Entrada: dataframe original
-    Saída: dataframe limpo
-    """
-    df = pd.read_csv("dataset/train.csv")
-    df1 = df.copy()
-    df1 = limpar_colunas_texto(df1)
-    df1 = padronizar_colunas(df1)
-    return df1
-
-                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR DIA
-
-def order_by_date(df1):
-    """ Função para criar um gráfico de barras de quantidade de pedidos por dia:
-    1 - cria uma variavel (df_aux) que recebe o grouby feito em df1
-    2 - cria uma variavel (fig) para receber o grafico de barras
-
-    Entrada: dataframe
-    Saída: gráfico
-
-    """
-    df_aux = df1.groupby("Order_Date")["ID"].count().reset_index()
-    fig = px.bar(df_aux, x="Order_Date", y="ID", text="ID", title="Pedidos por Dia")
-    return fig
-
-                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE DISTRIBUIÇÃO DE ENTREGAS POR TIPO DE TRÁFEGO
-
-
-def order_by_traffic(df1):
-    """ Função que desenha um gráfico de pizza da distribuição de entregas por tipo de tráfego
-    1- cria uma variavel auxiliar (df_aux) que recebe o groupby feito em df1
-    2- cria uma variavel (fig) que recebe um gráfico de pizza dos ids por tipo de tráfego
-
-    Entrada: dataframe
-    saída: gráfico
-    """
-    df_aux = df1.groupby("Road_traffic_density")["ID"].count().reset_index()
-    fig = px.pie(df_aux, values='ID', names='Road_traffic_density', title="Distribuição por Tipo de Tráfego")
-    return fig
-
-    
-                                            # FUNÇÃO DE CRIAÇÃO DO GRÁFICO DA QUANTIDADE DE ENTREGAS POR CIDADE E TIPO DE TRAFEGO
-
-def order_by_city_and_traffic(df1):
-    """ Função que desenha um gráfico de pizza da quantidade de entregas por tipo de tráfego
-        1- cria uma variavel auxiliar (df_aux) que recebe o groupby feito em df1
-        2- cria uma variavel (fig) que recebe um gráfico de barras da quantidade de entregas por cidade e tipo de tráfego
-    
-        Entrada: dataframe
-        saída: gráfico
-    """
-    df_aux = df1.groupby(["City", "Road_traffic_density"])["ID"].count().reset_index()
-    fig = px.bar(df_aux, x="City", y="ID", color='Road_traffic_density', barmode='group', text='ID', title="Pedidos por Cidade e Tráfego")
-    fig.update_traces(textposition='outside', texttemplate='%{y}', cliponaxis=False)
-    return fig
-
-                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR SEMANA
-
-
-def order_by_week(df1):
-    """ Função que desenha um gráfico de barras da quantidade de entregas por semana
-    1- cria uma variavel auxiliar (df_aux) que recebe o groupby feito em df1
-    2- cria uma variavel (fig) que recebe um gráfico de barras da quantidade de pedidos por semana
-
-    Entrada: dataframe
-    saída: gráfico
-    """
-    df1['Week'] = df1['Order_Date'].dt.strftime('%U')
-    df_aux =df1.groupby('Week')["ID"].count().reset_index()
-    fig = px.bar(df_aux, x='Week', y='ID', text="ID", title="Total de Pedidos por Semana do Ano")
-    return fig
-
-
-                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR QUANTIDADE DE ENTREGADORES NA SEMANA
-
-def order_by_deliver(df1):   
-    """ Função que desenha um gráfico de linhas da quantidade de entregadores a cada semana
-    1- cria uma variavel auxiliar (df1_aux) que recebe o groupby feito em df1 para entregas
-    2 - cria uma variavel auxiliar (df2_aux) que recebe o groupby feito em df1 para entregadores
-    3 - cria um dataframe unindo as duas visualizações de groupby
-    4- cria uma variavel (fig) que recebe um gráfico de linhas da quantidade de entregas feitas por entregadores na semana
-    
-    Entrada: dataframe
-    saída: gráfico
-    """
-    df1_aux = df1.groupby("Week")["ID"].count().reset_index()
-    df2_aux = df1.groupby("Week")["Delivery_person_ID"].nunique().reset_index()
-    df_final = pd.merge(df1_aux, df2_aux, how="inner")
-    df_final["order_by_deliver"] = df_final["ID"] / df_final["Delivery_person_ID"]
-    fig = px.line(df_final, x="Week", y="order_by_deliver", title="Média de Pedidos por Entregador a cada Semana")
-    return fig
-
-
-                                                # FUNÇÃO DE CRIAÇÃO DO MAPA DOS LOCAIS DE ENTREGA
-
-def map(df1):
-    """ Função que desenha um mapa da distância média dos locais de entrega
-    1- cria uma variavel auxiliar (df1_aux) que recebe o groupby feito em df1 as medias da latitude e longitude dos locais de entrega
-    2 - realiza um if para verificar se a coluna contem dados
-    3 - realiza um for para cada linha da coluna de latitude e longitude para adicionar ao mapa
-    4- cria um mapa com dimensões 1024x600
-    
-    Entrada: dataframe
-    saída: mapa
-    """
-    df1_aux = df1.groupby(["City", "Road_traffic_density"])[["Delivery_location_latitude", "Delivery_location_longitude"]].median().reset_index()
-    
-    if not df1_aux.empty:
-        mapa = folium.Map(location=[df1_aux['Delivery_location_latitude'].iloc[0], df1_aux['Delivery_location_longitude'].iloc[0]], zoom_start=11)
-        
-        for index, local in df1_aux.iterrows():
-            folium.Marker(
-                location=[local['Delivery_location_latitude'], local['Delivery_location_longitude']],
-                popup=f"{local['City']} - {local['Road_traffic_density']}"
-            ).add_to(mapa)
-        
-        folium_static(mapa, width=1024, height=600)
-    else:
-        st.warning("Nenhum dado disponível para os filtros selecionados.")
-    return None
 #===========================================================================================================================================================================                              
                                                                     #CARREGAMENTO DOS DADOS
 #===========================================================================================================================================================================
 
-df1 = carregar_e_limpar_dados()                                                            
+iniciar_execucao("Visão Empresa")
+iniciar_aquecimento()
+backend = carregar_backend()
+data_inicial, data_final = backend.limites_data()
 
 #===========================================================================================================================================================================#
                                                                         # LAYOUT
@@ -215,9 +39,9 @@ st.sidebar.markdown("""---""")
 st.sidebar.markdown("## Selecione uma data limite:")
 date_slider = st.sidebar.slider(
     "Filtro de Datas",
-    min_value=df1["Order_Date"].min().to_pydatetime(),
-    max_value=df1["Order_Date"].max().to_pydatetime(),
-    value=df1["Order_Date"].max().to_pydatetime(),
+    min_value=data_inicial.to_pydatetime(),
+    max_value=data_final.to_pydatetime(),
+    value=data_final.to_pydatetime(),
     format="DD/MM/YYYY"
 )
 st.sidebar.markdown("""---""")
@@ -225,35 +49,49 @@ st.sidebar.markdown("""---""")
 # Filtro Condições de Trânsito
 traffic_options = st.sidebar.multiselect(
     "Condições de Trânsito",
-    options=df1["Road_traffic_density"].unique(),
-    default=df1["Road_traffic_density"].unique()
+    options=backend.valores("Road_traffic_density"),
+    default=backend.valores("Road_traffic_density")
+)
+st.sidebar.markdown("""---""")
+
+# Filtro Faixa de Distância (km entre o restaurante e o local de entrega)
+distancia_minima, distancia_maxima = backend.limites_distancia()
+distance_slider = st.sidebar.slider(
+    "Distância da Entrega (km)",
+    min_value=distancia_minima,
+    max_value=distancia_maxima,
+    value=(distancia_minima, distancia_maxima),
+    step=0.5,
+    help="A ponta direita inclui todas as distâncias acima dela.",
 )
 
 # Separador
 st.sidebar.markdown("""---""")
 
+# Estatísticas do cache de dados
+mostrar_estatisticas_cache()
 
-# Filtro de Data
-linhas_selecionadas_data = df1['Order_Date'] <= date_slider
-df1 = df1.loc[linhas_selecionadas_data, :]
 
-# Filtro de Trânsito
-linhas_selecionadas_transito = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas_transito, :]
+# Filtros de Data, de Trânsito e de Distância: aplicados pelo backend em cada consulta (índice e cubo no pandas,
+# WHERE no DuckDB); com uma faixa de distância, o pandas responde pelos pedidos filtrados
+consultas = ConsultasFiltradas(backend, date_slider, traffic_options, faixa_distancia(distance_slider, (distancia_minima, distancia_maxima)))
 
 
 #===========================================================================================================================================================================#
                                                                         # ABAS
 #===========================================================================================================================================================================#
-tab_gerencial, tab_tatica, tab_geografica = st.tabs(["Visão Gerencial", "Visão Tática", "Visão Geográfica"])
+# Cada aba é um st.fragment: os widgets de dentro dela (ex.: os controles do mapa) reexecutam só a aba, e no modo
+# "preguicosa" (utils.secoes) só a aba escolhida é calculada: mudar o tráfego não refaz o mapa de uma aba escondida
 
-# Aba Gerencial
-with tab_gerencial:
-    
+                                            # ABA GERENCIAL
+
+@st.fragment
+def aba_gerencial(consultas):
     with st.container():
-        fig = order_by_date(df1)
+        fig = memorizar(order_by_date, consultas.data_limite, consultas.trafegos, consultas)
         st.header("Order by Date")
-        st.plotly_chart(fig, use_container_width=True)
+        with trecho("order_by_date", "render"):
+            mostrar_figura(fig)
         
      
     with st.container():
@@ -261,29 +99,112 @@ with tab_gerencial:
 
         with col1:
             st.header("Traffic Order Share")
-            fig = order_by_traffic(df1)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = memorizar(order_by_traffic, consultas.data_limite, consultas.trafegos, consultas)
+            with trecho("order_by_traffic", "render"):
+                mostrar_figura(fig)
 
         with col2:
             st.header("Traffic Order City")
-            fig = order_by_city_and_traffic(df1)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = memorizar(order_by_city_and_traffic, consultas.data_limite, consultas.trafegos, consultas)
+            with trecho("order_by_city_and_traffic", "render"):
+                mostrar_figura(fig)
             
+                                            # SEÇÃO DE PREVISÃO DA ABA TÁTICA
 
-# Aba Tática
-with tab_tatica:
+def secao_previsao(backend, aguardando):
+    """ Seção de previsão da aba tática: seletores da série e gráfico da previsão já ajustada (utils.previsao).
+    Com `aguardando`, a seção está se atualizando sozinha à espera dos modelos da versão atual dos dados.
+    """
+    previsoes, atualizadas = previsoes_compartilhadas().obter(backend)
+    if aguardando and previsoes_compartilhadas().ajustando is None:
+        # ajuste terminado: uma execução nova da página para a seção parar de se atualizar
+        st.rerun()
+
+    col1, col2, col3 = st.columns(3)
+    frequencia = col1.radio("Frequência", ["semana", "dia"], horizontal=True, key="frequencia_previsao")
+    medida = col2.radio("Medida", MEDIDAS_PREVISAO, horizontal=True, key="medida_previsao")
+    cidades = [TODAS_CIDADES] if previsoes is None else sorted(previsoes.tabela["City"].unique(), key=lambda cidade: cidade != TODAS_CIDADES)
+    cidade = col3.selectbox("Cidade", cidades, key="cidade_previsao")
+
+    erro = previsoes_compartilhadas().erro
+    if erro is not None and erro[0] == backend.versao:
+        st.error(f"Não foi possível ajustar os modelos de previsão: {erro[1]}")
+    if previsoes is None:
+        if aguardando:
+            st.info("Ajustando os modelos de previsão em segundo plano...")
+        return
+    with trecho("order_forecast", "render"):
+        mostrar_figura(order_forecast(previsoes, frequencia, cidade, medida))
+    modelo = previsoes.tabela.loc[
+        (previsoes.tabela["frequencia"] == frequencia) & (previsoes.tabela["City"] == cidade) & (previsoes.tabela["medida"] == medida), "modelo"
+    ]
+    st.caption(
+        f"Modelo: {modelo.iloc[0] if len(modelo) else '-'}. Ajustado sobre todos os pedidos (os filtros da sidebar não se aplicam)"
+        + ("" if atualizadas or not aguardando else "; atualizando com os dados novos...")
+    )
+
+                                            # ABA TÁTICA
+
+@st.fragment
+def aba_tatica(consultas):
     with st.container():
         st.header("Pedidos por Semana")
-        fig = order_by_week(df1)
-        st.plotly_chart(fig, container_use_width=True)
+        fig = memorizar(order_by_week, consultas.data_limite, consultas.trafegos, consultas)
+        with trecho("order_by_week", "render"):
+            mostrar_figura(fig)
             
     with st.container():
         st.header("Pedidos por Entregadores")
-        fig = order_by_deliver(df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = memorizar(order_by_deliver, consultas.data_limite, consultas.trafegos, consultas)
+        with trecho("order_by_deliver", "render"):
+            mostrar_figura(fig)
+
+    with st.container():
+        st.header("Previsão por Cidade")
+        # enquanto os modelos da versão atual dos dados são ajustados (numa thread), a seção se atualiza sozinha
+        previsoes_compartilhadas().obter(consultas.backend)
+        ajustando = previsoes_compartilhadas().ajustando is not None
+        st.fragment(run_every=2 if ajustando else None)(secao_previsao)(consultas.backend, ajustando)
+
         
+                                            # ABA GEOGRÁFICA
+
+@st.fragment
+def aba_geografica(consultas):
+    col1, col2, col3, col4 = st.columns(4)
+    modo_mapa = col1.radio("Camada", ["Medianas", "Mapa de calor", "Agrupamentos"], horizontal=True)
+    pontos_mapa = col2.radio("Pontos", ["Entregas", "Restaurantes"], horizontal=True, disabled=modo_mapa == "Medianas")
+    forma_mapa = col3.radio("Células", ["hex", "grade"], horizontal=True, disabled=modo_mapa == "Medianas")
+    renderizador_mapa = col4.radio("Renderizador", ["folium", "pydeck"], horizontal=True, disabled=modo_mapa == "Medianas")
+    tamanho_celula = st.select_slider(
+        "Tamanho da célula (km)", options=sorted(set(OPCOES_TAMANHO_CELULA_KM) | {configuracao.TAMANHO_CELULA_KM}),
+        value=configuracao.TAMANHO_CELULA_KM,
+        disabled=modo_mapa == "Medianas",
+    )
+
+    if modo_mapa == "Medianas":
+        st.header("Localização Central por Cidade e Tráfego")
+        mapa = memorizar(map, consultas.data_limite, consultas.trafegos, consultas)
+    else:
+        st.header(f"{pontos_mapa} Agregados por Célula")
+        mapa = memorizar(
+            mapa_agregado, consultas.data_limite, consultas.trafegos, consultas, pontos_mapa, modo_mapa, forma_mapa, tamanho_celula, renderizador_mapa,
+        )
+
+    if mapa is None:
+        st.warning("Nenhum dado disponível para os filtros selecionados.")
+    elif isinstance(mapa, str):
+        with trecho("components_html", "render", bytes=len(mapa)):
+            components.html(mapa, width=1024, height=610)
+    else:
+        with trecho("pydeck_chart", "render"):
+            st.pydeck_chart(mapa)
+
+
+ABAS = {"Visão Gerencial": aba_gerencial, "Visão Tática": aba_tatica, "Visão Geográfica": aba_geografica}
+
+for nome_aba, container in secoes_visiveis(list(ABAS), "aba_visao_empresa").items():
+    with container:
+        ABAS[nome_aba](consultas)
 
-# Aba Geográfica
-with tab_geografica:
-    st.header("Localização Central por Cidade e Tráfego")
-    map (df1)
\ No newline at end of file
+mostrar_painel_instrumentacao()
@@ -1,177 +1,28 @@
 # ==================================================================================================================================================================#
                                                                             # BIBLIOTECAS E IMPORT
 # ==================================================================================================================================================================#
-import numpy as np
-import haversine
 import pandas as pd
-import plotly.express as px
 import streamlit as st
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
-
-#===========================================================================================================================================================================                             
-                                                                                # FUNÇÕES
-#===========================================================================================================================================================================
-
-                                            # FUNÇÃO DE LIMPEZA DE COLUNAS DE TEXTO
-
-def limpar_colunas_texto (df1):
-    ''' Função que limpa as colunas com formato texto em um data frame:
-    1 - cria uma cópia do dataframe
-    2 - Cria uma variável para alocar as colunas do tipo texto
-    3 - Percorre a variável (lista) e, para cada item, aplicar a padronização de texto e substituição dos valores de texto NaN por none
-    4 - retorna o data frame limpo
-
-    Parâmetro: Data frame a ser limpo
-
-    Retorno: Data frame com colunas do tipo objetos limpas e padronizadas para letra minúscula
-    '''
-#1.1
-    df_limpo = df1.copy()
-#1.2
-    colunas = df_limpo.select_dtypes(include = ["object"]).columns
-#1.3
-    for coluna in colunas:
-        df_limpo[coluna] = df_limpo[coluna].str.strip().str.casefold()
-        df_limpo[coluna] = df_limpo[coluna].replace("nan",np.nan)
-#1.5
-    return df_limpo
-
-
-                                            # FUNÇÃO DE PADRONIZAÇÃO DAS COLUNAS
-
-def padronizar_colunas (df1):
-    ''' Função que padroniza as colunas em um data frame:
-        1 - Modifica todas as colunas com dados em formato equivocado para o seu formato adequado
-        2 - Retorna um data frame padronizado
-    '''
-
-    df_padronizado = df1.copy()
-    df_padronizado["Delivery_person_Age"] = pd.to_numeric(df_padronizado["Delivery_person_Age"], errors='coerce')
-    df_padronizado["Delivery_person_Ratings"] = pd.to_numeric(df_padronizado["Delivery_person_Ratings"], errors='coerce')
-    df_padronizado["multiple_deliveries"] = pd.to_numeric(df_padronizado["multiple_deliveries"], errors='coerce')
-    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].str.removeprefix("(min)")
-    df_padronizado["Time_taken(min)"] = pd.to_numeric(df_padronizado["Time_taken(min)"], errors='coerce')
-    df_padronizado["Order_Date"] = pd.to_datetime(df_padronizado["Order_Date"],format = "%d-%m-%Y", errors='coerce')
-    df_padronizado['Time_Orderd'] = pd.to_datetime(df_padronizado['Time_Orderd'],format='%H:%M:%S', errors='coerce').dt.time
-    df_padronizado['Time_Order_picked'] = pd.to_datetime(df_padronizado['Time_Order_picked'],format='%H:%M:%S', errors='coerce').dt.time
-    df_padronizado.dropna(inplace=True)
-    df_padronizado["Delivery_person_Age"] = df_padronizado["Delivery_person_Age"].astype(int)
-    df_padronizado["multiple_deliveries"] = df_padronizado["multiple_deliveries"].astype(int)
-    df_padronizado["Time_taken(min)"] = df_padronizado["Time_taken(min)"].astype(int)
-    df_padronizado["Weatherconditions"] = df_padronizado["Weatherconditions"].str.removeprefix("conditions ")
-    df_padronizado = df_padronizado.rename(columns = {"Time_taken(min)" : "time_taken"})
-    return df_padronizado
-
-    
-                                        # FUNÇÃO DE CARREGAMENTO E LIMPEZA COM CACHE
-@st.cache_data
-def carregar_e_limpar_dados():
-    """
-    Função que carrega, limpa e padroniza os dados do arquivo csv principal, guardando as ações no cache do streamlit
-    para otimizar o carregamento da página.
-    
-    1 - Recebe um dataset
-    2 - aplica as funções de limpeza e padronização
-    3 - retorna o dataset limpo e padronizado e armazena em cache
-    
-    Entrada: dataframe original
-    Saída: dataframe limpo
-    """
-    df = pd.read_csv("dataset/train.csv")
-    df1 = df.copy()
-    df1 = limpar_colunas_texto(df1)
-    df1 = padronizar_colunas(df1)
-    return df1
-
-                                        # FUNÇÃO DE GRÁFICO DA DISTANCIA MÉDIA POR CIDADE
-
-def distancia_media (df1):
-    """
-    Função para calcular a distância média de entrega por cidade e gerar um gráfico de pizza.
-
-    1 - Agrupa o dataframe por cidade e calcula a distância média.
-    2 - Cria um gráfico de pizza com as distâncias médias por cidade.
-
-    Entrada: Dataframe 
-    Saída: Gráfico.
-    """
-    distancia_media_cidade = df1.loc[:, ['City', 'distance']].groupby('City').mean().reset_index()
-    fig = px.pie(distancia_media_cidade, 
-                 values='distance', 
-                 names='City', 
-                 hover_data=['distance'],
-                 labels={'distance':'Distância Média'})
-    return fig
-
-                                             # FUNÇÃO DE GRÁFICO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR CIDADE
-  
-def time_by_city (df1):
-    """
-    Função para calcular a média e desvio padrão do tempo de entrega por cidade e gerar um gráfico de barras.
-
-    1 - Agrupa o dataframe por cidade e calcula a média e desvio padrão do tempo.
-    2 - Cria um gráfico de barras com a média como altura e o desvio padrão como barra de erro.
-
-    Entrada: Dataframe
-    Saída: Gráfico de barras
-    """
-    df_aux = df1.loc[:, ['City', 'time_taken']].groupby("City").agg({"time_taken" : ["mean","std"]}).reset_index()
-    df_aux.columns = ['City', 'time_mean', 'time_std']
-    fig = px.bar(df_aux, 
-                 x='City', 
-                 y='time_mean', 
-                 error_y='time_std',
-                 labels={'City': 'Cidade', 'time_mean': 'Tempo Médio de Entrega (min)'},
-                 text='time_mean')
-    fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
-    return fig
-
-                                                 # FUNÇÃO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR TIPO DE PEDIDO
-
-def meantime_by_delivery (df1):
-    """
-    Função para calcular a média e desvio padrão do tempo de entrega, agrupando por cidade e tipo de pedido.
-
-    1 - Agrupa o dataframe por cidade e tipo de pedido.
-    2 - Calcula a média e desvio padrão do tempo para cada grupo.
-    3 - Renomeia as colunas do dataframe resultante.
-
-    Entrada: Dataframe
-    Saída: Dataframe
-    """
-    df1_time = df1.groupby(["City","Type_of_order"]).agg({"time_taken" : ["mean","std"]}).reset_index()
-    df1_time.columns = ["Cidade", "Tipo de Pedido", "Tempo Médio", "Desvio Padrão"]
-    return df1_time
-
-                                                     # FUNÇÃO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR TRÁFEGO
-
-def meantime_by_citytrafic (df1):
-    """
-    Função para calcular a média e desvio padrão do tempo de entrega por cidade e densidade de tráfego, e gerar um gráfico sunburst.
-
-    1 - Agrupa o dataframe por cidade e densidade de tráfego.
-    2 - Calcula a média e desvio padrão do tempo para cada grupo.
-    3 - Cria um gráfico sunburst mostrando a hierarquia e os valores.
+from utils import configuracao
+from utils.aquecimento import iniciar_aquecimento
+from utils.comparacao import GERAL, NIVEL_CONFIANCA, tabela_festival
+from utils.consultas import CONSULTAS_PAGINAS, ConsultasFiltradas, carregar_backend, faixa_distancia
+from utils.dados import memorizar, mostrar_estatisticas_cache
+from utils.graficos import mostrar_figura
+from utils.instrumentacao import iniciar_execucao, mostrar_painel_instrumentacao, trecho
+from utils.secoes import secoes_visiveis
+from utils.visualizacoes import (
+    distancia_media, entregas_no_raio, festival_comparison, meantime_by_citytrafic, meantime_by_delivery, percentis_por_cidade, time_by_city,
+)
 
-    Entrada: Dataframe
-    Saída: Gráfico
-    """
-    df_aux = df1.groupby(["City","Road_traffic_density"]).agg({"time_taken" : ["mean","std"]}).reset_index()
-    df_aux.columns = ["City", "Road_traffic_density", "time_mean", "time_std"]
-    fig = px.sunburst(df_aux,
-                      path=['City', 'Road_traffic_density'],
-                      values='time_mean',
-                      color='time_std',
-                      color_continuous_scale='RdBu',
-                      hover_name="City")
-    return fig
 #===========================================================================================================================================================================                              
                                                                   # CARREGAMENTO DOS DADOS
 #===========================================================================================================================================================================
 
-df1 = carregar_e_limpar_dados()     
+iniciar_execucao("Visão Restaurantes")
+iniciar_aquecimento()
+backend = carregar_backend()
+data_inicial, data_final = backend.limites_data()
                                                                   
 #===========================================================================================================================================================================#
                                                                         # SIDEBAR
@@ -185,9 +36,9 @@ st.sidebar.markdown("""---""")
 st.sidebar.markdown("## Selecione uma data limite:")
 date_slider = st.sidebar.slider(
     "Filtro de Datas",
-    min_value=df1["Order_Date"].min().to_pydatetime(),
-    max_value=df1["Order_Date"].max().to_pydatetime(),
-    value=df1["Order_Date"].max().to_pydatetime(),
+    min_value=data_inicial.to_pydatetime(),
+    max_value=data_final.to_pydatetime(),
+    value=data_final.to_pydatetime(),
     format="DD/MM/YYYY"
 )
 st.sidebar.markdown("""---""")
@@ -195,21 +46,33 @@ st.sidebar.markdown("""---""")
 # Filtro Condições de Trânsito
 traffic_options = st.sidebar.multiselect(
     "Condições de Trânsito",
-    options=df1["Road_traffic_density"].unique(),
-    default=df1["Road_traffic_density"].unique()
+    options=backend.valores("Road_traffic_density"),
+    default=backend.valores("Road_traffic_density")
+)
+st.sidebar.markdown("""---""")
+
+# Filtro Faixa de Distância (km entre o restaurante e o local de entrega)
+distancia_minima, distancia_maxima = backend.limites_distancia()
+distance_slider = st.sidebar.slider(
+    "Distância da Entrega (km)",
+    min_value=distancia_minima,
+    max_value=distancia_maxima,
+    value=(distancia_minima, distancia_maxima),
+    step=0.5,
+    help="A ponta direita inclui todas as distâncias acima dela.",
 )
 
 # Separador
 st.sidebar.markdown("""---""")
 
+# Estatísticas do cache de dados
+mostrar_estatisticas_cache()
 
-# Filtro de Data
-linhas_selecionadas_data = df1['Order_Date'] <= date_slider
-df1 = df1.loc[linhas_selecionadas_data, :]
 
-# Filtro de Trânsito
-linhas_selecionadas_transito = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas_transito, :]
+# Filtros de Data, de Trânsito e de Distância: aplicados pelo backend em cada consulta (no pandas, todos os números
+# desta página saem do cubo diário, dos entregadores por dia e dos sketches, ou dos pedidos filtrados quando há uma
+# faixa de distância; no DuckDB, do WHERE sobre o parquet)
+consultas = ConsultasFiltradas(backend, date_slider, traffic_options, faixa_distancia(distance_slider, (distancia_minima, distancia_maxima)))
 
 # =======================================================================================================================================================================
 #                                                       LAYOUT - VISÃO RESTAURANTE
@@ -217,71 +80,134 @@ df1 = df1.loc[linhas_selecionadas_transito, :]
 st.title("Marketplace - Visão Restaurante")
 st.markdown("""---""")
 
+# Cada seção é um st.fragment; no modo "preguicosa" (utils.secoes) só a seção escolhida no seletor é calculada
+
 # --- Linha 1: Métricas Gerais ---
-with st.container():
+@st.fragment
+def secao_analise_geral(consultas):
     st.header("Análise Geral")
     
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        entregadores = df1['Delivery_person_ID'].nunique()
+        entregadores = int(memorizar(consultas.agregar, consultas.data_limite, consultas.trafegos, CONSULTAS_PAGINAS["entregadores_unicos"],
+                                     consulta="entregadores_unicos")['Delivery_person_ID'].iloc[0])
         st.metric("Entregadores Únicos", entregadores)
         
     with col2:
-        df1["distance"] = df1.apply(
-            lambda x: haversine.haversine(
-                (x['Restaurant_latitude'], x['Restaurant_longitude']),
-                (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1
-        )
-        media = df1["distance"].mean()
+        media = memorizar(consultas.agregar, consultas.data_limite, consultas.trafegos, CONSULTAS_PAGINAS["distancia_media"],
+                          consulta="distancia_media")["distance"].iloc[0]
         st.metric("Distância Média", f"{media:.2f} km")
         
-    df_festival_stats = df1.groupby("Festival")["time_taken"].agg(['mean', 'std']).reset_index()
-
-    with col3:
-        tempo_com_festival = df_festival_stats.loc[df_festival_stats['Festival'] == 'yes', 'mean'].iloc[0] if not df_festival_stats[df_festival_stats['Festival'] == 'yes'].empty else 0
-        st.metric("Tempo Médio (c/ Festival)", f"{tempo_com_festival:.2f} min")
-        
-    with col4:
-        std_com_festival = df_festival_stats.loc[df_festival_stats['Festival'] == 'yes', 'std'].iloc[0] if not df_festival_stats[df_festival_stats['Festival'] == 'yes'].empty else 0
-        st.metric("Desvio Padrão (c/ Festival)", f"{std_com_festival:.2f} min")
-        
-    with col5:
-        tempo_sem_festival = df_festival_stats.loc[df_festival_stats['Festival'] == 'no', 'mean'].iloc[0] if not df_festival_stats[df_festival_stats['Festival'] == 'no'].empty else 0
-        st.metric("Tempo Médio (s/ Festival)", f"{tempo_sem_festival:.2f} min")
-        
-    with col6:
-        std_sem_festival = df_festival_stats.loc[df_festival_stats['Festival'] == 'no', 'std'].iloc[0] if not df_festival_stats[df_festival_stats['Festival'] == 'no'].empty else 0
-        st.metric("Desvio Padrão (s/ Festival)", f"{std_sem_festival:.2f} min")
-
-st.markdown("""---""")
+    # a linha "Geral" da comparação do festival (a mesma do cache da seção Festival), sem procurar célula por célula
+    comparacao = memorizar(festival_comparison, consultas.data_limite, consultas.trafegos, consultas)
+    geral = comparacao[comparacao["dimensao"] == GERAL]
+    geral = geral.iloc[0] if not geral.empty else pd.Series(0.0, index=["media_com", "std_com", "media_sem", "std_sem"])
+
+    for coluna, rotulo, valor in (
+        (col3, "Tempo Médio (c/ Festival)", geral["media_com"]),
+        (col4, "Desvio Padrão (c/ Festival)", geral["std_com"]),
+        (col5, "Tempo Médio (s/ Festival)", geral["media_sem"]),
+        (col6, "Desvio Padrão (s/ Festival)", geral["std_sem"]),
+    ):
+        coluna.metric(rotulo, f"{0 if pd.isna(valor) else valor:.2f} min")
+
+# Tabela do efeito do festival
+@st.fragment
+def secao_festival(consultas):
+    st.header("Efeito do Festival no Tempo de Entrega")
+    comparacao = memorizar(festival_comparison, consultas.data_limite, consultas.trafegos, consultas)
+    with trecho("festival_comparison", "render"):
+        st.dataframe(tabela_festival(comparacao), use_container_width=True, hide_index=True)
+    st.caption(
+        f"Diferença = tempo médio com festival - sem festival, com intervalo de confiança de {NIVEL_CONFIANCA:.0%} "
+        "e p-valor do teste t de Welch (variâncias diferentes)."
+    )
 
 # Gráfico de Pizza 
-with st.container():
+@st.fragment
+def secao_distancia(consultas):
     st.header("Distribuição da Distância Média por Cidade")
-    fig = distancia_media (df1)
-    st.plotly_chart(fig, use_container_width=True)
-
-st.markdown("""---""")
+    fig = memorizar(distancia_media, consultas.data_limite, consultas.trafegos, consultas)
+    with trecho("distancia_media", "render"):
+        mostrar_figura(fig)
 
 #  ráfico com Intervalos
-with st.container():
+@st.fragment
+def secao_tempo_por_cidade(consultas):
     col1, col2 = st.columns(2)
     
     with col1:
         st.header("Distribuição do Tempo por Cidade")
-        fig = time_by_city (df1)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = memorizar(time_by_city, consultas.data_limite, consultas.trafegos, consultas)
+        with trecho("time_by_city", "render"):
+            mostrar_figura(fig)
 
     with col2:
         st.header("Tempo Médio por Tipo de Entrega (Tabela)")
-        df1_time = meantime_by_delivery (df1)
-        st.dataframe(df1_time, use_container_width=True)
-
-st.markdown("""---""")
+        df1_time = memorizar(meantime_by_delivery, consultas.data_limite, consultas.trafegos, consultas)
+        with trecho("meantime_by_delivery", "render"):
+            st.dataframe(df1_time, use_container_width=True)
 
 # Gráfico Sunburst
-with st.container():
+@st.fragment
+def secao_cidade_e_trafego(consultas):
     st.header("Tempo Médio por Cidade e Tipo de Tráfego")
-    fig = meantime_by_citytrafic (df1)
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    fig = memorizar(meantime_by_citytrafic, consultas.data_limite, consultas.trafegos, consultas)
+    with trecho("meantime_by_citytrafic", "render"):
+        mostrar_figura(fig)
+
+# Tabela de percentis
+@st.fragment
+def secao_percentis(consultas):
+    st.header("Percentis do Tempo de Entrega por Cidade")
+    df_percentis = memorizar(percentis_por_cidade, consultas.data_limite, consultas.trafegos, consultas)
+    with trecho("percentis_por_cidade", "render"):
+        st.dataframe(df_percentis, use_container_width=True)
+    if configuracao.BACKEND_CONSULTAS == "pandas" and consultas.distancia is None:
+        st.caption(f"Valores aproximados (sketches diários), com erro relativo de no máximo {configuracao.ERRO_RELATIVO_QUANTIS:.0%}.")
+
+# Busca por raio
+@st.fragment
+def secao_raio(consultas):
+    st.header("Entregas e Restaurantes em Volta de um Ponto")
+    restaurantes = consultas.backend.restaurantes()
+    if restaurantes.empty:
+        st.warning("Nenhum restaurante com coordenadas válidas.")
+        return
+
+    # o ponto começa no restaurante com mais pedidos
+    col1, col2, col3, col4 = st.columns(4)
+    lat = col1.number_input("Latitude", value=float(restaurantes.iloc[0, 0]), format="%.6f")
+    lon = col2.number_input("Longitude", value=float(restaurantes.iloc[0, 1]), format="%.6f")
+    raio_km = col3.slider("Raio (km)", min_value=0.5, max_value=25.0, value=3.0, step=0.5)
+    k = int(col4.number_input("Restaurantes próximos", min_value=1, max_value=50, value=5))
+
+    resumo, proximos = memorizar(entregas_no_raio, consultas.data_limite, consultas.trafegos, consultas, lat, lon, raio_km, k)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entregas no Raio", f"{resumo['entregas']:,}")
+    col2.metric("Tempo Médio", f"{resumo['tempo']:.2f} min" if resumo["entregas"] else "-")
+    col3.metric("Distância Média do Restaurante", f"{resumo['distancia']:.2f} km" if resumo["entregas"] else "-")
+
+    st.subheader(f"{k} Restaurantes Mais Próximos")
+    with trecho("restaurantes_proximos", "render"):
+        st.dataframe(proximos, use_container_width=True, hide_index=True)
+
+
+SECOES = {
+    "Análise Geral": secao_analise_geral,
+    "Festival": secao_festival,
+    "Distância": secao_distancia,
+    "Tempo por Cidade": secao_tempo_por_cidade,
+    "Cidade e Tráfego": secao_cidade_e_trafego,
+    "Percentis": secao_percentis,
+    "Busca por Raio": secao_raio,
+}
+
+for posicao, (nome_secao, container) in enumerate(secoes_visiveis(list(SECOES), "secao_visao_restaurante", abas=False).items()):
+    with container:
+        if posicao:
+            st.markdown("""---""")
+        SECOES[nome_secao](consultas)
+
+mostrar_painel_instrumentacao()
@@ -0,0 +1,25 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import pytest
+
+from benchmarks.sintetico import gerar_csv
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Pedidos do csv sintético dos testes: poucos o bastante para a suíte rodar em segundos, com grupos pequenos
+# (Semi-Urban tem ~0.4% dos pedidos) para exercitar os casos de borda dos quantis
+LINHAS_CSV_TESTE = 20_000
+
+#===========================================================================================================================================================================
+                                                                                # FIXTURES
+#===========================================================================================================================================================================
+
+@pytest.fixture(scope="session")
+def csv_sintetico(tmp_path_factory):
+    """ csv sintético com o formato bruto de dataset/train.csv, gravado em blocos (IDs e datas como nos arquivos grandes)
+    numa pasta temporária: os caches em disco (feather, parquet) ficam ao lado dele, fora do repositório.
+    """
+    return gerar_csv(tmp_path_factory.mktemp("dataset") / "train.csv", LINHAS_CSV_TESTE, tamanho_bloco=5_000)
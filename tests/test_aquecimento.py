@@ -0,0 +1,37 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import ast
+from pathlib import Path
+
+import pytest
+
+from utils.aquecimento import AQUECIMENTO_PAGINAS
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+PASTA_PAGINAS = Path(__file__).resolve().parent.parent / "pages"
+
+# Arquivo de cada página aquecida
+ARQUIVOS = {
+    "Visão Empresa": "1_visao_empresa.py",
+    "Visão Entregadores": "2_visao_entregadores.py",
+    "Visão Restaurante": "3_visao_restaurante.py",
+}
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+@pytest.mark.parametrize("pagina", list(AQUECIMENTO_PAGINAS))
+def test_aquece_as_funcoes_que_a_pagina_importa(pagina):
+    arvore = ast.parse((PASTA_PAGINAS / ARQUIVOS[pagina]).read_text(encoding="utf-8"))
+    importadas = {
+        nome.name for no in arvore.body
+        if isinstance(no, ast.ImportFrom) and no.module == "utils.visualizacoes" for nome in no.names
+    }
+    for funcao in AQUECIMENTO_PAGINAS[pagina]:
+        assert funcao.__module__ == "utils.visualizacoes"
+        assert funcao.__name__ in importadas
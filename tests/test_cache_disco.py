@@ -0,0 +1,35 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from utils.cache_disco import caminho_cache, carregar_com_cache_disco, garantir_parquet, ler_metadados
+from utils.ingestao import ler_e_limpar_csv
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+@pytest.mark.parametrize("formato", ["feather", "parquet"])
+def test_csv_so_tocado_grava_o_mtime_novo(csv_sintetico, tmp_path, formato):
+    # mesmo conteúdo com mtime novo: o cache continua válido e passa a guardar o mtime, sem recalcular o sha256 depois
+    caminho = tmp_path / "train.csv"
+    shutil.copy(csv_sintetico, caminho)
+    if formato == "feather":
+        esperado = carregar_com_cache_disco(caminho, ler_e_limpar_csv)
+    else:
+        garantir_parquet(caminho)
+    destino = caminho_cache(caminho, formato)
+    chave = ler_metadados(destino)
+
+    os.utime(caminho, ns=(chave["mtime_ns"] + 10 ** 9, chave["mtime_ns"] + 10 ** 9))
+    if formato == "feather":
+        pd.testing.assert_frame_equal(carregar_com_cache_disco(caminho, ler_e_limpar_csv), esperado)
+    else:
+        garantir_parquet(caminho)
+    assert ler_metadados(destino) == {**chave, "mtime_ns": os.stat(caminho).st_mtime_ns}
+    assert list(tmp_path.glob("*.tmp")) == []
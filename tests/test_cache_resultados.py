@@ -0,0 +1,44 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils.cache_resultados import CacheResultados, chave_valor, estado_filtros
+from utils.consultas import ConsultasFiltradas
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_ordem_dos_trafegos_nao_importa():
+    assert estado_filtros("2022-03-01", ["low", "jam"]) == estado_filtros(pd.Timestamp("2022-03-01"), ["jam", "low"])
+
+
+def test_faixa_de_distancia_mantem_a_ordem():
+    assert estado_filtros("2022-03-01", ["low"], distancia=(2.0, 8.0)) != estado_filtros("2022-03-01", ["low"], distancia=(8.0, 2.0))
+
+
+def test_consultas_entram_pela_versao_e_pelos_filtros():
+    data = pd.Timestamp("2022-03-01")
+    backend = SimpleNamespace(versao="v1")
+    assert chave_valor(ConsultasFiltradas(backend, data, ["low"])) == chave_valor(ConsultasFiltradas(SimpleNamespace(versao="v1"), data, ["low"]))
+    assert chave_valor(ConsultasFiltradas(backend, data, ["low"])) != chave_valor(ConsultasFiltradas(SimpleNamespace(versao="v2"), data, ["low"]))
+    assert chave_valor(ConsultasFiltradas(backend, data, ["low"])) != chave_valor(ConsultasFiltradas(backend, data, ["low"], distancia=(2.0, 8.0)))
+    assert chave_valor(ConsultasFiltradas(backend, data, ["low"])) != chave_valor(ConsultasFiltradas(backend, data, ["low"], cidades=["urban"]))
+
+
+def test_argumento_sem_hash_e_erro():
+    with pytest.raises(TypeError):
+        chave_valor(pd.DataFrame({"a": [1]}))
+
+
+def test_cache_por_chave():
+    cache = CacheResultados(1)
+    chamadas = []
+    for chave in [("a", 1), ("a", 2), ("a", 1)]:
+        cache.obter(chave, lambda: chamadas.append(chave) or len(chamadas))
+    assert chamadas == [("a", 1), ("a", 2)]
+    assert cache.estatisticas()["acertos"] == 1
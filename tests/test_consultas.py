@@ -0,0 +1,101 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import shutil
+
+import pytest
+
+from benchmarks.bench_consultas import comparar, consultas_paridade, filtros_paridade
+from benchmarks.sintetico import gerar_pedidos
+from utils import configuracao
+from utils.consultas import BackendDuckDB, BackendPandas
+from utils.dados import atualizar_dados, base_sem_streamlit
+
+#===========================================================================================================================================================================
+                                                                                # FIXTURES
+#===========================================================================================================================================================================
+
+@pytest.fixture(scope="module")
+def backends(csv_sintetico):
+    return BackendPandas(csv_sintetico), BackendDuckDB(csv_sintetico)
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_mesmos_limites_e_valores(backends):
+    pandas_, duckdb_ = backends
+    assert pandas_.limites_data() == duckdb_.limites_data()
+    assert pandas_.limites_distancia() == duckdb_.limites_distancia()
+    for coluna in ["Road_traffic_density", "City"]:
+        assert pandas_.valores(coluna) == duckdb_.valores(coluna)
+
+
+@pytest.mark.parametrize("nome", list(consultas_paridade()))
+def test_mesmas_tabelas_nos_dois_backends(backends, nome):
+    pandas_, duckdb_ = backends
+    consulta = consultas_paridade()[nome]
+    divergentes = [
+        rotulo for rotulo, filtros in filtros_paridade(pandas_).items()
+        if not comparar(f"{nome} ({rotulo})", consulta, pandas_, duckdb_, filtros, configuracao.ERRO_RELATIVO_QUANTIS)[0]
+    ]
+    assert not divergentes
+
+
+def test_mesmas_tabelas_depois_de_pedidos_novos(csv_sintetico, tmp_path):
+    # linhas acrescentadas ao csv principal e um arquivo de lote novo entram nos dois backends sem refazer a base
+    caminho = tmp_path / "train.csv"
+    shutil.copy(csv_sintetico, caminho)
+    pandas_, duckdb_ = BackendPandas(caminho), BackendDuckDB(caminho)
+    linhas_antes = len(pandas_.df1)
+
+    gerar_pedidos(700, semente=1, inicio=1_000_000).to_csv(caminho, mode="a", header=False, index=False)
+    gerar_pedidos(500, semente=2, inicio=1_000_700).to_csv(tmp_path / "train_lote1.csv", index=False)
+    novos_pandas, novos_duckdb = atualizar_dados(caminho), duckdb_.atualizar()
+    assert novos_pandas == novos_duckdb > 0
+    assert duckdb_.versao != duckdb_.versao_base
+
+    pandas_ = BackendPandas(caminho)
+    assert len(pandas_.df1) == linhas_antes + novos_pandas
+    for nome, consulta in consultas_paridade().items():
+        for rotulo, filtros in filtros_paridade(pandas_).items():
+            assert comparar(f"{nome} ({rotulo})", consulta, pandas_, duckdb_, filtros, configuracao.ERRO_RELATIVO_QUANTIS)[0], (nome, rotulo)
+
+
+def test_lote_lido_pela_metade_e_completado(csv_sintetico, tmp_path):
+    # um lote lido enquanto ainda era escrito (linha cortada no meio) é completado quando cresce, nos dois backends
+    caminho = tmp_path / "train.csv"
+    shutil.copy(csv_sintetico, caminho)
+    pandas_, duckdb_ = BackendPandas(caminho), BackendDuckDB(caminho)
+    linhas_antes = len(pandas_.df1)
+
+    conteudo = gerar_pedidos(500, semente=3, inicio=1_000_000).to_csv(index=False)
+    lote = tmp_path / "train_lote1.csv"
+    lote.write_text(conteudo[: len(conteudo) // 2])
+    atualizar_dados(caminho), duckdb_.atualizar()
+    lote.write_text(conteudo)
+    atualizar_dados(caminho), duckdb_.atualizar()
+
+    pandas_ = BackendPandas(caminho)
+    assert len(pandas_.df1) == len(base_sem_streamlit(caminho).atual.df) > linhas_antes
+    for nome, consulta in consultas_paridade().items():
+        for rotulo, filtros in filtros_paridade(pandas_).items():
+            assert comparar(f"{nome} ({rotulo})", consulta, pandas_, duckdb_, filtros, configuracao.ERRO_RELATIVO_QUANTIS)[0], (nome, rotulo)
+
+
+def test_lotes_relidos_depois_de_recarregar(csv_sintetico, tmp_path):
+    # com o csv principal reescrito tudo é recarregado, e os lotes já lidos voltam a entrar na mesma atualização
+    caminho = tmp_path / "train.csv"
+    shutil.copy(csv_sintetico, caminho)
+    gerar_pedidos(500, semente=2, inicio=1_000_700).to_csv(tmp_path / "train_lote1.csv", index=False)
+    pandas_, duckdb_ = BackendPandas(caminho), BackendDuckDB(caminho)
+    linhas = len(pandas_.df1)
+
+    gerar_pedidos(1_000, semente=4).to_csv(caminho, index=False)
+    assert atualizar_dados(caminho) == duckdb_.atualizar() == -1
+
+    pandas_ = BackendPandas(caminho)
+    assert len(pandas_.df1) == len(base_sem_streamlit(caminho).atual.df) < linhas
+    for nome, consulta in consultas_paridade().items():
+        for rotulo, filtros in filtros_paridade(pandas_).items():
+            assert comparar(f"{nome} ({rotulo})", consulta, pandas_, duckdb_, filtros, configuracao.ERRO_RELATIVO_QUANTIS)[0], (nome, rotulo)
@@ -0,0 +1,74 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import json
+
+import plotly.express as px
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from utils.consultas import BackendDuckDB, BackendPandas, ConsultasFiltradas
+from utils.graficos import figura_spec
+from utils.visualizacoes import order_by_city_and_traffic, order_by_date, order_by_traffic
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+# página mínima do AppTest: mostra a figura guardada na sessão (o AppTest executa só o corpo da função)
+def _pagina_com_figura():
+    import json
+
+    import streamlit as st
+
+    from utils.graficos import mostrar_figura
+
+    mostrar_figura(json.loads(st.session_state["spec"]))
+
+# página mínima com várias figuras (lista de specs na sessão)
+def _pagina_com_figuras():
+    import json
+
+    import streamlit as st
+
+    from utils.graficos import mostrar_figura
+
+    for spec in json.loads(st.session_state["specs"]):
+        mostrar_figura(spec)
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_figura_spec_e_json_puro():
+    fig = px.bar(x=["a", "b"], y=[1, 2])
+    spec = figura_spec(fig)
+    assert json.loads(json.dumps(spec)) == spec
+    assert spec["data"][0]["type"] == "bar"
+
+
+def test_mostrar_figura_usa_plotly_chart_publico():
+    spec = figura_spec(px.bar(x=["a", "b"], y=[1, 2], title="Pedidos"))
+    app = AppTest.from_function(_pagina_com_figura)
+    app.session_state["spec"] = json.dumps(spec)
+    app.run()
+    assert not app.exception
+    graficos = app.get("plotly_chart")
+    assert len(graficos) == 1
+    enviado = json.loads(graficos[0].proto.spec)
+    assert enviado["data"][0]["y"] == spec["data"][0]["y"]
+    assert enviado["layout"]["title"]["text"] == "Pedidos"
+
+
+@pytest.mark.parametrize("backend", [BackendPandas, BackendDuckDB])
+def test_mostrar_figura_sem_trafego_selecionado(csv_sintetico, backend):
+    # multiselect de tráfego vazio: consultas sem pedidos, inclusive a figura colorida por tráfego (sem traços)
+    base = backend(csv_sintetico)
+    consultas = ConsultasFiltradas(base, base.limites_data()[1], [])
+    specs = [funcao(consultas) for funcao in (order_by_date, order_by_traffic, order_by_city_and_traffic)]
+    assert specs[2]["data"] == []
+    app = AppTest.from_function(_pagina_com_figuras)
+    app.session_state["specs"] = json.dumps(specs)
+    app.run()
+    assert not app.exception
+    assert len(app.get("plotly_chart")) == len(specs)
@@ -0,0 +1,76 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from benchmarks.bench_ingestao import medir_pico
+from utils.ingestao import agregar_em_blocos, calcular_tamanho_bloco, ingerir_para_parquet, ler_e_limpar_csv
+from utils.limpeza import ordenar_categorias
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Memória alvo da ingestão em blocos nos testes: bem abaixo do pico da leitura inteira do csv sintético
+LIMITE_MEMORIA_MB = 4.0
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_pico_de_memoria_limitado(csv_sintetico, tmp_path):
+    # o tamanho do bloco sai de uma amostra de tamanho fixo (LINHAS_AMOSTRA linhas), como em benchmarks/bench_ingestao.py:
+    # ela não cresce com o csv e fica fora da medição
+    linhas = calcular_tamanho_bloco(csv_sintetico, limite_memoria_mb=LIMITE_MEMORIA_MB)
+    _, pico_inteira = medir_pico(ler_e_limpar_csv, csv_sintetico)
+    _, pico_blocos = medir_pico(ingerir_para_parquet, csv_sintetico, tmp_path / "pedidos.parquet", tamanho_bloco=linhas)
+    assert pico_blocos <= LIMITE_MEMORIA_MB
+    assert pico_blocos < pico_inteira / 2
+
+
+def test_parquet_igual_a_leitura_inteira(csv_sintetico, tmp_path):
+    destino = tmp_path / "pedidos.parquet"
+    linhas = ingerir_para_parquet(csv_sintetico, destino, tamanho_bloco=3_000)
+    esperado = ler_e_limpar_csv(csv_sintetico)
+    arquivo = pq.ParquetFile(destino)
+    assert linhas == len(esperado)
+    assert arquivo.num_row_groups == -(-len(pd.read_csv(csv_sintetico, usecols=["ID"])) // 3_000)
+    pd.testing.assert_frame_equal(ordenar_categorias(arquivo.read().to_pandas()), esperado, check_categorical=False)
+
+
+def test_primeiro_bloco_sem_linhas_validas(csv_sintetico, tmp_path):
+    # o esquema é declarado: um primeiro bloco vazio depois da limpeza não deixa colunas sem tipo para os demais
+    bruto = pd.read_csv(csv_sintetico)
+    bruto.loc[:2_999, "Time_taken(min)"] = "NaN "
+    caminho = tmp_path / "train.csv"
+    bruto.to_csv(caminho, index=False)
+    destino = tmp_path / "pedidos.parquet"
+    linhas = ingerir_para_parquet(caminho, destino, tamanho_bloco=3_000)
+    esperado = ler_e_limpar_csv(caminho)
+    assert linhas == len(esperado) and esperado.index.min() >= 3_000
+    pd.testing.assert_frame_equal(ordenar_categorias(pq.read_table(destino).to_pandas()), esperado, check_categorical=False)
+
+
+def test_temporario_apagado_quando_a_ingestao_falha(csv_sintetico, tmp_path):
+    destino = tmp_path / "pedidos.parquet"
+    destino.mkdir()
+    (destino / "ocupado").touch()
+    with pytest.raises(OSError):
+        ingerir_para_parquet(csv_sintetico, destino, tamanho_bloco=3_000)
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_tamanho_bloco_configuravel(csv_sintetico):
+    assert calcular_tamanho_bloco(csv_sintetico, tamanho_bloco=2_500) == 2_500
+    assert calcular_tamanho_bloco(csv_sintetico, limite_memoria_mb=2 * LIMITE_MEMORIA_MB) > calcular_tamanho_bloco(csv_sintetico, limite_memoria_mb=LIMITE_MEMORIA_MB)
+
+
+def test_agregar_em_blocos_igual_ao_inteiro(csv_sintetico):
+    def parcial(bloco):
+        return bloco.groupby(["City", "Road_traffic_density"], observed=True).agg(n=("time_taken", "size"), soma=("time_taken", "sum"))
+
+    esperado = parcial(ler_e_limpar_csv(csv_sintetico)).astype("int64")
+    obtido = agregar_em_blocos(csv_sintetico, parcial, tamanho_bloco=3_000).astype("int64")
+    pd.testing.assert_frame_equal(obtido, esperado, check_index_type=False)
@@ -0,0 +1,34 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_limpeza import comparar_com_legado, limpar_legado
+from utils.limpeza import COLUNAS_CATEGORICAS, COLUNAS_HORARIO, limpar_dados
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_limpeza_identica_ao_pipeline_antigo(csv_sintetico):
+    df = pd.read_csv(csv_sintetico)
+    comparar_com_legado(limpar_legado(df), limpar_dados(df))
+
+
+def test_limpeza_nao_altera_o_bruto(csv_sintetico):
+    df = pd.read_csv(csv_sintetico)
+    original = df.copy()
+    limpar_dados(df)
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_tipos_compactos(csv_sintetico):
+    df1 = limpar_dados(pd.read_csv(csv_sintetico))
+    for coluna in COLUNAS_CATEGORICAS:
+        assert isinstance(df1[coluna].dtype, pd.CategoricalDtype), coluna
+    for coluna in COLUNAS_HORARIO:
+        assert df1[coluna].dtype == np.int32, coluna
+    assert df1["Delivery_person_Age"].dtype == np.int8
+    assert df1["time_taken"].dtype == np.int16
+    assert df1.memory_usage(deep=True).sum() < limpar_legado(pd.read_csv(csv_sintetico)).memory_usage(deep=True).sum() / 2
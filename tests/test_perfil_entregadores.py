@@ -0,0 +1,48 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cubo import resumir_cubo
+from utils.dados import carregar_e_limpar_dados
+from utils.perfil_entregadores import COMBINACAO_PERFIL, MEDIDAS_PERFIL, RECORTES_DIMENSAO, montar_dimensao, montar_perfil
+
+#===========================================================================================================================================================================
+                                                                                # FIXTURES
+#===========================================================================================================================================================================
+
+@pytest.fixture(scope="module")
+def pedidos(csv_sintetico):
+    return carregar_e_limpar_dados(csv_sintetico)
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_uma_linha_por_entregador(pedidos):
+    dimensao = montar_dimensao(pedidos)
+    datas = pedidos.groupby("Delivery_person_ID", observed=True)["Order_Date"]
+    assert len(dimensao) == pedidos["Delivery_person_ID"].nunique()
+    assert dimensao.entregadores.index.is_unique
+    assert (dimensao.entregadores["primeira_data"] == datas.min()).all()
+    assert (dimensao.entregadores["ultima_data"] == datas.max()).all()
+
+
+@pytest.mark.parametrize("chave", RECORTES_DIMENSAO)
+def test_recorte_resume_como_o_perfil(pedidos, chave):
+    perfil = montar_perfil(pedidos)
+    valores = sorted(pedidos[chave].dropna().unique())[:2]
+    esperado = resumir_cubo(perfil.loc[perfil.index.get_level_values(chave).isin(valores)], ["Delivery_person_ID"], list(MEDIDAS_PERFIL), COMBINACAO_PERFIL)
+    obtido = resumir_cubo(montar_dimensao(pedidos, perfil).perfil(chave, valores), ["Delivery_person_ID"], list(MEDIDAS_PERFIL), COMBINACAO_PERFIL)
+    pd.testing.assert_frame_equal(obtido.astype({"Delivery_person_ID": str}), esperado.astype({"Delivery_person_ID": str}), check_exact=False)
+
+
+def test_combinar_igual_a_montar_tudo(pedidos):
+    metade = len(pedidos) // 2
+    inteira = montar_dimensao(pedidos)
+    combinada = montar_dimensao(pedidos.iloc[:metade]).combinar(montar_dimensao(pedidos.iloc[metade:]))
+    pd.testing.assert_frame_equal(combinada.entregadores, inteira.entregadores, check_categorical=False)
+    for chave in RECORTES_DIMENSAO:
+        np.testing.assert_allclose(combinada.recortes[chave].to_numpy(np.float64), inteira.recortes[chave].to_numpy(np.float64))
@@ -0,0 +1,31 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+@pytest.mark.parametrize("backend", ["pandas", "duckdb"])
+def test_linha_de_comando_sem_avisos_do_streamlit(csv_sintetico, tmp_path, backend):
+    # a linha de comando roda fora do servidor: nada de st.cache_resource / st.session_state, logo nada no stderr
+    ambiente = {**os.environ, "CURRY_BACKEND_CONSULTAS": backend, "CURRY_PROCESSOS": "1", "PYTHONPATH": str(RAIZ)}
+    execucao = subprocess.run(
+        [sys.executable, "-m", "utils.relatorio", "--csv", str(csv_sintetico), "--saida", str(tmp_path / "pdfs")],
+        cwd=tmp_path, env=ambiente, capture_output=True, text=True, timeout=300,
+    )
+    assert execucao.returncode == 0, execucao.stdout + execucao.stderr
+    assert execucao.stderr == ""
+    assert list((tmp_path / "pdfs").glob("*.pdf"))
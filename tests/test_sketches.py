@@ -0,0 +1,105 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import configuracao
+from utils.consultas import CONSULTAS_PAGINAS, BackendPandas, quantil_discreto
+from utils.enriquecimento import semana_do_ano
+from utils.ingestao import ler_e_limpar_csv
+from utils.sketches import estimar_hll, montar_sketches, posicoes_hll, posto_quantil
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+QUANTIS = (0.5, 0.9, 0.99)
+COLUNAS_QUANTIS = ["p50", "p90", "p99"]
+
+# Erros padrões tolerados nas estimativas do HyperLogLog (erro padrão relativo ~ 1.04 / sqrt(2**p))
+DESVIOS_HLL = 3.0
+
+#===========================================================================================================================================================================
+                                                                                # FIXTURES
+#===========================================================================================================================================================================
+
+@pytest.fixture(scope="module")
+def pedidos(csv_sintetico):
+    return ler_e_limpar_csv(csv_sintetico)
+
+
+@pytest.fixture(scope="module")
+def sketches(pedidos):
+    return montar_sketches(pedidos)
+
+#===========================================================================================================================================================================
+                                                                                # TESTES
+#===========================================================================================================================================================================
+
+def test_posto_igual_ao_inverted_cdf_do_numpy():
+    rng = np.random.default_rng(0)
+    for n in [1, 2, 3, 4, 5, 10, 31, 100, 1_001]:
+        valores = np.sort(rng.integers(10, 55, n).astype(np.float64))
+        for quantil in (0.01, 0.1, 0.25, 0.5, 0.9, 0.99, 1.0):
+            assert valores[int(posto_quantil(n, quantil))] == np.quantile(valores, quantil, method="inverted_cdf")
+
+
+@pytest.mark.parametrize("grupos", [[], ["City"], ["Road_traffic_density"], ["City", "age_range"], ["Order_Date"]])
+def test_quantis_do_sketch_dentro_do_erro_relativo(pedidos, sketches, grupos):
+    aproximados = sketches.quantis(grupos, QUANTIS)
+    partes = pedidos.groupby(grupos, observed=True, sort=True) if grupos else [(None, pedidos)]
+    exatos = np.array([np.quantile(linhas["time_taken"].to_numpy(dtype=np.float64), QUANTIS, method="inverted_cdf") for _, linhas in partes])
+    np.testing.assert_array_less(np.abs(aproximados[COLUNAS_QUANTIS].to_numpy(dtype=np.float64) - exatos) / exatos, sketches.alfa + 1e-9)
+
+
+@pytest.mark.parametrize("grupos", [["City"], ["Week"], ["age_range"], ["City", "Road_traffic_density"]])
+def test_distintos_do_sketch_dentro_do_erro(pedidos, sketches, grupos):
+    chaves = [semana_do_ano(pedidos["Order_Date"]) if grupo == "Week" else pedidos[grupo] for grupo in grupos]
+    exatos = pedidos.groupby(chaves, observed=True)["Delivery_person_ID"].nunique().to_numpy()
+    estimados = sketches.distintos(grupos)["Delivery_person_ID"].to_numpy()
+    limite = DESVIOS_HLL * 1.04 / np.sqrt(sketches.registros.shape[1])
+    np.testing.assert_array_less(np.abs(estimados - exatos) / exatos, limite)
+
+
+@pytest.mark.parametrize("cardinalidade", [10, 1_000, 100_000])
+def test_hll_em_varias_cardinalidades(sketches, cardinalidade):
+    precisao = int(np.log2(sketches.registros.shape[1]))
+    ids = np.array([f"ENTREGADOR{i:08d}" for i in range(cardinalidade)], dtype=object)
+    registro, posto = posicoes_hll(np.concatenate([ids, ids[: cardinalidade // 2]]), precisao)
+    registros = np.zeros((1, 1 << precisao), dtype=np.uint8)
+    np.maximum.at(registros[0], registro, posto)
+    assert abs(estimar_hll(registros)[0] - cardinalidade) / cardinalidade <= DESVIOS_HLL * 1.04 / np.sqrt(1 << precisao)
+
+
+def test_combinacao_igual_a_montagem_inteira(pedidos, sketches):
+    metade = len(pedidos) // 2
+    combinados = montar_sketches(pedidos.iloc[:metade]).combinar(montar_sketches(pedidos.iloc[metade:]))
+    np.testing.assert_array_equal(combinados.registros, sketches.registros)
+    np.testing.assert_array_equal(combinados.histogramas, sketches.histogramas)
+
+
+def test_quantil_discreto_dos_pedidos(pedidos):
+    partes = pedidos.groupby(["City", "Road_traffic_density"], observed=True, sort=True)["time_taken"]
+    for quantil in QUANTIS:
+        obtido = quantil_discreto(pedidos, ["City", "Road_traffic_density"], "time_taken", quantil)
+        exatos = pd.Series({chave: np.quantile(linhas.to_numpy(dtype=np.float64), quantil, method="inverted_cdf") for chave, linhas in partes})
+        np.testing.assert_array_equal(obtido.to_numpy(), exatos.to_numpy())
+        assert list(obtido.index) == list(exatos.index)
+    assert quantil_discreto(pedidos, [], "time_taken", 0.5) == np.quantile(pedidos["time_taken"].to_numpy(dtype=np.float64), 0.5, method="inverted_cdf")
+
+
+def test_percentis_iguais_nas_duas_rotas(csv_sintetico):
+    # sem faixa de distância os percentis saem dos sketches; com uma faixa que cobre todos os pedidos, dos pedidos (exatos):
+    # as duas rotas calculam o mesmo quantil, a menos do erro relativo do sketch
+    backend = BackendPandas(csv_sintetico)
+    data_final = backend.limites_data()[1]
+    trafegos = backend.valores("Road_traffic_density")
+    consulta = CONSULTAS_PAGINAS["percentis_por_cidade"]
+    pelos_sketches = backend.agregar(consulta, data_final, trafegos)
+    pelos_pedidos = backend.agregar(consulta, data_final, trafegos, distancia=(0.0, float("inf")))
+    pd.testing.assert_frame_equal(pelos_sketches.drop(columns=COLUNAS_QUANTIS), pelos_pedidos.drop(columns=COLUNAS_QUANTIS), check_dtype=False)
+    aproximados = pelos_sketches[COLUNAS_QUANTIS].to_numpy(dtype=np.float64)
+    exatos = pelos_pedidos[COLUNAS_QUANTIS].to_numpy(dtype=np.float64)
+    np.testing.assert_array_less(np.abs(aproximados - exatos) / exatos, configuracao.ERRO_RELATIVO_QUANTIS + 1e-9)
@@ -0,0 +1,3 @@
+# ==================================================================================================================================================================#
+                                                                # MÓDULOS COMPARTILHADOS ENTRE AS PÁGINAS
+# ==================================================================================================================================================================#
@@ -0,0 +1,221 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import threading
+import time
+
+import streamlit as st
+
+from utils import configuracao
+from utils.cache_disco import garantir_parquet
+from utils.consultas import CONSULTAS_PAGINAS, ConsultasFiltradas, carregar_backend
+from utils.dados import CAMINHO_DATASET, carregar_versionado, memorizar
+from utils.previsao import previsoes_compartilhadas
+from utils.ranking import estatisticas_entregadores
+from utils.visualizacoes import (
+    delivery_by_age, distancia_media, festival_comparison, map, meantime_by_citytrafic, meantime_by_delivery, media_de_notas_por_trafego,
+    order_by_city_and_traffic, order_by_date, order_by_deliver, order_by_traffic, order_by_week, percentis_por_cidade, time_by_city,
+)
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Resultados aquecidos de cada página com os filtros padrão (data final, todos os tráfegos, sem faixa de distância):
+# as mesmas funções de utils.visualizacoes que as páginas chamam, então as chaves do cache de resultados são as mesmas
+AQUECIMENTO_PAGINAS = {
+    "Visão Empresa": [order_by_date, order_by_traffic, order_by_city_and_traffic, order_by_week, order_by_deliver, map],
+    "Visão Entregadores": [media_de_notas_por_trafego, delivery_by_age],
+    "Visão Restaurante": [festival_comparison, distancia_media, time_by_city, meantime_by_delivery, meantime_by_citytrafic, percentis_por_cidade],
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DO AQUECIMENTO COMPARTILHADO
+
+@st.cache_resource(show_spinner=False)
+def aquecimento_compartilhado(caminho=CAMINHO_DATASET):
+    """ Cria e dispara, uma vez por processo do servidor, o aquecimento dos caches (Aquecimento).
+    """
+    aquecimento = Aquecimento(caminho)
+    aquecimento.iniciar()
+    return aquecimento
+
+                                            # FUNÇÃO DE INÍCIO DO AQUECIMENTO
+
+def iniciar_aquecimento(caminho=CAMINHO_DATASET):
+    """ Função chamada no começo do Home.py e das páginas: dispara o aquecimento na primeira execução do processo
+    (nas seguintes só devolve o mesmo objeto). CURRY_AQUECIMENTO=0 desliga.
+
+    Entrada: caminho do csv
+    Saída: Aquecimento (None quando desligado)
+    """
+    if not configuracao.AQUECIMENTO:
+        return None
+    return aquecimento_compartilhado(caminho)
+
+                                            # FUNÇÃO DO INDICADOR DE PRONTIDÃO
+
+def mostrar_aquecimento(aquecimento):
+    """ Função que mostra o progresso do aquecimento (etapa atual, etapas concluídas e tempo) e se atualiza sozinha
+    a cada segundo até o fim; com tudo pronto, vira uma linha só.
+    """
+    if aquecimento is None:
+        return
+
+    def indicador(aguardando):
+        estado = aquecimento.estado()
+        if aguardando and estado["pronto"]:
+            # aquecimento terminado: uma execução nova da página para o indicador parar de se atualizar
+            st.rerun()
+        if estado["pronto"]:
+            st.success(f"Dashboard pronto: dados, agregados e gráficos padrão aquecidos em {estado['segundos']:.1f} s.")
+        else:
+            st.progress(
+                len(estado["concluidas"]) / estado["total"],
+                text=f"Aquecendo o dashboard: {estado['etapa'] or 'iniciando'} ({estado['segundos']:.0f} s)",
+            )
+            st.caption("As páginas já podem ser abertas: as que chegarem agora esperam a carga em andamento.")
+        for nome, erro in estado["erros"]:
+            st.warning(f"Aquecimento de {nome} falhou ({erro}); a página calcula na primeira visita.")
+
+    pronto = aquecimento.estado()["pronto"]
+    st.fragment(run_every=None if pronto else 1)(indicador)(not pronto)
+
+                                            # FUNÇÃO PRINCIPAL (AQUECIMENTO DO DISCO ANTES DE SUBIR O SERVIDOR)
+
+def main():
+    """ Aquecimento antes do servidor (python -m utils.aquecimento): grava o cache limpo em disco (feather, ou o parquet
+    do backend DuckDB) para que o primeiro início do streamlit leia o dataset já limpo em vez de processar o csv.
+    Os caches em memória (agregados e gráficos) só existem dentro do servidor e são aquecidos por iniciar_aquecimento.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default=CAMINHO_DATASET)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if configuracao.BACKEND_CONSULTAS == "duckdb":
+        destino = garantir_parquet(args.csv)
+    else:
+        linhas = len(carregar_versionado(args.csv))
+        destino = f"cache em disco ({linhas:,} linhas)"
+    print(f"{args.csv} -> {destino} em {time.perf_counter() - inicio:.1f} s")
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class Aquecimento:
+    """ Aquecimento dos caches do processo numa thread, disparado na primeira execução do servidor:
+
+    1 - dados e agregados: carrega o backend (no pandas, a base limpa com cubo, entregadores por dia, sketches, perfil e dimensão)
+    2 - índices espaciais: monta as árvores das buscas por raio e dos restaurantes mais próximos
+    3 - previsões: dispara o ajuste dos modelos da aba tática (utils.previsao, na thread dele)
+    4 - gráficos: calcula os resultados de cada página com os filtros padrão, direto no cache de resultados
+
+    Não há carga dupla: quem abre uma página durante o aquecimento espera a carga em andamento (st.cache_resource
+    calcula cada recurso uma vez só) e os gráficos em cálculo (CacheResultados espera o cálculo da outra thread).
+    Uma etapa de gráficos que falha não derruba as outras: a página calcula na primeira visita, como sem aquecimento.
+    """
+
+    def __init__(self, caminho=CAMINHO_DATASET):
+        self.caminho = caminho
+        self._trava = threading.Lock()
+        self._thread = None
+        self.etapa = None
+        self.concluidas = []
+        self.erros = []
+        self.inicio = None
+        self.fim = None
+        self.backend = None
+        self.data_final = None
+        self.trafegos = None
+
+    def _etapas(self):
+        etapas = [("dados e agregados", self._dados), ("índices espaciais", self._indices), ("previsões", self._previsoes)]
+        etapas += [(f"gráficos da {pagina}", lambda pagina=pagina: self._graficos(pagina)) for pagina in AQUECIMENTO_PAGINAS]
+        return etapas
+
+    def iniciar(self):
+        """ Dispara a thread do aquecimento (só na primeira chamada).
+        """
+        with self._trava:
+            if self._thread is None:
+                self.inicio = time.monotonic()
+                self._thread = threading.Thread(target=self._executar, name="curry-aquecimento", daemon=True)
+                self._thread.start()
+
+    def aguardar(self, tempo_limite=None):
+        """ Espera o fim do aquecimento (ou tempo_limite segundos) e diz se ele terminou.
+        """
+        if self._thread is not None:
+            self._thread.join(tempo_limite)
+        return self.fim is not None
+
+    def estado(self):
+        """ Resumo para o indicador: pronto, etapa atual, etapas concluídas (nome, segundos), erros e tempo decorrido.
+        """
+        with self._trava:
+            fim = self.fim if self.fim is not None else time.monotonic()
+            return {
+                "pronto": self.fim is not None,
+                "etapa": self.etapa,
+                "concluidas": list(self.concluidas),
+                "total": len(self._etapas()),
+                "erros": list(self.erros),
+                "segundos": fim - (self.inicio or fim),
+            }
+
+    def _executar(self):
+        for nome, etapa in self._etapas():
+            with self._trava:
+                self.etapa = nome
+            inicio = time.perf_counter()
+            try:
+                etapa()
+            except Exception as erro:
+                with self._trava:
+                    self.erros.append((nome, f"{type(erro).__name__}: {erro}"))
+                if nome == "dados e agregados":
+                    break
+            with self._trava:
+                self.concluidas.append((nome, time.perf_counter() - inicio))
+        with self._trava:
+            self.etapa = None
+            self.fim = time.monotonic()
+
+    def _dados(self):
+        self.backend = carregar_backend(self.caminho)
+        self.data_final = self.backend.limites_data()[1]
+        self.trafegos = self.backend.valores("Road_traffic_density")
+        self.backend.limites_distancia()
+
+    def _indices(self):
+        restaurantes = self.backend.restaurantes()
+        if not restaurantes.empty:
+            lat, lon = float(restaurantes.iloc[0, 0]), float(restaurantes.iloc[0, 1])
+            self.backend.restaurantes_proximos(lat, lon)
+            self.backend.selecionar_no_raio(["time_taken"], lat, lon, 1.0, self.data_final, self.trafegos)
+
+    def _previsoes(self):
+        previsoes_compartilhadas().obter(self.backend)
+
+    def _graficos(self, pagina):
+        consultas = ConsultasFiltradas(self.backend, self.data_final, self.trafegos)
+        for funcao in AQUECIMENTO_PAGINAS[pagina]:
+            memorizar(funcao, self.data_final, self.trafegos, consultas)
+        if pagina == "Visão Entregadores":
+            # métricas gerais e estatísticas do ranking com a métrica padrão (tempo médio, sem os quantis)
+            memorizar(consultas.agregar, self.data_final, self.trafegos, CONSULTAS_PAGINAS["metricas_entregadores"], consulta="metricas_entregadores")
+            memorizar(estatisticas_entregadores, self.data_final, self.trafegos, consultas, "City", False)
+        if pagina == "Visão Restaurante":
+            # métricas gerais da análise geral
+            for nome in ("entregadores_unicos", "distancia_media"):
+                memorizar(consultas.agregar, self.data_final, self.trafegos, CONSULTAS_PAGINAS[nome], consulta=nome)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from utils import configuracao
+from utils.ingestao import ingerir_para_parquet
+from utils.limpeza import ordenar_categorias
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Incrementar quando a regra de limpeza mudar de um jeito que a leitura do código-fonte não perceba (ex.: versão do pandas)
+VERSAO_PIPELINE = "1"
+
+# Arquivos cujo conteúdo define o dataframe gravado em disco (leitura do csv, limpeza, colunas derivadas e distância):
+# qualquer edição neles invalida o cache. O resto (páginas, sessão, memorização, estruturas agregadas) fica de fora,
+# para que mexer nele não jogue o cache fora
+ARQUIVOS_PIPELINE = ["ingestao.py", "limpeza.py", "enriquecimento.py", "distancia.py"]
+
+CHAVE_METADADOS = b"curry_company"
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE HASH DE ARQUIVO
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """ Função que calcula o sha256 de um arquivo lendo-o em blocos.
+
+    Entrada: caminho do arquivo
+    Saída: hash em hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+                                            # FUNÇÃO DE VERSÃO DO PIPELINE
+
+def versao_pipeline():
+    """ Função que identifica a versão do código de limpeza:
+    1 - junta a constante VERSAO_PIPELINE com o conteúdo dos módulos do pipeline
+    2 - devolve um hash curto que muda sempre que algum desses arquivos é editado
+
+    Saída: versão do pipeline (texto)
+    """
+    sha = hashlib.sha256(VERSAO_PIPELINE.encode())
+    pasta = Path(__file__).parent
+    for nome in ARQUIVOS_PIPELINE:
+        sha.update((pasta / nome).read_bytes())
+    return sha.hexdigest()[:16]
+
+                                            # FUNÇÃO DE CAMINHO DO CACHE
+
+def caminho_cache(caminho_csv, formato="feather"):
+    """ Função que define o arquivo colunar que fica ao lado do csv (dataset/train.csv -> dataset/train.feather).
+    Na ingestão em streaming o formato é parquet (dataset/train.parquet), que aceita gravação bloco a bloco.
+    """
+    return Path(caminho_csv).with_suffix(f".{formato}")
+
+                                            # FUNÇÃO DA CHAVE DO CSV DE ORIGEM
+
+def chave_origem(caminho_csv, versao):
+    """ Função que monta a chave gravada junto com o cache: versão do pipeline, tamanho, mtime e sha256 do csv.
+    """
+    stat = os.stat(caminho_csv)
+    return {
+        "versao_pipeline": versao,
+        "tamanho": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hash_arquivo(caminho_csv),
+    }
+
+                                            # FUNÇÃO DE LEITURA DOS METADADOS DO CACHE
+
+def ler_metadados(caminho_cache_disco):
+    """ Função que lê só o esquema do arquivo (feather ou parquet) e devolve a chave gravada junto com os dados (ou None).
+    """
+    try:
+        if Path(caminho_cache_disco).suffix == ".parquet":
+            esquema = pq.read_schema(caminho_cache_disco)
+        else:
+            esquema = feather.read_table(caminho_cache_disco, columns=[], memory_map=True).schema
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadados = esquema.metadata or {}
+    if CHAVE_METADADOS not in metadados:
+        return None
+    return json.loads(metadados[CHAVE_METADADOS])
+
+                                            # FUNÇÃO DE REGRAVAÇÃO DA CHAVE DO CACHE
+
+def regravar_chave(caminho_cache_disco, chave):
+    """ Função que troca a chave gravada no esquema do cache (feather ou parquet) sem refazer a limpeza:
+    1 - o feather é copiado inteiro (mapeado em memória, sem descomprimir) e o parquet, um row group por vez
+    2 - grava num arquivo temporário e troca de nome, como na gravação do cache
+    """
+    caminho_cache_disco = Path(caminho_cache_disco)
+    temporario = caminho_cache_disco.with_suffix(f"{caminho_cache_disco.suffix}.{os.getpid()}.tmp")
+    try:
+        if caminho_cache_disco.suffix == ".parquet":
+            arquivo = pq.ParquetFile(caminho_cache_disco)
+            esquema = arquivo.schema_arrow
+            esquema = esquema.with_metadata({**esquema.metadata, CHAVE_METADADOS: json.dumps(chave).encode()})
+            with pq.ParquetWriter(temporario, esquema) as escritor:
+                for indice in range(arquivo.num_row_groups):
+                    escritor.write_table(arquivo.read_row_group(indice))
+        else:
+            tabela = feather.read_table(caminho_cache_disco, memory_map=True)
+            tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, CHAVE_METADADOS: json.dumps(chave).encode()})
+            feather.write_feather(tabela, temporario, compression="uncompressed")
+        os.replace(temporario, caminho_cache_disco)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+                                            # FUNÇÃO DE VALIDAÇÃO DO CACHE
+
+def cache_valido(chave, caminho_csv, versao, caminho_cache_disco=None):
+    """ Função que confere se o cache em disco ainda corresponde ao csv e ao código atuais:
+    1 - a versão do pipeline precisa ser a mesma
+    2 - se tamanho e mtime do csv não mudaram, o cache é válido sem reler o arquivo
+    3 - se mudaram, compara o sha256 (o arquivo pode ter sido só "tocado")
+    4 - com o mesmo conteúdo, grava no cache (caminho_cache_disco) o mtime novo, para os próximos inícios não
+        calcularem o sha256 de novo; sem permissão de escrita, o cache continua válido
+
+    Entrada: chave gravada no cache, caminho do csv, versão atual do pipeline, caminho do cache (opcional)
+    Saída: True/False
+    """
+    if chave is None or chave.get("versao_pipeline") != versao:
+        return False
+    stat = os.stat(caminho_csv)
+    if chave.get("tamanho") == stat.st_size and chave.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if chave.get("tamanho") != stat.st_size or chave.get("sha256") != hash_arquivo(caminho_csv):
+        return False
+    if caminho_cache_disco is not None:
+        try:
+            regravar_chave(caminho_cache_disco, {**chave, "mtime_ns": stat.st_mtime_ns})
+        except OSError:
+            pass
+    return True
+
+                                            # FUNÇÃO DE GRAVAÇÃO DO CACHE
+
+def gravar_cache(df1, caminho_csv, versao):
+    """ Função que grava o dataframe limpo em feather sem compressão (a leitura só copia os buffers, sem descomprimir):
+    1 - converte para tabela Arrow preservando índice e tipos (category, inteiros compactos, datas)
+    2 - anexa ao esquema a chave do csv de origem e a versão do pipeline
+    3 - grava num arquivo temporário e troca de nome, para nunca deixar um cache pela metade
+    """
+    chave = chave_origem(caminho_csv, versao)
+    tabela = pa.Table.from_pandas(df1, preserve_index=True)
+    tabela = tabela.replace_schema_metadata({**tabela.schema.metadata, CHAVE_METADADOS: json.dumps(chave).encode()})
+
+    destino = caminho_cache(caminho_csv)
+    temporario = destino.with_suffix(f".feather.{os.getpid()}.tmp")
+    feather.write_feather(tabela, temporario, compression="uncompressed")
+    os.replace(temporario, destino)
+
+                                            # FUNÇÃO DE GARANTIA DO PARQUET
+
+def garantir_parquet(caminho_csv, versao=None):
+    """ Função que garante um parquet limpo e válido ao lado do csv: se o que existe não vale mais para o csv e a
+    versão do pipeline, ingere o csv em blocos direto para o parquet (pico de memória limitado ao de um bloco).
+
+    Entrada: caminho do csv, versão do pipeline (padrão = a atual)
+    Saída: caminho do parquet
+    """
+    versao = versao or versao_pipeline()
+    destino = caminho_cache(caminho_csv, "parquet")
+    if not (destino.exists() and cache_valido(ler_metadados(destino), caminho_csv, versao, destino)):
+        chave = chave_origem(caminho_csv, versao)
+        ingerir_para_parquet(caminho_csv, destino, metadados={CHAVE_METADADOS: json.dumps(chave).encode()})
+    return destino
+
+                                            # FUNÇÃO DE CARREGAMENTO EM STREAMING
+
+def carregar_em_streaming(caminho_csv, versao):
+    """ Função usada para csvs grandes demais para serem lidos de uma vez:
+    1 - se o parquet ao lado do csv ainda é válido, só o lê
+    2 - senão, ingere o csv em blocos direto para o parquet (pico de memória limitado ao de um bloco)
+    3 - lê o parquet já limpo, com as categorias dos blocos unificadas e ordenadas
+
+    Entrada: caminho do csv, versão do pipeline
+    Saída: dataframe limpo
+    """
+    destino = garantir_parquet(caminho_csv, versao)
+    return ordenar_categorias(pq.read_table(destino, memory_map=True).to_pandas(split_blocks=True, self_destruct=True))
+
+                                            # FUNÇÃO DE CARREGAMENTO COM CACHE EM DISCO
+
+def carregar_com_cache_disco(caminho_csv, pipeline):
+    """ Função que devolve o dataframe limpo, usando o cache colunar em disco sempre que ele for válido:
+    1 - csvs acima de CURRY_LIMITE_STREAMING_MB seguem pela ingestão em blocos (parquet)
+    2 - se existe um feather válido para o csv e a versão do pipeline, lê o arquivo (mapeado em memória, sem descomprimir)
+        e converte para pandas: a conversão copia as colunas para a memória do processo (category, datas e o índice
+        não têm conversão sem cópia), mas dispensa a leitura do csv e a limpeza
+    3 - senão, roda o pipeline completo sobre o csv e grava o resultado para os próximos inícios
+
+    Entrada: caminho do csv, função que recebe o caminho do csv e devolve o dataframe limpo
+    Saída: dataframe limpo
+    """
+    versao = versao_pipeline()
+    if os.path.getsize(caminho_csv) >= configuracao.LIMITE_STREAMING_MB * 1024 ** 2:
+        return carregar_em_streaming(caminho_csv, versao)
+
+    destino = caminho_cache(caminho_csv)
+    if destino.exists() and cache_valido(ler_metadados(destino), caminho_csv, versao, destino):
+        return feather.read_table(destino, memory_map=True).to_pandas(split_blocks=True)
+
+    df1 = pipeline(caminho_csv)
+    try:
+        gravar_cache(df1, caminho_csv, versao)
+    except OSError:
+        # Sem permissão de escrita na pasta do dataset: segue só com o cache em memória
+        pass
+    return df1
@@ -0,0 +1,158 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import pickle
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE ESTIMATIVA DE TAMANHO
+
+def estimar_tamanho(valor):
+    """ Função que estima quantos bytes um resultado ocupa no cache:
+    dataframes e séries pelo memory_usage, figuras Plotly pelo JSON que seria enviado ao navegador
+    e o resto pelo tamanho serializado.
+
+    Entrada: resultado de uma função de visualização
+    Saída: bytes (aproximado)
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return int(valor.memory_usage(deep=True).sum()) if isinstance(valor, pd.DataFrame) else int(valor.memory_usage(deep=True))
+    if isinstance(valor, go.Figure):
+        return len(valor.to_json())
+    if isinstance(valor, (tuple, list)):
+        return sum(estimar_tamanho(item) for item in valor)
+    try:
+        return len(pickle.dumps(valor))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return 1024
+
+                                            # FUNÇÃO DE CHAVE DE UM ARGUMENTO
+
+def chave_valor(valor):
+    """ Função que transforma um argumento de uma função de visualização (ou um filtro) em parte hashable da chave do cache:
+    1 - objetos com o método chave_cache (ConsultasFiltradas) entram pela chave que ele devolve (versão dos dados do
+        backend e todos os filtros aplicados), não pela identidade do objeto
+    2 - listas e tuplas viram tuplas, mantendo a ordem (a faixa de distância (mínimo, máximo) não é um conjunto)
+    3 - sets viram frozenset; o resto entra como está e precisa ser hashable (TypeError em vez de uma chave errada)
+
+    Entrada: valor de um argumento
+    Saída: valor hashable
+    """
+    if hasattr(valor, "chave_cache"):
+        return valor.chave_cache()
+    if isinstance(valor, (list, tuple)):
+        return tuple(chave_valor(item) for item in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(chave_valor(item) for item in valor)
+    hash(valor)
+    return valor
+
+                                            # FUNÇÃO DE ESTADO DOS FILTROS
+
+def estado_filtros(data_limite, trafegos, **extras):
+    """ Função que transforma os valores dos filtros numa chave hashable: a ordem dos tráfegos selecionados não importa
+    (conjunto); os outros filtros nomeados passam por chave_valor, que mantém a ordem de listas e tuplas.
+
+    Entrada: data limite, tipos de tráfego selecionados, outros filtros nomeados
+    Saída: tupla usada como parte da chave do cache
+    """
+    extras_hashable = tuple(sorted((nome, chave_valor(valor)) for nome, valor in extras.items()))
+    return (pd.Timestamp(data_limite), frozenset(trafegos)) + extras_hashable
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class CacheResultados:
+    """ Cache LRU de resultados das funções de visualização (tabelas e figuras), compartilhado pelo processo inteiro.
+
+    A chave é (versão dos dados, estado dos filtros, nome da função, argumentos). O tamanho total é limitado em bytes:
+    ao passar do limite, os resultados usados há mais tempo são descartados primeiro. Quem pede uma chave que outra
+    thread já está calculando (outra sessão ou o aquecimento, utils.aquecimento) espera esse cálculo em vez de repeti-lo.
+    """
+
+    def __init__(self, limite_mb):
+        self.limite_bytes = int(limite_mb * 1024 ** 2)
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self._calculando = {}
+        self.bytes = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave, calcular):
+        """ Devolve o resultado guardado para a chave ou calcula, guarda e devolve:
+        1 - num acerto, move a chave para o fim da fila (mais recente)
+        2 - se a chave já está sendo calculada por outra thread, espera o fim desse cálculo e tenta de novo
+        3 - numa falha, calcula fora da trava (outras chaves não esperam), guarda e descarta os mais antigos até caber
+
+        Entrada: chave hashable, função sem argumentos que calcula o resultado
+        Saída: resultado
+        """
+        while True:
+            with self._trava:
+                if chave in self._itens:
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return self._itens[chave][0]
+                evento = self._calculando.get(chave)
+                if evento is None:
+                    self.falhas += 1
+                    self._calculando[chave] = threading.Event()
+                    break
+            # espera a outra thread; se o resultado dela não entrou no cache (grande demais ou erro), a próxima volta calcula
+            evento.wait()
+
+        try:
+            resultado = calcular()
+            tamanho = estimar_tamanho(resultado)
+        except BaseException:
+            self._liberar(chave)
+            raise
+        if tamanho > self.limite_bytes:
+            self._liberar(chave)
+            return resultado
+
+        with self._trava:
+            if chave in self._itens:
+                self.bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (resultado, tamanho)
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                _, (_, tamanho_removido) = self._itens.popitem(last=False)
+                self.bytes -= tamanho_removido
+                self.remocoes += 1
+            self._calculando.pop(chave).set()
+        return resultado
+
+    def _liberar(self, chave):
+        with self._trava:
+            self._calculando.pop(chave).set()
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        """ Resumo para dimensionar o cache: acertos, falhas, taxa de acerto, itens, memória usada e remoções por LRU.
+        """
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "itens": len(self._itens),
+                "memoria_mb": self.bytes / 1024 ** 2,
+                "limite_mb": self.limite_bytes / 1024 ** 2,
+                "remocoes": self.remocoes,
+            }
@@ -0,0 +1,151 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Recortes em que o efeito do festival é comparado (coluna -> nome na tabela); "Geral" é o total dos pedidos filtrados
+DIMENSOES_FESTIVAL = {"City": "Cidade", "Road_traffic_density": "Tráfego", "Type_of_order": "Tipo de Pedido"}
+GERAL = "Geral"
+
+# Valores da coluna Festival comparados (com festival - sem festival)
+COM_FESTIVAL, SEM_FESTIVAL = "yes", "no"
+
+# Nível de confiança do intervalo da diferença das médias
+NIVEL_CONFIANCA = 0.95
+
+# Nomes das colunas na tabela mostrada (página e relatórios)
+COLUNAS_TABELA_FESTIVAL = {
+    "dimensao": "Recorte",
+    "valor": "Valor",
+    "n_com": "Pedidos c/ Festival",
+    "media_com": "Média c/ Festival",
+    "n_sem": "Pedidos s/ Festival",
+    "media_sem": "Média s/ Festival",
+    "efeito": "Diferença (min)",
+    "ic_inferior": f"IC {NIVEL_CONFIANCA:.0%} inf.",
+    "ic_superior": f"IC {NIVEL_CONFIANCA:.0%} sup.",
+    "p_valor": "p (Welch)",
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE ESTATÍSTICAS SUFICIENTES
+
+def estatisticas_suficientes(estatisticas):
+    """ Função que leva contagem, média e desvio padrão amostral de cada grupo às estatísticas suficientes que se somam
+    entre grupos: n, soma e soma dos quadrados (soma_quad = (n - 1) * desvio² + n * média²; grupos de um pedido só
+    não têm desvio e entram com variância zero).
+
+    Entrada: dataframe com n, mean e std
+    Saída: dataframe com n, soma e soma_quad no lugar de n, mean e std
+    """
+    n = estatisticas["n"].to_numpy(dtype=np.float64)
+    media = estatisticas["mean"].to_numpy(dtype=np.float64)
+    variancia = np.nan_to_num(estatisticas["std"].to_numpy(dtype=np.float64) ** 2)
+    return estatisticas.drop(columns=["mean", "std"]).assign(
+        n=n, soma=n * media, soma_quad=(n - 1) * variancia + n * media ** 2,
+    )
+
+                                            # FUNÇÃO DO TESTE DE WELCH
+
+def teste_welch(n_a, media_a, var_a, n_b, media_b, var_b, nivel=NIVEL_CONFIANCA):
+    """ Função que compara as médias de dois grupos, vetorizada sobre muitos pares, com o teste t de Welch
+    (variâncias diferentes):
+    1 - erro padrão da diferença = raiz(var_a / n_a + var_b / n_b)
+    2 - graus de liberdade de Welch-Satterthwaite
+    3 - p-valor bilateral e intervalo de confiança da diferença pela distribuição t (scipy)
+
+    Pares sem variância estimável (menos de dois pedidos num dos grupos, ou erro padrão zero) ficam com NaN.
+
+    Entrada: vetores de contagens, médias e variâncias amostrais dos grupos a e b, nível de confiança
+    Saída: dicionário com diferença (a - b), estatística t, graus de liberdade, p-valor e limites do intervalo
+    """
+    n_a, n_b = np.asarray(n_a, dtype=np.float64), np.asarray(n_b, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        termo_a, termo_b = var_a / n_a, var_b / n_b
+        erro = np.sqrt(termo_a + termo_b)
+        graus = (termo_a + termo_b) ** 2 / (termo_a ** 2 / (n_a - 1) + termo_b ** 2 / (n_b - 1))
+        valido = (n_a >= 2) & (n_b >= 2) & (erro > 0)
+        diferenca = media_a - media_b
+        t = np.where(valido, diferenca / erro, np.nan)
+        graus = np.where(valido, graus, np.nan)
+        margem = stats.t.ppf(0.5 + nivel / 2, graus) * erro
+    return {
+        "efeito": diferenca,
+        "t": t,
+        "graus_liberdade": graus,
+        "p_valor": 2 * stats.t.sf(np.abs(t), graus),
+        "ic_inferior": diferenca - margem,
+        "ic_superior": diferenca + margem,
+    }
+
+                                            # FUNÇÃO DE COMPARAÇÃO DO FESTIVAL
+
+def comparar_festival(estatisticas, dimensoes=None, nivel=NIVEL_CONFIANCA):
+    """ Função que mede o efeito do festival no tempo de entrega no total e em cada recorte, numa passada só:
+    1 - converte as estatísticas do nível mais fino (recortes x Festival) em n, soma e soma dos quadrados
+    2 - soma essas colunas para o total e para cada dimensão (tabelas pequenas) e empilha tudo
+    3 - separa com e sem festival lado a lado e reconstrói média e variância de cada lado
+    4 - aplica o teste de Welch a todas as linhas de uma vez (teste_welch)
+
+    Entrada: dataframe com as dimensões, Festival, n, mean e std do tempo (CONSULTAS_PAGINAS["tempo_por_festival"]),
+             dimensões comparadas (padrão: DIMENSOES_FESTIVAL), nível de confiança
+    Saída: dataframe com dimensao, valor, n, média e desvio de cada lado, efeito (com - sem, em minutos), t,
+           graus de liberdade, p-valor e intervalo de confiança
+    """
+    dimensoes = DIMENSOES_FESTIVAL if dimensoes is None else dimensoes
+    somas = estatisticas_suficientes(estatisticas)
+    colunas = ["n", "soma", "soma_quad"]
+
+    partes = [somas.groupby("Festival", observed=True)[colunas].sum().reset_index().assign(dimensao=GERAL, valor=GERAL)]
+    for coluna, nome in dimensoes.items():
+        parte = somas.groupby([coluna, "Festival"], observed=True)[colunas].sum().reset_index()
+        partes.append(parte.rename(columns={coluna: "valor"}).assign(dimensao=nome, valor=lambda df: df["valor"].astype(str)))
+    empilhado = pd.concat(partes, ignore_index=True)
+
+    chaves = ["dimensao", "valor"]
+    lados = empilhado.loc[empilhado["Festival"] == COM_FESTIVAL].set_index(chaves)[colunas].join(
+        empilhado.loc[empilhado["Festival"] == SEM_FESTIVAL].set_index(chaves)[colunas], how="outer", lsuffix="_com", rsuffix="_sem",
+    )
+    resultado = pd.DataFrame(index=lados.index)
+    variancias = {}
+    for sufixo in ("com", "sem"):
+        n = lados[f"n_{sufixo}"].fillna(0).to_numpy()
+        soma, soma_quad = lados[f"soma_{sufixo}"].to_numpy(), lados[f"soma_quad_{sufixo}"].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = np.where(n > 0, soma / n, np.nan)
+            variancias[sufixo] = np.where(n > 1, np.maximum(soma_quad - soma * media, 0) / (n - 1), np.nan)
+        resultado[f"n_{sufixo}"] = n.astype(np.int64)
+        resultado[f"media_{sufixo}"] = media
+        resultado[f"std_{sufixo}"] = np.sqrt(variancias[sufixo])
+
+    welch = teste_welch(
+        resultado["n_com"], resultado["media_com"].to_numpy(), variancias["com"],
+        resultado["n_sem"], resultado["media_sem"].to_numpy(), variancias["sem"], nivel,
+    )
+    resultado = resultado.assign(**welch).reset_index()
+
+    # ordem fixa: o total primeiro e depois as dimensões na ordem de DIMENSOES_FESTIVAL
+    ordem = {nome: posicao for posicao, nome in enumerate([GERAL, *dimensoes.values()])}
+    return resultado.sort_values(["dimensao", "valor"], key=lambda coluna: coluna.map(ordem) if coluna.name == "dimensao" else coluna, kind="stable").reset_index(drop=True)
+
+                                            # FUNÇÃO DA TABELA DO FESTIVAL
+
+def tabela_festival(comparacao):
+    """ Função que deixa a comparação pronta para mostrar: colunas renomeadas (COLUNAS_TABELA_FESTIVAL), tempos com duas
+    casas e p-valores como texto ("< 0.001" quando menores), para a página e para os relatórios mostrarem a mesma tabela.
+    """
+    tabela = comparacao.loc[:, list(COLUNAS_TABELA_FESTIVAL)].copy()
+    tabela[["media_com", "media_sem", "efeito", "ic_inferior", "ic_superior"]] = tabela[["media_com", "media_sem", "efeito", "ic_inferior", "ic_superior"]].round(2)
+    tabela["p_valor"] = [
+        "-" if pd.isna(valor) else "< 0.001" if valor < 0.001 else f"{valor:.3f}" for valor in tabela["p_valor"]
+    ]
+    return tabela.rename(columns=COLUNAS_TABELA_FESTIVAL)
@@ -0,0 +1,87 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+def _ler_numero(nome, padrao, tipo=float):
+    """ Lê uma variável de ambiente numérica, devolvendo o padrão quando ela não existe ou está vazia.
+    """
+    valor = os.environ.get(nome, "").strip()
+    return tipo(valor) if valor else padrao
+
+#===========================================================================================================================================================================
+                                                                                # CONFIGURAÇÕES
+#===========================================================================================================================================================================
+# Todas podem ser sobrescritas por variáveis de ambiente com o prefixo CURRY_ antes de subir o streamlit.
+
+# Csvs a partir deste tamanho são lidos em blocos (ingestão em streaming) em vez de inteiros na memória
+LIMITE_STREAMING_MB = _ler_numero("CURRY_LIMITE_STREAMING_MB", 512.0)
+
+# Linhas por bloco na ingestão em streaming (0 = calcular a partir de LIMITE_MEMORIA_BLOCO_MB)
+TAMANHO_BLOCO = _ler_numero("CURRY_TAMANHO_BLOCO", 0, int)
+
+# Memória alvo para processar um bloco (leitura + limpeza + enriquecimento)
+LIMITE_MEMORIA_BLOCO_MB = _ler_numero("CURRY_LIMITE_MEMORIA_BLOCO_MB", 256.0)
+
+# Memória máxima do cache LRU de resultados das visualizações (compartilhado entre as sessões do processo)
+LIMITE_CACHE_RESULTADOS_MB = _ler_numero("CURRY_LIMITE_CACHE_RESULTADOS_MB", 256.0)
+
+# Lotes novos de pedidos deixados ao lado do csv principal (ex.: dataset/train_2024-05-01.csv)
+PADRAO_LOTES = os.environ.get("CURRY_PADRAO_LOTES", "train_*.csv")
+
+# Intervalo mínimo, em segundos, entre duas verificações automáticas de pedidos novos (0 = só pelo botão)
+INTERVALO_ATUALIZACAO_S = _ler_numero("CURRY_INTERVALO_ATUALIZACAO_S", 60.0)
+
+# Lado, em km, das células (hexágonos ou quadrados) em que os pontos do mapa são agregados
+TAMANHO_CELULA_KM = _ler_numero("CURRY_TAMANHO_CELULA_KM", 2.0)
+
+# Máximo de células enviadas ao navegador por mapa (ficam as com mais pedidos)
+LIMITE_CELULAS_MAPA = _ler_numero("CURRY_LIMITE_CELULAS_MAPA", 5000, int)
+
+# Precisão p do HyperLogLog dos entregadores distintos (2**p registros por dia e dimensão; erro ~ 1.04 / sqrt(2**p))
+PRECISAO_HLL = _ler_numero("CURRY_PRECISAO_HLL", 11, int)
+
+# Erro relativo máximo dos quantis do tempo de entrega lidos dos sketches diários
+ERRO_RELATIVO_QUANTIS = _ler_numero("CURRY_ERRO_RELATIVO_QUANTIS", 0.01)
+
+# Contagem de entregadores distintos nas páginas: "exata" (tabela de entregadores por dia) ou "aproximada" (HyperLogLog)
+CONTAGEM_DISTINTA = os.environ.get("CURRY_CONTAGEM_DISTINTA", "exata")
+
+# Processos usados nas agregações grandes (0 = um por núcleo) e linhas mínimas para valer a pena usar o pool
+PROCESSOS = _ler_numero("CURRY_PROCESSOS", 0, int)
+LINHAS_MINIMAS_PARALELO = _ler_numero("CURRY_LINHAS_MINIMAS_PARALELO", 2_000_000, int)
+
+# Backend das consultas das páginas: "pandas" (dados em memória: cubo, sketches e pedidos) ou "duckdb" (SQL sobre o
+# parquet em disco, sem carregar os pedidos na memória do servidor)
+BACKEND_CONSULTAS = os.environ.get("CURRY_BACKEND_CONSULTAS", "pandas")
+
+# Máximo de pontos por traço nos gráficos (eixos de datas são reamostrados por semana/mês e linhas reduzidas pelo LTTB)
+# e máximo de barras que ainda recebem o rótulo de texto com o valor
+LIMITE_PONTOS_GRAFICO = _ler_numero("CURRY_LIMITE_PONTOS_GRAFICO", 400, int)
+LIMITE_ROTULOS_GRAFICO = _ler_numero("CURRY_LIMITE_ROTULOS_GRAFICO", 60, int)
+
+# Instrumentação das páginas (spans de carga, filtro, agregação e render num painel da sidebar): 1 = ligada para todas
+# as sessões (uma sessão sozinha pode ligar com ?instrumentacao=1 na url). Com MEMORIA=1 mede também a memória alocada
+# em cada span (tracemalloc, que deixa o processo inteiro bem mais lento)
+INSTRUMENTACAO = _ler_numero("CURRY_INSTRUMENTACAO", 0, int)
+INSTRUMENTACAO_MEMORIA = _ler_numero("CURRY_INSTRUMENTACAO_MEMORIA", 0, int)
+
+# Renderização das abas e seções das páginas: "preguicosa" (só a seção escolhida no seletor é calculada, cada uma num
+# st.fragment) ou "completa" (todas as abas/seções a cada execução, como no st.tabs)
+RENDERIZACAO = os.environ.get("CURRY_RENDERIZACAO", "preguicosa")
+
+# Relatórios em PDF (python -m utils.relatorio): tempo máximo, em segundos, para desenhar um lote inteiro (os relatórios
+# que não ficarem prontos nesse tempo são cancelados e aparecem no resumo do lote)
+TEMPO_LIMITE_RELATORIOS_S = _ler_numero("CURRY_TEMPO_LIMITE_RELATORIOS_S", 300.0)
+
+# Previsão de pedidos e entregadores por cidade (aba tática da Visão Empresa): semanas projetadas à frente
+# (as previsões diárias cobrem os mesmos dias)
+HORIZONTE_PREVISAO_SEMANAS = _ler_numero("CURRY_HORIZONTE_PREVISAO_SEMANAS", 4, int)
+
+# Aquecimento dos caches na primeira execução do servidor (utils.aquecimento): 1 = carrega os dados e calcula os gráficos
+# padrão das páginas numa thread, 0 = cada página calcula na primeira visita
+AQUECIMENTO = _ler_numero("CURRY_AQUECIMENTO", 1, int)
@@ -0,0 +1,747 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils import configuracao
+from utils.cache_disco import garantir_parquet
+from utils.cache_resultados import estado_filtros
+from utils.cubo import CHAVES_CUBO, DERIVADAS_CUBO, MEDIDAS_CUBO, filtrar_cubo, filtrar_entregadores, resumir_cubo
+from utils.dados import CAMINHO_DATASET, base_sem_streamlit, carregar_e_limpar_dados, instantaneo_dados, versao_csv
+from utils.distancia import haversine_vetorizado
+from utils.enriquecimento import ROTULOS_IDADE
+from utils.espacial import caixa_envolvente, coordenadas_validas
+from utils.geo import COLUNAS_PONTOS
+from utils.incremental import assinatura_trecho, contar_linhas, estado_arquivo, ler_acrescimo, lotes_alterados
+from utils.ingestao import processar_bloco
+from utils.instrumentacao import trecho
+from utils.perfil_entregadores import CHAVES_PERFIL, COMBINACAO_PERFIL, MEDIDAS_PERFIL, RECORTES_DIMENSAO, contar_entregadores
+from utils.sketches import CHAVES_SKETCH, posto_quantil
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Uma consulta: colunas de agrupamento (vazio = total geral) e medidas, cada uma (nome no resultado, função, coluna)
+Consulta = namedtuple("Consulta", ["grupos", "medidas"])
+
+# Arquivo de lote ingerido pelo backend DuckDB: (tamanho, mtime) do lote na ingestão, parquet e quantidade de pedidos
+LoteParquet = namedtuple("LoteParquet", ["estado", "parquet", "linhas"])
+
+# Funções de agregação aceitas nas consultas e o SQL equivalente no DuckDB ({} = coluna)
+FUNCOES_SQL = {
+    "count": "COUNT(*)",
+    "sum": "SUM({})",
+    "mean": "AVG({})",
+    "std": "STDDEV_SAMP({})",
+    "min": "MIN({})",
+    "max": "MAX({})",
+    "nunique": "COUNT(DISTINCT {})",
+    "median": "MEDIAN({})",
+    # quantil discreto, o mesmo dos sketches e da rota dos pedidos no pandas (utils.sketches.posto_quantil)
+    "p50": "QUANTILE_DISC({}, 0.5)",
+    "p90": "QUANTILE_DISC({}, 0.9)",
+    "p99": "QUANTILE_DISC({}, 0.99)",
+}
+
+# Quantil da distância usado como fim do slider: coordenadas erradas (restaurante em 0, 0) geram distâncias de milhares
+# de km, que esticariam o slider; a ponta direita inclui todas as distâncias acima dele
+QUANTIL_LIMITE_DISTANCIA = 0.99
+
+# Colunas category ordenadas (a ordem das categorias não é a alfabética)
+ORDEM_CATEGORIAS = {
+    "age_range": ROTULOS_IDADE,
+}
+
+# Funções que o cubo diário (e o perfil dos entregadores) responde, medidas do cubo e do perfil por coluna e funções
+# respondidas pelos sketches
+_FUNCOES_CUBO = {"count": "n", "mean": "mean", "std": "std", "min": "min", "max": "max"}
+_MEDIDA_CUBO_POR_COLUNA = {coluna: medida for medida, coluna in MEDIDAS_CUBO.items()}
+_MEDIDA_PERFIL_POR_COLUNA = {coluna: medida for medida, coluna in MEDIDAS_PERFIL.items()}
+_QUANTIS_SKETCH = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE CRIAÇÃO DE CONSULTA
+
+def consulta(grupos, **medidas):
+    """ Função que monta uma Consulta: consulta(["City"], tempo=("mean", "time_taken"), pedidos=("count", None)).
+    """
+    return Consulta(tuple(grupos), tuple((nome, funcao, coluna) for nome, (funcao, coluna) in medidas.items()))
+
+                                            # FUNÇÃO DE ORDENAÇÃO DO RESULTADO
+
+def ordenar_resultado(resultado, grupos):
+    """ Função que deixa o resultado de qualquer backend na mesma forma: sem grupos nulos (como no groupby do pandas),
+    colunas category ordenadas com a ordem delas e linhas ordenadas pelos grupos.
+    """
+    if grupos:
+        resultado = resultado.dropna(subset=list(grupos))
+    for grupo, ordem in ORDEM_CATEGORIAS.items():
+        if grupo in resultado.columns and not isinstance(resultado[grupo].dtype, pd.CategoricalDtype):
+            resultado[grupo] = pd.Categorical(resultado[grupo], categories=ordem, ordered=True)
+    if grupos:
+        resultado = resultado.sort_values(list(grupos), kind="stable")
+    return resultado.reset_index(drop=True)
+
+                                            # FUNÇÃO DE QUANTIL DISCRETO DOS PEDIDOS
+
+def quantil_discreto(pedidos, grupos, coluna, quantil):
+    """ Função que calcula o quantil discreto exato (utils.sketches.posto_quantil, o mesmo dos sketches e do DuckDB)
+    de uma coluna por grupo, direto dos pedidos:
+    1 - descarta os nulos da coluna (como o SQL)
+    2 - ordena os valores por grupo e valor uma vez só
+    3 - pega, em cada grupo, o valor na posição do posto
+
+    Entrada: pedidos, colunas de agrupamento (vazio = total geral), coluna, quantil
+    Saída: série indexada pelos grupos (ou um número, sem grupos; NaN sem valores)
+    """
+    validos = pedidos.loc[pedidos[coluna].notna(), list(grupos) + [coluna]]
+    valores = validos[coluna].to_numpy(dtype=np.float64)
+    if not grupos:
+        return float(np.sort(valores)[int(posto_quantil(len(valores), quantil))]) if len(valores) else np.nan
+    agrupado = validos.groupby(list(grupos), observed=True, sort=True)
+    tamanhos = agrupado.size()
+    ordem = np.lexsort((valores, agrupado.ngroup().to_numpy()))
+    inicios = np.cumsum(tamanhos.to_numpy()) - tamanhos.to_numpy()
+    escolhidos = ordem[inicios + posto_quantil(tamanhos.to_numpy(), quantil).astype(np.int64)]
+    return pd.Series(valores[escolhidos], index=tamanhos.index, name=coluna)
+
+                                            # FUNÇÃO DA FAIXA DE DISTÂNCIA
+
+def faixa_distancia(selecionada, limites):
+    """ Função que transforma a faixa do slider de distância no filtro das consultas: None quando cobre todos os pedidos
+    (assim as consultas continuam indo para o cubo e os sketches, que não conhecem a distância de cada pedido).
+    A ponta direita do slider não tem limite superior (inclui as distâncias acima do quantil QUANTIL_LIMITE_DISTANCIA).
+
+    Entrada: (mínimo, máximo) selecionados, (mínimo, máximo) do slider
+    Saída: (mínimo, máximo) em km ou None
+    """
+    minimo, maximo = float(selecionada[0]), float(selecionada[1])
+    if minimo <= limites[0] and maximo >= limites[1]:
+        return None
+    return minimo, (float("inf") if maximo >= limites[1] else maximo)
+
+                                            # FUNÇÃO DO BACKEND DUCKDB COMPARTILHADO
+
+@st.cache_resource(show_spinner="Preparando o banco de consultas...")
+def _backend_duckdb(caminho):
+    """ Guarda um único backend DuckDB por processo (a conexão e a visão sobre o parquet são compartilhadas).
+    """
+    return BackendDuckDB(caminho)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO BACKEND FORA DO STREAMLIT
+
+def criar_backend(caminho=CAMINHO_DATASET):
+    """ Função que monta o backend configurado em CURRY_BACKEND_CONSULTAS sem o cache do streamlit (st.cache_resource,
+    st.session_state), para a linha de comando (utils.relatorio): no pandas, com uma base carregada só para ele.
+
+    Entrada: caminho do csv
+    Saída: backend (BackendPandas ou BackendDuckDB)
+    """
+    if configuracao.BACKEND_CONSULTAS not in ("pandas", "duckdb"):
+        raise ValueError(f"CURRY_BACKEND_CONSULTAS desconhecido: {configuracao.BACKEND_CONSULTAS} (use pandas ou duckdb)")
+    if configuracao.BACKEND_CONSULTAS == "duckdb":
+        return BackendDuckDB(caminho)
+    return BackendPandas(caminho, base=base_sem_streamlit(caminho))
+
+                                            # FUNÇÃO DE ESCOLHA DO BACKEND
+
+def carregar_backend(caminho=CAMINHO_DATASET):
+    """ Função que devolve o backend de consultas configurado em CURRY_BACKEND_CONSULTAS:
+    "pandas" (padrão) responde com os dados em memória (cubo, sketches, entregadores por dia ou pedidos) e
+    "duckdb" responde com SQL sobre o parquet em disco, sem carregar os pedidos na memória do servidor.
+
+    Entrada: caminho do csv
+    Saída: backend com limites_data, limites_distancia, valores, agregar, selecionar, buscas espaciais e versao
+    """
+    if configuracao.BACKEND_CONSULTAS not in ("pandas", "duckdb"):
+        raise ValueError(f"CURRY_BACKEND_CONSULTAS desconhecido: {configuracao.BACKEND_CONSULTAS} (use pandas ou duckdb)")
+    with trecho("carregar_backend", "carga", backend=configuracao.BACKEND_CONSULTAS):
+        if configuracao.BACKEND_CONSULTAS == "duckdb":
+            backend = _backend_duckdb(caminho)
+            backend.atualizar_se_necessario()
+            return backend
+        return BackendPandas(caminho)
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class BackendPandas:
+    """ Backend em memória: cada medida de uma consulta vai para a estrutura mais barata que a responde
+    - contagem, média, desvio, mínimo e máximo de time_taken, notas e distância por chaves do cubo: cubo diário
+    - entregadores distintos por dia/tráfego/semana: tabela de entregadores por dia (ou sketches, se aproximada)
+    - contagem, média, desvio, mínimo e máximo por entregador, ou de idade e condição do veículo, e entregadores distintos
+      por cidade ou faixa etária: perfil dos entregadores (entregador x dia x tráfego x cidade); com o filtro de datas
+      incluindo todos os pedidos e só tráfego ou só cidade filtrados/agrupados, a dimensão dos entregadores (uma linha
+      por entregador) responde o mesmo
+    - p50/p90/p99 do time_taken por chaves dos sketches: sketches diários (erro relativo de no máximo alfa); nos pedidos,
+      o mesmo quantil discreto, exato (quantil_discreto): mexer na faixa de distância não muda o que é um percentil
+    - o resto: pedidos filtrados pelo índice (um único groupby para todas as medidas restantes)
+
+    Com uma faixa de distância na sidebar, tudo vai para os pedidos filtrados (as estruturas pré-agregadas não guardam
+    a distância de cada pedido). A data inicial e as cidades dos relatórios (utils.relatorio) filtram o cubo, o perfil
+    e os sketches, que têm essas chaves; com cidades, os entregadores distintos saem do perfil. Buscas por raio e
+    vizinhos mais próximos usam o índice espacial (KD-trees).
+    """
+
+    def __init__(self, caminho=CAMINHO_DATASET, base=None):
+        self.caminho = caminho
+        # sem base, os dados vêm da base compartilhada do servidor (instantâneo fixado na execução da página);
+        # com uma base própria (linha de comando), do instantâneo dela no momento da criação
+        self._fixo = None if base is None else base.atual
+        self.df1 = carregar_e_limpar_dados(caminho) if base is None else self._fixo.df
+        self.versao = self._dados().versao
+
+    def _dados(self):
+        return self._fixo if self._fixo is not None else instantaneo_dados(self.caminho)
+
+    def limites_data(self):
+        datas = self._dados().indice.datas
+        return pd.Timestamp(datas[0]), pd.Timestamp(datas[-1])
+
+    def limites_distancia(self):
+        ordenados = self._dados().indice.ordenados["distance"]
+        if not len(ordenados):
+            return 0.0, 0.0
+        return float(np.floor(ordenados[0])), float(np.ceil(ordenados[int(QUANTIL_LIMITE_DISTANCIA * (len(ordenados) - 1))]))
+
+    def valores(self, coluna):
+        return sorted(self.df1[coluna].dropna().unique())
+
+    @staticmethod
+    def _intervalos(distancia):
+        return {"distance": distancia} if distancia is not None else None
+
+    @staticmethod
+    def _selecoes(trafegos, cidades=None):
+        selecoes = {"Road_traffic_density": trafegos}
+        if cidades is not None:
+            selecoes["City"] = cidades
+        return selecoes
+
+    def selecionar(self, colunas, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        """ Colunas dos pedidos que passam nos filtros (para o que não é agregação, como os pontos do mapa).
+        """
+        with trecho("filtrar_pedidos", "filtro", linhas_entrada=len(self.df1)) as span:
+            filtrado = self._dados().indice.filtrar(
+                self.df1, data_limite, self._selecoes(trafegos, cidades), self._intervalos(distancia), data_inicial,
+            )
+            span.linhas_saida = len(filtrado)
+        return filtrado.loc[:, list(colunas)]
+
+    def selecionar_no_raio(self, colunas, lat, lon, raio_km, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        """ Colunas dos pedidos que passam nos filtros e cujo local de entrega está a até `raio_km` do ponto:
+        a KD-tree devolve as linhas dentro do raio e só elas são cruzadas com os filtros da sidebar.
+        """
+        with trecho("entregas_no_raio", "filtro", raio_km=raio_km) as span:
+            no_raio = self._dados().espacial.entregas_no_raio(lat, lon, raio_km)
+            posicoes = self._dados().indice.posicoes(
+                data_limite, self._selecoes(trafegos, cidades), self._intervalos(distancia), data_inicial,
+            )
+            if isinstance(posicoes, slice):
+                no_raio = no_raio[(no_raio >= posicoes.start) & (no_raio < posicoes.stop)]
+            else:
+                no_raio = np.intersect1d(no_raio, posicoes, assume_unique=True)
+            span.linhas_saida = len(no_raio)
+        return self.df1.iloc[no_raio].loc[:, list(colunas)]
+
+    def restaurantes(self):
+        """ Restaurantes distintos com a quantidade de pedidos (todos os pedidos), do mais movimentado ao menos.
+        """
+        return self._dados().espacial.restaurantes()
+
+    def restaurantes_proximos(self, lat, lon, k=5):
+        """ Os k restaurantes mais próximos do ponto (KD-tree), com a distância em km e a quantidade de pedidos.
+        """
+        with trecho("restaurantes_proximos", "agregacao", k=k) as span:
+            proximos = self._dados().espacial.restaurantes_proximos(lat, lon, k)
+            span.linhas_saida = len(proximos)
+        return proximos
+
+    def _rota(self, grupos, funcao, coluna, cidades=None):
+        derivaveis = set(DERIVADAS_CUBO)
+        if funcao in _FUNCOES_CUBO and (funcao == "count" or coluna in _MEDIDA_CUBO_POR_COLUNA) and set(grupos) <= set(CHAVES_CUBO) | derivaveis:
+            return "cubo"
+        if funcao in _FUNCOES_CUBO and (funcao == "count" or coluna in _MEDIDA_PERFIL_POR_COLUNA) and set(grupos) <= set(CHAVES_PERFIL) | derivaveis:
+            return "perfil"
+        if funcao == "nunique" and coluna == "Delivery_person_ID":
+            if configuracao.CONTAGEM_DISTINTA == "aproximada" and set(grupos) <= set(CHAVES_SKETCH) | derivaveis:
+                return "sketches"
+            # a tabela de entregadores por dia não tem a cidade: com o filtro de cidades, quem responde é o perfil
+            if cidades is None and set(grupos) <= {"Order_Date", "Road_traffic_density"} | derivaveis:
+                return "entregadores"
+            if set(grupos) <= set(CHAVES_PERFIL) | {"age_range"} | derivaveis:
+                return "perfil"
+        if funcao in _QUANTIS_SKETCH and coluna == "time_taken" and set(grupos) <= set(CHAVES_SKETCH) | derivaveis:
+            return "sketches"
+        return "pedidos"
+
+    def _pelo_cubo(self, grupos, medidas, data_limite, trafegos, data_inicial=None, cidades=None):
+        cubo = self._dados().cubo
+        with trecho("filtrar_cubo", "filtro", linhas_entrada=len(cubo)) as span:
+            cubo = filtrar_cubo(cubo, data_limite, trafegos, data_inicial, cidades)
+            span.linhas_saida = len(cubo)
+        colunas = {_MEDIDA_CUBO_POR_COLUNA.get(coluna) for _, funcao, coluna in medidas if funcao != "count"} - {None}
+        with trecho("resumir_cubo", "agregacao", linhas_entrada=len(cubo), grupos=", ".join(grupos)) as span:
+            resumo = resumir_cubo(cubo, list(grupos), medidas=sorted(colunas))
+            span.linhas_saida = len(resumo)
+        resultado = resumo.loc[:, list(grupos)].copy()
+        for nome, funcao, coluna in medidas:
+            origem = "n" if funcao == "count" else f"{_MEDIDA_CUBO_POR_COLUNA[coluna]}_{_FUNCOES_CUBO[funcao]}"
+            resultado[nome] = resumo[origem].to_numpy()
+        return resultado
+
+    def _pelos_entregadores(self, grupos, medidas, data_limite, trafegos, data_inicial=None):
+        entregadores = self._dados().entregadores
+        with trecho("filtrar_entregadores", "filtro", linhas_entrada=len(entregadores)) as span:
+            entregadores = filtrar_entregadores(entregadores, data_limite, trafegos, data_inicial)
+            span.linhas_saida = len(entregadores)
+        with trecho("contar_entregadores", "agregacao", linhas_entrada=len(entregadores), grupos=", ".join(grupos)) as span:
+            if grupos:
+                chaves = [
+                    pd.Series(DERIVADAS_CUBO[grupo](entregadores["Order_Date"]), index=entregadores.index, name=grupo)
+                    if grupo in DERIVADAS_CUBO else entregadores[grupo]
+                    for grupo in grupos
+                ]
+                contagem = entregadores["Delivery_person_ID"].groupby(chaves, observed=True, sort=True).nunique()
+                resultado, valores = contagem.index.to_frame(index=False), contagem.to_numpy()
+            else:
+                resultado, valores = pd.DataFrame(index=[0]), [entregadores["Delivery_person_ID"].nunique()]
+            span.linhas_saida = len(resultado)
+        for nome, _, _ in medidas:
+            resultado[nome] = valores
+        return resultado
+
+    def _recorte_dimensao(self, grupos, data_limite, trafegos, data_inicial=None, cidades=None):
+        """ Recorte da dimensão dos entregadores (tráfego ou cidade) que responde uma consulta do perfil, ou None quando
+        só o perfil responde: datas que deixam pedidos de fora, grupos de datas, ou tráfego e cidade ao mesmo tempo.
+        """
+        dimensao = self._dados().dimensao
+        if not set(grupos) <= {"Delivery_person_ID", "age_range"} | set(RECORTES_DIMENSAO) or not dimensao.cobre(data_limite, data_inicial):
+            return None
+        por_trafego = "Road_traffic_density" in grupos or not set(dimensao.valores("Road_traffic_density")) <= set(trafegos)
+        por_cidade = "City" in grupos or (cidades is not None and not set(dimensao.valores("City")) <= set(cidades))
+        if por_trafego and por_cidade:
+            return None
+        return "City" if por_cidade else "Road_traffic_density"
+
+    def _pelo_perfil(self, grupos, medidas, data_limite, trafegos, data_inicial=None, cidades=None):
+        perfil = self._dados().perfil
+        with trecho("filtrar_perfil", "filtro", linhas_entrada=len(perfil)) as span:
+            perfil = filtrar_cubo(perfil, data_limite, trafegos, data_inicial, cidades)
+            span.linhas_saida = len(perfil)
+        return self._resumir_perfil(perfil, grupos, medidas)
+
+    def _pela_dimensao(self, grupos, medidas, data_limite, trafegos, recorte, cidades=None):
+        dimensao = self._dados().dimensao
+        with trecho("filtrar_dimensao", "filtro", linhas_entrada=len(dimensao), recorte=recorte) as span:
+            perfil = dimensao.perfil(recorte, trafegos if recorte == "Road_traffic_density" else cidades)
+            span.linhas_saida = len(perfil)
+        return self._resumir_perfil(perfil, grupos, medidas)
+
+    def _resumir_perfil(self, perfil, grupos, medidas):
+        distintos = [nome for nome, funcao, _ in medidas if funcao == "nunique"]
+        estatisticas = [medida for medida in medidas if medida[1] != "nunique"]
+        resultado = None
+        with trecho("resumir_perfil", "agregacao", linhas_entrada=len(perfil), grupos=", ".join(grupos)) as span:
+            if estatisticas:
+                colunas = {_MEDIDA_PERFIL_POR_COLUNA[coluna] for _, funcao, coluna in estatisticas if funcao != "count"}
+                resumo = resumir_cubo(perfil, list(grupos), medidas=sorted(colunas), combinacao=COMBINACAO_PERFIL)
+                resultado = resumo.loc[:, list(grupos)].copy()
+                for nome, funcao, coluna in estatisticas:
+                    origem = "n" if funcao == "count" else f"{_MEDIDA_PERFIL_POR_COLUNA[coluna]}_{_FUNCOES_CUBO[funcao]}"
+                    valores = resumo[origem].to_numpy()
+                    # mínimo e máximo de colunas inteiras (idade, condição do veículo) voltam ao tipo dos pedidos
+                    tipo = self.df1[coluna].dtype if coluna else None
+                    if funcao in ("min", "max") and pd.api.types.is_integer_dtype(tipo) and not pd.isna(valores).any():
+                        valores = valores.astype(tipo)
+                    resultado[nome] = valores
+            if distintos:
+                contagem = contar_entregadores(perfil, list(grupos))
+                for nome in distintos:
+                    contagem[nome] = contagem["Delivery_person_ID"]
+                contagem = contagem.loc[:, list(grupos) + distintos]
+                if resultado is None:
+                    resultado = contagem
+                elif grupos:
+                    resultado = resultado.merge(contagem, on=list(grupos), how="inner")
+                else:
+                    resultado = pd.concat([resultado, contagem], axis=1)
+            span.linhas_saida = len(resultado)
+        return resultado
+
+    def _pelos_sketches(self, grupos, medidas, data_limite, trafegos, data_inicial=None, cidades=None):
+        sketches = self._dados().sketches
+        with trecho("filtrar_sketches", "filtro", linhas_entrada=len(sketches)) as span:
+            sketches = sketches.filtrar(data_limite, trafegos, data_inicial, cidades)
+            span.linhas_saida = len(sketches)
+        resultado = None
+        distintos = [nome for nome, funcao, _ in medidas if funcao == "nunique"]
+        quantis = [(nome, funcao) for nome, funcao, _ in medidas if funcao in _QUANTIS_SKETCH]
+        with trecho("juntar_sketches", "agregacao", linhas_entrada=len(sketches), grupos=", ".join(grupos)) as span:
+            if distintos:
+                resultado = sketches.distintos(list(grupos))
+                for nome in distintos:
+                    resultado[nome] = resultado["Delivery_person_ID"]
+                resultado = resultado.loc[:, list(grupos) + distintos]
+            if quantis:
+                tabela = sketches.quantis(list(grupos), [_QUANTIS_SKETCH[funcao] for _, funcao in quantis])
+                tabela.columns = list(grupos) + ["n"] + [nome for nome, _ in quantis]
+                tabela = tabela.drop(columns="n")
+                resultado = tabela if resultado is None else resultado.merge(tabela, on=list(grupos), how="outer")
+            span.linhas_saida = len(resultado)
+        return resultado
+
+    def _pelos_pedidos(self, grupos, medidas, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        colunas = set(grupos) | {coluna for _, _, coluna in medidas if coluna}
+        pedidos = self.selecionar(sorted(colunas), data_limite, trafegos, distancia, data_inicial, cidades)
+        with trecho("agrupar_pedidos", "agregacao", linhas_entrada=len(pedidos), grupos=", ".join(grupos)) as span:
+            origem = pedidos.groupby(grupos, observed=True, sort=True) if grupos else pedidos
+
+            resultado = {}
+            for nome, funcao, coluna in medidas:
+                if funcao == "count":
+                    valor = origem.size() if grupos else len(pedidos)
+                elif funcao in _QUANTIS_SKETCH:
+                    valor = quantil_discreto(pedidos, grupos, coluna, _QUANTIS_SKETCH[funcao])
+                else:
+                    valor = getattr(origem[coluna], funcao)()
+                resultado[nome] = valor if grupos else [valor]
+            tabela = pd.DataFrame(resultado)
+            span.linhas_saida = len(tabela)
+        return tabela.reset_index() if grupos else tabela
+
+    def agregar(self, consulta, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        """ Executa a consulta: separa as medidas por rota, executa cada rota uma vez e junta os resultados pelos grupos.
+        """
+        grupos = list(consulta.grupos)
+        rotas = {}
+        for medida in consulta.medidas:
+            rota = "pedidos" if distancia is not None else self._rota(grupos, medida[1], medida[2], cidades)
+            rotas.setdefault(rota, []).append(medida)
+        recorte_dimensao = self._recorte_dimensao(grupos, data_limite, trafegos, data_inicial, cidades) if "perfil" in rotas else None
+        if recorte_dimensao is not None:
+            rotas["dimensao"] = rotas.pop("perfil")
+
+        recorte = {"data_inicial": data_inicial, "cidades": cidades}
+        executores = {
+            "cubo": partial(self._pelo_cubo, **recorte),
+            "entregadores": partial(self._pelos_entregadores, data_inicial=data_inicial),
+            "perfil": partial(self._pelo_perfil, **recorte),
+            "dimensao": partial(self._pela_dimensao, recorte=recorte_dimensao, cidades=cidades),
+            "sketches": partial(self._pelos_sketches, **recorte),
+            "pedidos": partial(self._pelos_pedidos, distancia=distancia, **recorte),
+        }
+        resultado = None
+        for rota, medidas in rotas.items():
+            parcial = executores[rota](grupos, medidas, data_limite, trafegos)
+            if resultado is None:
+                resultado = parcial
+            elif grupos:
+                resultado = resultado.merge(parcial, on=grupos, how="inner")
+            else:
+                resultado = pd.concat([resultado, parcial], axis=1)
+        resultado = resultado.loc[:, grupos + [nome for nome, _, _ in consulta.medidas]]
+        return ordenar_resultado(resultado, grupos)
+
+
+class BackendDuckDB:
+    """ Backend SQL: as consultas viram um SELECT ... GROUP BY sobre os parquets limpos (o do csv principal, os dos
+    arquivos de lote e os dos acréscimos), com os filtros da sidebar no WHERE (o DuckDB só lê as colunas e os row
+    groups necessários). Os pedidos não ficam na memória do servidor; só os resultados, que são pequenos.
+
+    Pedidos novos entram como na base do pandas (utils.incremental.BaseIncremental), sem reingerir o csv inteiro:
+    - linhas acrescentadas ao fim do csv principal viram um parquet pequeno de acréscimo, numa pasta temporária
+      do processo (no próximo início, o parquet principal é refeito com elas)
+    - cada arquivo de lote (CURRY_PADRAO_LOTES) ganha o seu parquet ao lado dele, reaproveitado entre inícios; um lote
+      que mudou de tamanho ou mtime (ainda estava sendo escrito) tem o parquet refeito
+    - se o trecho já ingerido do csv principal mudar (arquivo reescrito ou truncado), tudo é refeito do zero e os lotes
+      são ingeridos de novo logo em seguida
+    """
+
+    def __init__(self, caminho=CAMINHO_DATASET):
+        import duckdb
+
+        self.caminho = caminho
+        self._conexao = duckdb.connect()
+        self._trava = threading.Lock()
+        self._pasta_acrescimos = tempfile.TemporaryDirectory(prefix="curry-duckdb-")
+        self.ultima_verificacao = 0.0
+        self.atualizacoes = 0
+        self.linhas_incrementais = 0
+        self._preparar()
+        self.atualizar()
+
+    def _preparar(self):
+        """ Garante o parquet válido para o csv principal atual (ingestão em blocos, se preciso), esquece acréscimos
+        e lotes já lidos e recria a visão sobre o parquet.
+        """
+        self.offset = os.path.getsize(self.caminho)
+        self.principal = garantir_parquet(self.caminho)
+        self.assinatura = assinatura_trecho(self.caminho, self.offset)
+        self.colunas_brutas = list(pd.read_csv(self.caminho, nrows=0).columns)
+        self.proximo_indice = contar_linhas(self.caminho, self.offset) - 1
+        self.versao_base = versao_csv(self.caminho)
+        self.acrescimos = []
+        self.lotes = {}
+        self._recriar_visao()
+
+    def _recriar_visao(self):
+        arquivos = [self.principal, *self.acrescimos, *(lote.parquet for lote in self.lotes.values())]
+        lista = ", ".join("'" + str(arquivo).replace("'", "''") + "'" for arquivo in arquivos)
+        # union_by_name: cada parquet tem os tipos compactos do seu próprio bloco (int8 num, int16 noutro)
+        self._conexao.execute(f"CREATE OR REPLACE VIEW pedidos AS SELECT * FROM read_parquet([{lista}], union_by_name = true)")
+        self.versao = f"{self.versao_base}+{self.atualizacoes}"
+
+    def _gravar_acrescimo(self, bruto):
+        bruto.index = pd.RangeIndex(self.proximo_indice, self.proximo_indice + len(bruto))
+        self.proximo_indice += len(bruto)
+        limpo = processar_bloco(bruto)
+        if limpo.empty:
+            return 0
+        destino = Path(self._pasta_acrescimos.name) / f"acrescimo_{len(self.acrescimos):05d}.parquet"
+        pq.write_table(pa.Table.from_pandas(limpo, preserve_index=True), destino)
+        self.acrescimos.append(destino)
+        return len(limpo)
+
+    def atualizar(self):
+        """ Procura pedidos novos e, se houver, incorpora só eles:
+        1 - se o trecho já ingerido do csv principal mudou, refaz o parquet principal (_preparar)
+        2 - senão, limpa as linhas acrescentadas ao csv principal e as grava num parquet de acréscimo
+        3 - ingere cada lote novo ou alterado para o parquet ao lado dele (garantir_parquet; depois de refazer tudo, são
+            todos) e recria a visão com todos os arquivos
+
+        Saída: quantidade de pedidos novos incorporados (-1 quando foi preciso refazer tudo)
+        """
+        with self._trava:
+            self.ultima_verificacao = time.monotonic()
+            lido = ler_acrescimo(self.caminho, self.offset, self.assinatura, self.colunas_brutas)
+            recarregou = lido is None
+            novos = 0
+            if recarregou:
+                self.atualizacoes += 1
+                self._preparar()
+            else:
+                brutos, self.offset, self.assinatura = lido
+                novos = sum(self._gravar_acrescimo(bruto) for bruto in brutos)
+            alterados = lotes_alterados(self.caminho, self.lotes)
+            for caminho_lote in alterados:
+                # o estado é lido antes da ingestão: se o lote crescer durante ela, volta a ser ingerido na próxima vez
+                estado = estado_arquivo(caminho_lote)
+                parquet = garantir_parquet(caminho_lote)
+                anterior = self.lotes.get(caminho_lote.name)
+                self.lotes[caminho_lote.name] = LoteParquet(estado, parquet, pq.read_metadata(parquet).num_rows)
+                novos += self.lotes[caminho_lote.name].linhas - (anterior.linhas if anterior else 0)
+            if not (novos or alterados):
+                return -1 if recarregou else 0
+            self.atualizacoes += 1
+            self.linhas_incrementais += max(novos, 0)
+            self._recriar_visao()
+            return -1 if recarregou else novos
+
+    def atualizar_se_necessario(self, intervalo=None):
+        """ Chama atualizar() no máximo uma vez a cada `intervalo` segundos (CURRY_INTERVALO_ATUALIZACAO_S; 0 desliga).
+        """
+        intervalo = configuracao.INTERVALO_ATUALIZACAO_S if intervalo is None else intervalo
+        if intervalo and time.monotonic() - self.ultima_verificacao >= intervalo:
+            return self.atualizar()
+        return 0
+
+    def _executar(self, sql, parametros=()):
+        # cada consulta usa seu próprio cursor: a conexão é compartilhada pelas sessões (threads) do servidor
+        with self._trava:
+            cursor = self._conexao.cursor()
+        try:
+            return cursor.execute(sql, list(parametros)).df()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _filtros(data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        if not trafegos or (cidades is not None and not cidades):
+            return "FALSE", []
+        marcadores = ", ".join("?" for _ in trafegos)
+        filtro = f"Order_Date <= ? AND Road_traffic_density IN ({marcadores})"
+        parametros = [pd.Timestamp(data_limite).to_pydatetime()] + [str(valor) for valor in trafegos]
+        if distancia is not None:
+            filtro += " AND distance BETWEEN ? AND ?"
+            parametros += [float(distancia[0]), float(distancia[1])]
+        if data_inicial is not None:
+            filtro += " AND Order_Date >= ?"
+            parametros.append(pd.Timestamp(data_inicial).to_pydatetime())
+        if cidades is not None:
+            filtro += f" AND City IN ({', '.join('?' for _ in cidades)})"
+            parametros += [str(valor) for valor in cidades]
+        return filtro, parametros
+
+    def limites_data(self):
+        minimo, maximo = self._executar("SELECT MIN(Order_Date), MAX(Order_Date) FROM pedidos").iloc[0]
+        return pd.Timestamp(minimo), pd.Timestamp(maximo)
+
+    def limites_distancia(self):
+        menor, maior = self._executar(f"SELECT MIN(distance), QUANTILE_DISC(distance, {QUANTIL_LIMITE_DISTANCIA}) FROM pedidos").iloc[0]
+        if pd.isna(menor):
+            return 0.0, 0.0
+        return float(np.floor(menor)), float(np.ceil(maior))
+
+    def valores(self, coluna):
+        return self._executar(f'SELECT DISTINCT "{coluna}" AS valor FROM pedidos WHERE "{coluna}" IS NOT NULL ORDER BY 1')["valor"].tolist()
+
+    def selecionar(self, colunas, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        filtro, parametros = self._filtros(data_limite, trafegos, distancia, data_inicial, cidades)
+        lista = ", ".join(f'"{coluna}"' for coluna in colunas)
+        with trecho("duckdb_selecionar", "filtro") as span:
+            resultado = self._executar(f"SELECT {lista} FROM pedidos WHERE {filtro}", parametros)
+            span.linhas_saida = len(resultado)
+        return resultado
+
+    def selecionar_no_raio(self, colunas, lat, lon, raio_km, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        """ Sem árvore: a caixa de latitude/longitude que contém o círculo vai para o WHERE (o DuckDB pula os row groups
+        fora dela) e o haversine decide quais pedidos da caixa estão dentro do raio.
+        """
+        filtro, parametros = self._filtros(data_limite, trafegos, distancia, data_inicial, cidades)
+        coluna_lat, coluna_lon = COLUNAS_PONTOS["Entregas"]
+        lat_min, lat_max, lon_min, lon_max = caixa_envolvente(lat, lon, raio_km)
+        lista = ", ".join(f'"{coluna}"' for coluna in dict.fromkeys([*colunas, coluna_lat, coluna_lon]))
+        sql = f'SELECT {lista} FROM pedidos WHERE {filtro} AND "{coluna_lat}" BETWEEN ? AND ? AND "{coluna_lon}" BETWEEN ? AND ?'
+        with trecho("duckdb_no_raio", "filtro", raio_km=raio_km) as span:
+            caixa = self._executar(sql, parametros + [lat_min, lat_max, lon_min, lon_max])
+            pontos_lat, pontos_lon = caixa[coluna_lat].to_numpy(dtype=np.float64), caixa[coluna_lon].to_numpy(dtype=np.float64)
+            dentro = coordenadas_validas(pontos_lat, pontos_lon) & (haversine_vetorizado(lat, lon, pontos_lat, pontos_lon) <= raio_km)
+            resultado = caixa.loc[dentro, list(colunas)].reset_index(drop=True)
+            span.linhas_saida = len(resultado)
+        return resultado
+
+    def restaurantes(self):
+        coluna_lat, coluna_lon = COLUNAS_PONTOS["Restaurantes"]
+        return self._executar(
+            f'SELECT "{coluna_lat}", "{coluna_lon}", COUNT(*) AS pedidos FROM pedidos '
+            f'WHERE "{coluna_lat}" IS NOT NULL AND "{coluna_lon}" IS NOT NULL AND ("{coluna_lat}" <> 0 OR "{coluna_lon}" <> 0) '
+            f'GROUP BY 1, 2 ORDER BY pedidos DESC, 1, 2'
+        ).astype({"pedidos": np.int64})
+
+    def restaurantes_proximos(self, lat, lon, k=5):
+        """ Sem árvore: haversine do ponto até cada restaurante distinto (poucos, perto da quantidade de pedidos)
+        e seleção parcial dos k menores.
+        """
+        coluna_lat, coluna_lon = COLUNAS_PONTOS["Restaurantes"]
+        with trecho("duckdb_restaurantes_proximos", "agregacao", k=k) as span:
+            restaurantes = self.restaurantes()
+            distancias = haversine_vetorizado(lat, lon, restaurantes[coluna_lat].to_numpy(), restaurantes[coluna_lon].to_numpy())
+            k = min(k, len(restaurantes))
+            escolhidos = np.argpartition(distancias, k - 1)[:k] if 0 < k < len(restaurantes) else np.arange(k)
+            escolhidos = escolhidos[np.argsort(distancias[escolhidos], kind="stable")]
+            proximos = restaurantes.iloc[escolhidos].reset_index(drop=True)
+            proximos.insert(2, "distancia_km", distancias[escolhidos])
+            span.linhas_saida = len(proximos)
+        return proximos
+
+    def agregar(self, consulta, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        """ Traduz a consulta para SQL (agrupamentos, funções e filtros) e executa no DuckDB.
+        """
+        grupos = list(consulta.grupos)
+        expressoes = [f'"{grupo}"' for grupo in grupos]
+        expressoes += [FUNCOES_SQL[funcao].format(f'"{coluna}"') + f' AS "{nome}"' for nome, funcao, coluna in consulta.medidas]
+        filtro, parametros = self._filtros(data_limite, trafegos, distancia, data_inicial, cidades)
+        sql = f"SELECT {', '.join(expressoes)} FROM pedidos WHERE {filtro}"
+        if grupos:
+            posicoes = ", ".join(str(posicao + 1) for posicao in range(len(grupos)))
+            sql += f" GROUP BY {posicoes} HAVING COUNT(*) > 0"
+        # no DuckDB, filtro e agregação são um único SELECT: o span fica na etapa de agregação
+        with trecho("duckdb_agregar", "agregacao", grupos=", ".join(grupos)) as span:
+            resultado = self._executar(sql, parametros)
+            span.linhas_saida = len(resultado)
+        for coluna in resultado.columns:
+            # inteiros com nulos chegam como Int64/Int8 (<NA>); no pandas, agregações sem linhas dão NaN
+            if isinstance(resultado[coluna].dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(resultado[coluna].dtype):
+                resultado[coluna] = resultado[coluna].astype("float64")
+        return ordenar_resultado(resultado, grupos)
+
+
+class ConsultasFiltradas:
+    """ Um backend com os filtros da sidebar já aplicados: é o que as funções das páginas recebem.
+    A faixa de distância (km) é None quando não filtra nada (veja faixa_distancia); a data inicial e as cidades
+    só são usadas pelos relatórios (None = sem filtro).
+    """
+
+    def __init__(self, backend, data_limite, trafegos, distancia=None, data_inicial=None, cidades=None):
+        self.backend = backend
+        self.data_limite = data_limite
+        self.trafegos = list(trafegos)
+        self.distancia = distancia
+        self.data_inicial = data_inicial
+        self.cidades = None if cidades is None else list(cidades)
+
+    def _recorte(self):
+        return {"data_inicial": self.data_inicial, "cidades": self.cidades}
+
+    def chave_cache(self):
+        """ Parte da chave do cache de resultados (utils.cache_resultados.chave_valor): a versão dos dados do backend
+        consultado e os filtros, não o objeto.
+        """
+        return ("ConsultasFiltradas", self.backend.versao) + estado_filtros(self.data_limite, self.trafegos, distancia=self.distancia, **self._recorte())
+
+    def agregar(self, consulta):
+        return self.backend.agregar(consulta, self.data_limite, self.trafegos, self.distancia, **self._recorte())
+
+    def selecionar(self, colunas):
+        return self.backend.selecionar(colunas, self.data_limite, self.trafegos, self.distancia, **self._recorte())
+
+    def selecionar_no_raio(self, colunas, lat, lon, raio_km):
+        return self.backend.selecionar_no_raio(colunas, lat, lon, raio_km, self.data_limite, self.trafegos, self.distancia, **self._recorte())
+
+#===========================================================================================================================================================================
+                                                                                # CONSULTAS DAS PÁGINAS
+#===========================================================================================================================================================================
+# Agregações das páginas, escritas uma vez e executadas por qualquer backend (o ranking de entregadores monta a sua
+# em utils.ranking). benchmarks/bench_consultas.py confere que os dois backends devolvem as mesmas tabelas.
+
+CONSULTAS_PAGINAS = {
+    # Visão Empresa
+    "pedidos_por_dia": consulta(["Order_Date"], ID=("count", None)),
+    "pedidos_por_trafego": consulta(["Road_traffic_density"], ID=("count", None)),
+    "pedidos_por_cidade_trafego": consulta(["City", "Road_traffic_density"], ID=("count", None)),
+    "pedidos_por_semana": consulta(["Week"], ID=("count", None)),
+    "pedidos_e_entregadores_por_semana": consulta(["Week"], ID=("count", None), Delivery_person_ID=("nunique", "Delivery_person_ID")),
+    "localizacao_mediana": consulta(
+        ["City", "Road_traffic_density"],
+        Delivery_location_latitude=("median", "Delivery_location_latitude"),
+        Delivery_location_longitude=("median", "Delivery_location_longitude"),
+    ),
+    # Visão Entregadores
+    "metricas_entregadores": consulta(
+        [],
+        maior_idade=("max", "Delivery_person_Age"), menor_idade=("min", "Delivery_person_Age"),
+        melhor_condicao=("max", "Vehicle_condition"), pior_condicao=("min", "Vehicle_condition"),
+    ),
+    "notas_por_trafego": consulta(["Road_traffic_density"], ratings_mean=("mean", "Delivery_person_Ratings"), ratings_std=("std", "Delivery_person_Ratings")),
+    "entregadores_por_faixa_etaria": consulta(["age_range"], Delivery_person_ID=("nunique", "Delivery_person_ID")),
+    # Visão Restaurantes
+    "entregadores_unicos": consulta([], Delivery_person_ID=("nunique", "Delivery_person_ID")),
+    "distancia_media": consulta([], distance=("mean", "distance")),
+    "distancia_por_cidade": consulta(["City"], distance=("mean", "distance")),
+    # nível mais fino da comparação do festival (utils.comparacao): n, média e desvio viram estatísticas suficientes
+    "tempo_por_festival": consulta(
+        ["City", "Road_traffic_density", "Type_of_order", "Festival"], n=("count", None), mean=("mean", "time_taken"), std=("std", "time_taken"),
+    ),
+    "tempo_por_cidade": consulta(["City"], time_mean=("mean", "time_taken"), time_std=("std", "time_taken")),
+    "tempo_por_cidade_e_pedido": consulta(["City", "Type_of_order"], time_mean=("mean", "time_taken"), time_std=("std", "time_taken")),
+    "tempo_por_cidade_e_trafego": consulta(["City", "Road_traffic_density"], time_mean=("mean", "time_taken"), time_std=("std", "time_taken")),
+    "percentis_por_cidade": consulta(["City"], n=("count", None), p50=("p50", "time_taken"), p90=("p90", "time_taken"), p99=("p99", "time_taken")),
+}
@@ -0,0 +1,194 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from utils.enriquecimento import semana_do_ano
+from utils.limpeza import concatenar_com_categorias
+from utils.paralelo import agregar_particionado, usar_paralelo
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Chaves do cubo diário: cada linha do cubo resume os pedidos de um dia para uma combinação destas colunas
+CHAVES_CUBO = ["Order_Date", "City", "Road_traffic_density", "Type_of_order", "Festival"]
+
+# Medidas guardadas no cubo (nome no cubo -> coluna do dataframe de pedidos)
+MEDIDAS_CUBO = {
+    "time_taken": "time_taken",
+    "ratings": "Delivery_person_Ratings",
+    "distance": "distance",
+}
+
+# Como cada coluna do cubo se combina ao juntar linhas (reagregar por menos chaves, juntar blocos ou lotes novos)
+COMBINACAO_CUBO = {"n": "sum"}
+for _medida in MEDIDAS_CUBO:
+    COMBINACAO_CUBO.update({
+        f"{_medida}_soma": "sum",
+        f"{_medida}_soma_quad": "sum",
+        f"{_medida}_min": "min",
+        f"{_medida}_max": "max",
+    })
+
+# Chaves da tabela de entregadores por dia (usada para contagens distintas exatas)
+CHAVES_ENTREGADORES = ["Order_Date", "Road_traffic_density"]
+
+# Colunas que podem ser usadas para agrupar o cubo sem serem chaves (calculadas a partir delas)
+DERIVADAS_CUBO = {
+    "Week": lambda datas: semana_do_ano(pd.Series(datas)),
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE MONTAGEM DO CUBO DIÁRIO
+
+def montar_cubo(df1, paralelo=None):
+    """ Função que materializa o cubo diário a partir dos pedidos:
+    1 - para cada medida, monta as colunas de soma, soma dos quadrados, mínimo e máximo
+    2 - agrupa uma única vez pelas chaves do cubo (só as combinações que existem)
+
+    Com contagem, soma e soma dos quadrados, médias e desvios padrões de qualquer recorte do cubo
+    são reconstruídos exatamente, sem voltar aos pedidos.
+
+    Dataframes grandes (CURRY_LINHAS_MINIMAS_PARALELO) são agregados em partições no pool de processos (utils.paralelo).
+
+    Entrada: dataframe de pedidos (limpo e enriquecido; pode já estar filtrado), paralelo (None = decidir pelo tamanho)
+    Saída: cubo indexado pelas chaves
+    """
+    if usar_paralelo(len(df1)) if paralelo is None else paralelo:
+        return agregar_particionado(df1, CHAVES_CUBO, MEDIDAS_CUBO)
+
+    colunas = {chave: df1[chave].array for chave in CHAVES_CUBO}
+    colunas["n"] = np.ones(len(df1), dtype=np.int64)
+    for medida, coluna in MEDIDAS_CUBO.items():
+        valores = df1[coluna].to_numpy(dtype=np.float64)
+        colunas[f"{medida}_soma"] = valores
+        colunas[f"{medida}_soma_quad"] = valores * valores
+        colunas[f"{medida}_min"] = valores
+        colunas[f"{medida}_max"] = valores
+
+    base = pd.DataFrame(colunas)
+    return base.groupby(CHAVES_CUBO, observed=True, sort=True).agg(COMBINACAO_CUBO)
+
+                                            # FUNÇÃO DE MONTAGEM DA TABELA DE ENTREGADORES POR DIA
+
+def montar_entregadores_dia(df1):
+    """ Função que guarda, para cada dia e tipo de tráfego, o conjunto de entregadores que trabalharam.
+    É o que permite responder Delivery_person_ID.nunique() exatamente para qualquer intervalo de datas,
+    já que contagens distintas não podem ser somadas entre dias.
+
+    Entrada: dataframe de pedidos
+    Saída: dataframe com uma linha por (dia, tráfego, entregador)
+    """
+    entregadores = df1.loc[:, CHAVES_ENTREGADORES + ["Delivery_person_ID"]].drop_duplicates()
+    entregadores["Delivery_person_ID"] = entregadores["Delivery_person_ID"].astype("category")
+    return entregadores.reset_index(drop=True)
+
+                                            # FUNÇÃO DE FILTRO DO CUBO
+
+def filtrar_cubo(cubo, data_limite, trafegos, data_inicial=None, cidades=None):
+    """ Função que aplica ao cubo os mesmos filtros da sidebar (data limite e condições de trânsito) e, para os
+    relatórios, uma data inicial e uma lista de cidades (None = sem esses filtros).
+
+    Entrada: cubo (ou perfil dos entregadores), data limite, lista de tipos de tráfego, data inicial, lista de cidades
+    Saída: cubo filtrado
+    """
+    # o filtro é avaliado nos valores distintos de cada nível do índice e levado às linhas pelos códigos
+    datas = cubo.index.names.index("Order_Date")
+    trafego = cubo.index.names.index("Road_traffic_density")
+    validas = cubo.index.levels[datas] <= data_limite
+    if data_inicial is not None:
+        validas &= cubo.index.levels[datas] >= data_inicial
+    linhas = validas[cubo.index.codes[datas]] & cubo.index.levels[trafego].isin(trafegos)[cubo.index.codes[trafego]]
+    if cidades is not None:
+        cidade = cubo.index.names.index("City")
+        linhas &= cubo.index.levels[cidade].isin(cidades)[cubo.index.codes[cidade]]
+    # com os filtros padrão (última data, todos os tráfegos) nada sai: evita copiar o cubo inteiro
+    return cubo if linhas.all() else cubo.loc[linhas]
+
+                                            # FUNÇÃO DE FILTRO DOS ENTREGADORES POR DIA
+
+def filtrar_entregadores(entregadores, data_limite, trafegos, data_inicial=None):
+    """ Função que aplica os filtros da sidebar (e a data inicial dos relatórios) à tabela de entregadores por dia.
+    """
+    linhas = (entregadores["Order_Date"] <= data_limite) & entregadores["Road_traffic_density"].isin(trafegos)
+    if data_inicial is not None:
+        linhas &= entregadores["Order_Date"] >= data_inicial
+    return entregadores.loc[linhas]
+
+                                            # FUNÇÃO DE CHAVES DE AGRUPAMENTO
+
+def chaves_agrupamento(cubo, grupos):
+    """ Função que devolve as chaves para agrupar o cubo (ou o perfil dos entregadores): níveis do índice ou derivadas da data.
+    """
+    chaves = []
+    for grupo in grupos:
+        if grupo in DERIVADAS_CUBO:
+            chaves.append(pd.Index(DERIVADAS_CUBO[grupo](cubo.index.get_level_values("Order_Date")), name=grupo))
+        else:
+            chaves.append(cubo.index.get_level_values(grupo))
+    return chaves
+
+                                            # FUNÇÃO DE RESUMO DO CUBO
+
+def resumir_cubo(cubo, grupos, medidas=("time_taken",), combinacao=COMBINACAO_CUBO):
+    """ Função que reagrega o cubo por um subconjunto das chaves e reconstrói as estatísticas:
+    1 - soma contagens, somas e somas dos quadrados; tira mínimo e máximo (só das colunas das medidas pedidas)
+    2 - média = soma / n
+    3 - desvio padrão amostral (ddof=1, igual ao pandas) = raiz((soma_quad - soma * média) / (n - 1)); NaN quando n < 2
+
+    Entrada: cubo, lista de chaves (ou derivadas, como Week) para agrupar (vazia = total geral), medidas desejadas,
+             combinação das colunas (COMBINACAO_PERFIL para o perfil dos entregadores, que tem as mesmas estatísticas)
+    Saída: dataframe com n e, para cada medida, _mean, _std, _min e _max, com as chaves como colunas
+    """
+    usadas = {"n"} | {f"{medida}_{estatistica}" for medida in medidas for estatistica in ("soma", "soma_quad", "min", "max")}
+    combinacao = {coluna: funcao for coluna, funcao in combinacao.items() if coluna in usadas}
+    if grupos:
+        agregado = cubo.groupby(chaves_agrupamento(cubo, grupos), observed=True, sort=True).agg(combinacao)
+    else:
+        agregado = cubo.agg(combinacao).to_frame().T
+
+    resumo = pd.DataFrame({"n": agregado["n"].astype(np.int64)}, index=agregado.index)
+    n = agregado["n"].to_numpy(dtype=np.float64)
+    for medida in medidas:
+        soma = agregado[f"{medida}_soma"].to_numpy()
+        media = np.divide(soma, n, out=np.full_like(soma, np.nan), where=n > 0)
+        desvio = np.clip(agregado[f"{medida}_soma_quad"].to_numpy() - soma * media, 0, None)
+        variancia = np.divide(desvio, n - 1, out=np.full_like(soma, np.nan), where=n > 1)
+        resumo[f"{medida}_mean"] = media
+        resumo[f"{medida}_std"] = np.sqrt(variancia)
+        resumo[f"{medida}_min"] = agregado[f"{medida}_min"].to_numpy()
+        resumo[f"{medida}_max"] = agregado[f"{medida}_max"].to_numpy()
+    return resumo.reset_index(drop=not grupos)
+
+                                            # FUNÇÃO DE COMBINAÇÃO DE CUBOS
+
+def combinar_cubos(*cubos):
+    """ Função que junta cubos montados sobre pedidos diferentes (blocos, lotes novos) num cubo só.
+    Como o cubo guarda somas, mínimos e máximos, basta reagregar pelas chaves: o custo depende do tamanho dos cubos,
+    não da quantidade de pedidos.
+
+    Entrada: cubos
+    Saída: cubo combinado
+    """
+    juntos = pd.concat([cubo for cubo in cubos if cubo is not None])
+    return juntos.groupby(level=CHAVES_CUBO, observed=True, sort=True).agg(COMBINACAO_CUBO)
+
+                                            # FUNÇÃO DE COMBINAÇÃO DOS ENTREGADORES POR DIA
+
+def combinar_entregadores(antigos, novos):
+    """ Função que acrescenta à tabela de entregadores por dia os pares (dia, tráfego, entregador) de pedidos novos.
+    Só os dias presentes nos pedidos novos são conferidos contra a tabela antiga para remover repetições.
+
+    Entrada: tabela antiga, tabela montada sobre os pedidos novos
+    Saída: tabela combinada
+    """
+    mesmos_dias = antigos.loc[antigos["Order_Date"].isin(novos["Order_Date"].unique())]
+    chaves = CHAVES_ENTREGADORES + ["Delivery_person_ID"]
+    ja_existentes = pd.MultiIndex.from_frame(mesmos_dias[chaves])
+    novos = novos.loc[~pd.MultiIndex.from_frame(novos[chaves]).isin(ja_existentes)]
+    return concatenar_com_categorias([antigos, novos]).reset_index(drop=True)
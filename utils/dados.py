@@ -0,0 +1,331 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils import configuracao
+from utils.cache_disco import carregar_com_cache_disco, versao_pipeline
+from utils.cache_resultados import CacheResultados, chave_valor, estado_filtros
+from utils.incremental import BaseIncremental
+from utils.ingestao import ler_e_limpar_csv
+from utils.instrumentacao import contar_linhas, trecho
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+CAMINHO_DATASET = "dataset/train.csv"
+
+# Contadores do cache compartilhado (um único dataframe por processo do servidor)
+_TRAVA_ESTATISTICAS = threading.Lock()
+_ESTATISTICAS = {"chamadas": 0, "falhas": 0}
+
+# Chave do st.session_state onde fica o instantâneo dos dados usado na execução atual da página
+_CHAVE_INSTANTANEO = "_instantaneo_dados"
+
+#===========================================================================================================================================================================                             
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                        # FUNÇÃO DE CARREGAMENTO COMPLETO VERSIONADO
+
+def carregar_versionado(caminho=CAMINHO_DATASET):
+    """
+    Função que carrega o csv principal inteiro (passando pelo cache colunar em disco quando ele ainda vale para
+    o csv e o código atuais) e grava a versão dos dados (pipeline + tamanho e mtime do csv) em df1.attrs["versao_dados"].
+
+    Entrada: caminho do csv
+    Saída: dataframe limpo
+    """
+    versao = versao_csv(caminho)
+    df1 = carregar_com_cache_disco(caminho, ler_e_limpar_csv)
+    df1.attrs["versao_dados"] = versao
+    return df1
+
+                                        # FUNÇÃO DE VERSÃO DO CSV
+
+def versao_csv(caminho=CAMINHO_DATASET):
+    """
+    Função que resume a versão dos dados lidos do disco: versão do pipeline, tamanho e mtime do csv.
+    """
+    stat = os.stat(caminho)
+    return f"{versao_pipeline()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+                                        # FUNÇÃO DA BASE COMPARTILHADA ENTRE AS PÁGINAS
+
+@st.cache_resource(show_spinner="Carregando dados...")
+def _base_compartilhada(caminho):
+    """
+    Guarda uma única base de dados por processo do servidor (utils.incremental.BaseIncremental): todas as páginas
+    e sessões recebem os mesmos objetos, sem a cópia que o st.cache_data faz a cada leitura. Por isso nada do que ela
+    devolve deve ser modificado.
+
+    A base guarda os pedidos ordenados por data (filtro de data por busca binária), o cubo diário, os entregadores
+    por dia e o índice de filtros, e incorpora pedidos novos sem refazer a limpeza do csv inteiro.
+    """
+    with _TRAVA_ESTATISTICAS:
+        _ESTATISTICAS["falhas"] += 1
+    return BaseIncremental(caminho, carregar_versionado)
+
+                                        # FUNÇÃO DO INSTANTÂNEO DA EXECUÇÃO
+
+def _instantaneo(caminho=CAMINHO_DATASET):
+    """
+    Devolve o instantâneo dos dados fixado na execução atual da página (por carregar_e_limpar_dados), para que
+    dataframe, cubo e índice lidos numa mesma execução sejam sempre da mesma versão, mesmo se outra sessão
+    atualizar a base no meio do caminho.
+    """
+    try:
+        fixado = st.session_state.get(_CHAVE_INSTANTANEO)
+    except Exception:
+        fixado = None
+    if fixado is not None and fixado[0] == caminho:
+        return fixado[1]
+    return _base_compartilhada(caminho).atual
+
+                                        # FUNÇÃO DO INSTANTÂNEO DOS DADOS
+
+def instantaneo_dados(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve o instantâneo dos dados da execução atual (utils.incremental.Instantaneo): pedidos, cubo,
+    entregadores por dia, sketches, perfil, dimensão, índices e versão, todos da mesma versão.
+
+    Entrada: caminho do csv
+    Saída: Instantaneo (somente leitura)
+    """
+    return _instantaneo(caminho)
+
+                                        # FUNÇÃO DA BASE FORA DO STREAMLIT
+
+def base_sem_streamlit(caminho=CAMINHO_DATASET):
+    """
+    Função que monta uma base de dados própria (utils.incremental.BaseIncremental), fora do st.cache_resource e do
+    st.session_state: para a linha de comando, que roda sem servidor nem sessão. O cache em disco continua valendo.
+
+    Entrada: caminho do csv
+    Saída: BaseIncremental
+    """
+    return BaseIncremental(caminho, carregar_versionado)
+
+                                        # FUNÇÃO DE CARREGAMENTO E LIMPEZA COM CACHE
+
+def carregar_e_limpar_dados(caminho=CAMINHO_DATASET):
+    """
+    Função que carrega, limpa e padroniza os dados do arquivo csv principal, guardando o resultado num cache
+    único do processo para que as três páginas leiam o mesmo dataframe.
+
+    1 - Conta a chamada
+    2 - Na primeira chamada do processo, lê e limpa o csv; nas seguintes, usa a base já em memória e, no máximo
+        a cada CURRY_INTERVALO_ATUALIZACAO_S segundos, incorpora pedidos novos (utils.incremental)
+    3 - fixa o instantâneo dos dados para o resto da execução da página
+    4 - retorna o dataset limpo e padronizado (somente leitura)
+
+    Entrada: caminho do csv
+    Saída: dataframe limpo
+    """
+    with _TRAVA_ESTATISTICAS:
+        _ESTATISTICAS["chamadas"] += 1
+    with trecho("carregar_e_limpar_dados", "carga") as span:
+        base = _base_compartilhada(caminho)
+        base.atualizar_se_necessario()
+        instantaneo = base.atual
+        span.linhas_saida = len(instantaneo.df)
+    try:
+        st.session_state[_CHAVE_INSTANTANEO] = (caminho, instantaneo)
+    except Exception:
+        pass
+    return instantaneo.df
+
+                                        # FUNÇÃO DE ATUALIZAÇÃO MANUAL
+
+def atualizar_dados(caminho=CAMINHO_DATASET):
+    """
+    Função que procura pedidos novos agora (acréscimos ao csv ou lotes novos) e os incorpora à base compartilhada.
+
+    Entrada: caminho do csv
+    Saída: quantidade de pedidos novos (-1 quando o csv foi reescrito e tudo foi recarregado)
+    """
+    return _base_compartilhada(caminho).atualizar()
+
+                                        # FUNÇÃO DO ÍNDICE DE FILTROS COMPARTILHADO
+
+def carregar_indice_filtro(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve o índice de filtros (datas ordenadas + bitmaps por categoria) do dataframe compartilhado.
+
+    Entrada: caminho do csv
+    Saída: IndiceFiltro
+    """
+    return _instantaneo(caminho).indice
+
+                                        # FUNÇÃO DO ÍNDICE ESPACIAL COMPARTILHADO
+
+def carregar_indice_espacial(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve o índice espacial (utils.espacial) do dataframe compartilhado: KD-trees dos locais de entrega
+    e dos restaurantes, para buscas por raio e vizinhos mais próximos.
+
+    Entrada: caminho do csv
+    Saída: IndiceEspacial
+    """
+    return _instantaneo(caminho).espacial
+
+                                        # FUNÇÃO DO CUBO DIÁRIO COMPARTILHADO
+
+def carregar_cubo(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve o cubo diário (utils.cubo) montado sobre o dataframe compartilhado.
+    Os gráficos leem desse cubo, com poucos milhares de linhas, em vez de reagrupar todos os pedidos a cada interação.
+
+    Entrada: caminho do csv
+    Saída: cubo diário (somente leitura)
+    """
+    return _instantaneo(caminho).cubo
+
+                                        # FUNÇÃO DOS ENTREGADORES POR DIA COMPARTILHADOS
+
+def carregar_entregadores_dia(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve a tabela de entregadores por dia e tráfego (contagens distintas exatas).
+
+    Entrada: caminho do csv
+    Saída: tabela de entregadores por dia (somente leitura)
+    """
+    return _instantaneo(caminho).entregadores
+
+                                        # FUNÇÃO DOS SKETCHES DIÁRIOS COMPARTILHADOS
+
+def carregar_sketches(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve os sketches diários (utils.sketches): HyperLogLog dos entregadores e histogramas
+    logarítmicos do tempo de entrega por dia, cidade, tráfego e faixa etária.
+
+    Entrada: caminho do csv
+    Saída: SketchesDiarios (somente leitura)
+    """
+    return _instantaneo(caminho).sketches
+
+                                        # FUNÇÃO DO PERFIL DOS ENTREGADORES COMPARTILHADO
+
+def carregar_perfil_entregadores(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve o perfil dos entregadores (utils.perfil_entregadores): estatísticas de tempo, nota, idade e
+    condição do veículo e pedidos por faixa etária, por entregador, dia, tráfego e cidade.
+
+    Entrada: caminho do csv
+    Saída: perfil dos entregadores (somente leitura)
+    """
+    return _instantaneo(caminho).perfil
+
+                                        # FUNÇÃO DA DIMENSÃO DOS ENTREGADORES COMPARTILHADA
+
+def carregar_dimensao_entregadores(caminho=CAMINHO_DATASET):
+    """
+    Função que devolve a dimensão dos entregadores (utils.perfil_entregadores.DimensaoEntregadores): uma linha por
+    entregador, com primeiro e último dia, veículo e as estatísticas do perfil por tráfego e por cidade.
+
+    Entrada: caminho do csv
+    Saída: DimensaoEntregadores (somente leitura)
+    """
+    return _instantaneo(caminho).dimensao
+
+                                        # FUNÇÃO DO CACHE DE RESULTADOS COMPARTILHADO
+
+@st.cache_resource(show_spinner=False)
+def cache_resultados():
+    """
+    Função que cria, uma vez por processo, o cache LRU de resultados das visualizações (utils.cache_resultados).
+    Todas as sessões do servidor usam a mesma instância.
+    """
+    return CacheResultados(configuracao.LIMITE_CACHE_RESULTADOS_MB)
+
+                                        # FUNÇÃO DE MEMORIZAÇÃO DAS VISUALIZAÇÕES
+
+def memorizar(funcao, data_limite, trafegos, *args, **extras):
+    """
+    Função que chama uma função de visualização passando pelo cache de resultados.
+
+    1 - monta a chave (data limite, conjunto de tráfegos, outros filtros, nome da função e os argumentos posicionais):
+        as ConsultasFiltradas entram pela versão dos dados do backend que consultam e pelos filtros que carregam
+        (chave_valor), inclusive as de um método ligado como consultas.agregar, e o resto pelo valor; um argumento que
+        não pode entrar na chave é um TypeError
+    2 - num acerto devolve o resultado guardado; numa falha chama funcao(*args) e guarda o resultado
+    3 - mede a chamada num span da etapa de visualização (utils.instrumentacao), anotando acerto ou falha no cache
+
+    Entrada: função de visualização, data limite, tráfegos selecionados, argumentos da função, outros filtros nomeados
+             (só entram na chave; "consulta" também dá nome ao span)
+    Saída: resultado da função (figura, tabela, ...)
+    """
+    chave = (
+        estado_filtros(data_limite, trafegos, **extras),
+        f"{funcao.__module__}.{funcao.__qualname__}",
+        chave_valor(getattr(funcao, "__self__", None)),
+        chave_valor(args),
+    )
+    with trecho(extras.get("consulta", funcao.__qualname__), "visualizacao", cache="acerto") as span:
+        def calcular():
+            span.anotar(cache="falha")
+            return funcao(*args)
+
+        resultado = cache_resultados().obter(chave, calcular)
+        span.linhas_saida = contar_linhas(resultado)
+    return resultado
+
+                                        # FUNÇÃO DE ESTATÍSTICAS DO CACHE
+
+def estatisticas_cache(caminho=CAMINHO_DATASET):
+    """
+    Função que resume o estado do cache compartilhado.
+
+    1 - Lê os contadores de chamadas e de falhas (carregamentos de fato)
+    2 - Mede o tamanho em memória do dataframe compartilhado
+    3 - Retorna o id do objeto para conferir que todas as páginas usam a mesma cópia
+
+    Entrada: caminho do csv
+    Saída: dicionário com acertos, falhas, memória (MB), linhas e id do dataframe
+    """
+    base = _base_compartilhada(caminho)
+    df1 = base.atual.df
+    with _TRAVA_ESTATISTICAS:
+        chamadas = _ESTATISTICAS["chamadas"]
+        falhas = _ESTATISTICAS["falhas"]
+    return {
+        "acertos": chamadas - falhas,
+        "falhas": falhas,
+        "memoria_mb": df1.memory_usage(deep=True).sum() / 1024 ** 2,
+        "linhas": len(df1),
+        "id_dataframe": id(df1),
+        "atualizacoes": base.atualizacoes,
+        "linhas_incrementais": base.linhas_incrementais,
+    }
+
+                                        # FUNÇÃO DO PAINEL DE ESTATÍSTICAS NA SIDEBAR
+
+def mostrar_estatisticas_cache():
+    """
+    Função que mostra, num expander fechado da sidebar, as estatísticas do cache compartilhado e do cache de resultados.
+    Com o backend DuckDB não há base em memória: o painel só mostra o cache de resultados.
+    """
+    with st.sidebar.expander("Cache de dados", expanded=False):
+        if configuracao.BACKEND_CONSULTAS == "duckdb":
+            st.caption("Consultas no DuckDB, direto no parquet em disco (pedidos fora da memória do servidor)")
+        else:
+            estatisticas = estatisticas_cache()
+            st.caption(f"Memória: {estatisticas['memoria_mb']:.1f} MB ({estatisticas['linhas']:,} linhas)")
+            st.caption(f"Acertos: {estatisticas['acertos']} | Falhas: {estatisticas['falhas']}")
+            st.caption(f"Id do dataframe: {estatisticas['id_dataframe']}")
+            st.caption(f"Atualizações incrementais: {estatisticas['atualizacoes']} "
+                       f"(+{estatisticas['linhas_incrementais']:,} pedidos)")
+            if st.button("Procurar pedidos novos"):
+                novos = atualizar_dados()
+                st.caption("csv reescrito: dados recarregados" if novos < 0 else f"{novos:,} pedidos novos incorporados")
+
+        resultados = cache_resultados().estatisticas()
+        st.caption(f"Cache de resultados: {resultados['taxa_acerto']:.0%} de acerto "
+                   f"({resultados['acertos']} acertos / {resultados['falhas']} falhas)")
+        st.caption(f"{resultados['itens']} itens, {resultados['memoria_mb']:.1f} de {resultados['limite_mb']:.0f} MB, "
+                   f"{resultados['remocoes']} removidos por LRU")
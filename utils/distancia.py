@@ -0,0 +1,62 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+from haversine import Unit
+from haversine.haversine import get_avg_earth_radius
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+UNIDADES = {
+    "km": Unit.KILOMETERS,
+    "mi": Unit.MILES,
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE DISTÂNCIA HAVERSINE VETORIZADA
+
+def haversine_vetorizado(lat1, lon1, lat2, lon2, unidade="km"):
+    """ Função que calcula a distância haversine entre pares de pontos de uma vez só com NumPy:
+    1 - converte as coordenadas (em graus) para radianos
+    2 - aplica a fórmula de haversine sobre os vetores inteiros, sem laço em Python
+    3 - multiplica pelo raio médio da Terra na unidade escolhida (o mesmo usado pelo pacote haversine)
+
+    Entrada: vetores (ou colunas) de latitude e longitude de origem e destino, unidade ("km" ou "mi")
+    Saída: vetor NumPy de distâncias
+    """
+    if unidade not in UNIDADES:
+        raise ValueError(f"Unidade inválida: {unidade}. Use uma de {list(UNIDADES)}")
+
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))
+
+    d = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+    return 2 * get_avg_earth_radius(UNIDADES[unidade]) * np.arcsin(np.sqrt(d))
+
+                                            # FUNÇÃO DE DISTÂNCIA RESTAURANTE -> LOCAL DE ENTREGA
+
+def distancia_entrega(df1, unidade="km"):
+    """ Função que calcula a distância entre o restaurante e o local de entrega de todos os pedidos:
+    1 - lê as quatro colunas de coordenadas do dataframe
+    2 - aplica o haversine vetorizado sobre a coluna inteira
+    3 - retorna uma série alinhada ao índice do dataframe
+
+    Entrada: dataframe, unidade ("km" ou "mi")
+    Saída: série de distâncias
+    """
+    distancia = haversine_vetorizado(
+        df1["Restaurant_latitude"].to_numpy(),
+        df1["Restaurant_longitude"].to_numpy(),
+        df1["Delivery_location_latitude"].to_numpy(),
+        df1["Delivery_location_longitude"].to_numpy(),
+        unidade=unidade,
+    )
+    return pd.Series(distancia, index=df1.index, name="distance")
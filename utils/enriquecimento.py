@@ -0,0 +1,57 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from utils.distancia import distancia_entrega
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+FAIXAS_IDADE = [0, 24, 30, 34, float('inf')]
+ROTULOS_IDADE = ["Até 24", "25-30", "31-34", "35+"]
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE SEMANA DO ANO
+
+def semana_do_ano(datas):
+    """ Função que calcula a semana do ano com a mesma regra do strftime('%U') (semanas começando no domingo),
+    mas com aritmética inteira em vez de formatar texto linha a linha.
+
+    Entrada: série de datas
+    Saída: vetor NumPy de semanas (uint8)
+    """
+    dia_do_ano = datas.dt.dayofyear.to_numpy() - 1
+    dia_da_semana = (datas.dt.dayofweek.to_numpy() + 1) % 7
+    return ((dia_do_ano + 7 - dia_da_semana) // 7).astype(np.uint8)
+
+                                            # FUNÇÃO DE ENRIQUECIMENTO DO DATAFRAME
+
+def enriquecer_dados(df1):
+    """ Função que calcula, uma única vez no carregamento, as colunas derivadas usadas pelas páginas:
+    1 - Week: semana do ano (mesma regra do strftime('%U'))
+    2 - age_range: faixa etária do entregador
+    3 - distance: distância em km entre restaurante e local de entrega
+    4 - prep_time: minutos entre o pedido e a coleta (Time_Order_picked - Time_Orderd), considerando a virada do dia
+    5 - order_hour: hora do dia em que o pedido foi feito
+
+    As colunas são gravadas com tipos compactos (inteiros pequenos, category e float32) para ocupar pouco espaço no cache.
+
+    Entrada: dataframe limpo e padronizado (horários em segundos desde a meia-noite)
+    Saída: dataframe com as colunas derivadas
+    """
+    df_enriquecido = df1.copy()
+    df_enriquecido["Week"] = semana_do_ano(df_enriquecido["Order_Date"])
+    df_enriquecido["age_range"] = pd.cut(df_enriquecido["Delivery_person_Age"], bins=FAIXAS_IDADE, labels=ROTULOS_IDADE, right=True)
+    df_enriquecido["distance"] = distancia_entrega(df_enriquecido).astype(np.float32)
+
+    pedido = df_enriquecido["Time_Orderd"].to_numpy()
+    coleta = df_enriquecido["Time_Order_picked"].to_numpy()
+    df_enriquecido["prep_time"] = (((coleta - pedido) % 86400) // 60).astype(np.int16)
+    df_enriquecido["order_hour"] = (pedido // 3600).astype(np.uint8)
+    return df_enriquecido
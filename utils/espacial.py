@@ -0,0 +1,138 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import threading
+
+import numpy as np
+import pandas as pd
+from haversine import Unit
+from haversine.haversine import get_avg_earth_radius
+from scipy.spatial import cKDTree
+
+from utils.geo import COLUNAS_PONTOS
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Raio médio da Terra em km (o mesmo do haversine usado na coluna distance)
+RAIO_TERRA_KM = get_avg_earth_radius(Unit.KILOMETERS)
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE CONVERSÃO PARA VETORES UNITÁRIOS
+
+def vetores_unitarios(lat, lon):
+    """ Função que leva coordenadas (graus) para pontos na esfera unitária em 3D. Nesse espaço, a distância em linha
+    reta (corda) cresce junto com a distância sobre a superfície, então uma KD-tree euclidiana responde buscas por raio
+    e vizinhos mais próximos exatamente como o haversine, sem a distorção de usar graus como coordenadas planas.
+
+    Entrada: vetores de latitude e longitude
+    Saída: matriz (n, 3)
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+                                            # FUNÇÕES DE CONVERSÃO ENTRE KM E CORDA
+
+def corda(raio_km):
+    """ Função que converte uma distância sobre a superfície (km) na corda equivalente da esfera unitária.
+    """
+    return 2 * np.sin(np.minimum(np.asarray(raio_km, dtype=np.float64) / RAIO_TERRA_KM, np.pi) / 2)
+
+
+def arco_km(cordas):
+    """ Função que converte cordas da esfera unitária de volta em km sobre a superfície (igual ao haversine).
+    """
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.clip(np.asarray(cordas, dtype=np.float64) / 2, 0, 1))
+
+                                            # FUNÇÃO DA CAIXA ENVOLVENTE
+
+def caixa_envolvente(lat, lon, raio_km):
+    """ Função que devolve a menor caixa de latitude/longitude (graus) que contém o círculo de `raio_km` em volta do ponto.
+    Serve de pré-filtro para quem não tem a árvore (o DuckDB filtra a caixa no WHERE e o haversine decide o resto).
+
+    Entrada: latitude, longitude, raio em km
+    Saída: (lat mínima, lat máxima, lon mínima, lon máxima)
+    """
+    angulo = min(raio_km / RAIO_TERRA_KM, np.pi)
+    delta_lat = np.degrees(angulo)
+    seno = np.sin(angulo) / max(np.cos(np.radians(lat)), 1e-12)
+    delta_lon = 180.0 if seno >= 1 else np.degrees(np.arcsin(seno))
+    return lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon
+
+                                            # FUNÇÃO DE COORDENADAS VÁLIDAS
+
+def coordenadas_validas(lat, lon):
+    """ Função que marca as coordenadas utilizáveis (não nulas e diferentes de 0, 0, que o dataset usa para desconhecida).
+    """
+    return np.isfinite(lat) & np.isfinite(lon) & ((lat != 0) | (lon != 0))
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class IndiceEspacial:
+    """ Índice espacial dos pedidos: KD-trees (scipy cKDTree) sobre os vetores unitários
+    - dos locais de entrega, uma posição de linha por ponto: "todas as entregas a até 3 km deste ponto"
+    - dos restaurantes distintos, com a quantidade de pedidos de cada um: "os k restaurantes mais próximos"
+
+    As árvores são montadas na primeira busca (O(n log n), uma vez por versão dos dados) e cada busca custa
+    O(log n + resultado), em vez de calcular o haversine para todos os pedidos.
+    """
+
+    def __init__(self, df1):
+        self._df1 = df1
+        self._trava = threading.Lock()
+        self._entregas = None
+        self._restaurantes = None
+
+    def _arvore_entregas(self):
+        with self._trava:
+            if self._entregas is None:
+                coluna_lat, coluna_lon = COLUNAS_PONTOS["Entregas"]
+                lat = self._df1[coluna_lat].to_numpy(dtype=np.float64)
+                lon = self._df1[coluna_lon].to_numpy(dtype=np.float64)
+                posicoes = np.flatnonzero(coordenadas_validas(lat, lon))
+                self._entregas = (cKDTree(vetores_unitarios(lat[posicoes], lon[posicoes])), posicoes)
+            return self._entregas
+
+    def _arvore_restaurantes(self):
+        with self._trava:
+            if self._restaurantes is None:
+                colunas = list(COLUNAS_PONTOS["Restaurantes"])
+                pontos = self._df1.loc[:, colunas]
+                pontos = pontos.loc[coordenadas_validas(pontos[colunas[0]].to_numpy(), pontos[colunas[1]].to_numpy())]
+                restaurantes = pontos.groupby(colunas, sort=True).size().rename("pedidos").reset_index()
+                restaurantes = restaurantes.sort_values(["pedidos"] + colunas, ascending=[False, True, True], kind="stable").reset_index(drop=True)
+                arvore = cKDTree(vetores_unitarios(restaurantes[colunas[0]], restaurantes[colunas[1]]))
+                self._restaurantes = (arvore, restaurantes)
+            return self._restaurantes
+
+    def restaurantes(self):
+        """ Restaurantes distintos (coordenadas válidas) com a quantidade de pedidos, do mais movimentado ao menos.
+        """
+        return self._arvore_restaurantes()[1]
+
+    def entregas_no_raio(self, lat, lon, raio_km):
+        """ Posições (crescentes) das linhas cujo local de entrega está a até `raio_km` do ponto.
+        """
+        arvore, posicoes = self._arvore_entregas()
+        encontrados = arvore.query_ball_point(vetores_unitarios([lat], [lon])[0], float(corda(raio_km)))
+        return np.sort(posicoes[np.asarray(encontrados, dtype=np.int64)])
+
+    def restaurantes_proximos(self, lat, lon, k=5):
+        """ Os k restaurantes mais próximos do ponto, com a distância em km e a quantidade de pedidos de cada um.
+        """
+        arvore, restaurantes = self._arvore_restaurantes()
+        k = min(k, len(restaurantes))
+        if k <= 0:
+            return restaurantes.iloc[:0].assign(distancia_km=np.empty(0))
+        cordas, indices = arvore.query(vetores_unitarios([lat], [lon])[0], k=[posicao + 1 for posicao in range(k)])
+        proximos = restaurantes.iloc[np.asarray(indices)].reset_index(drop=True)
+        proximos.insert(2, "distancia_km", arco_km(cordas))
+        return proximos
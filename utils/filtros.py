@@ -0,0 +1,162 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Colunas category que ganham bitmaps por valor (qualquer uma pode virar filtro na sidebar)
+DIMENSOES_FILTRO = ["Road_traffic_density", "City", "Weatherconditions", "Type_of_vehicle", "Type_of_order", "Festival"]
+
+# Colunas numéricas filtradas por faixa (mínimo, máximo), com as posições das linhas ordenadas pelo valor
+COLUNAS_INTERVALO = ["distance"]
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE ORDENAÇÃO POR DATA
+
+def ordenar_por_data(df1):
+    """ Função que deixa o dataframe ordenado por Order_Date (ordenação estável), pré-requisito do índice de filtros.
+    Não copia nada quando o dataframe já está ordenado.
+
+    Entrada: dataframe
+    Saída: dataframe ordenado por data
+    """
+    if df1["Order_Date"].is_monotonic_increasing:
+        return df1
+    return df1.sort_values("Order_Date", kind="stable")
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class IndiceFiltro:
+    """ Índice para os filtros da sidebar sobre um dataframe ordenado por data:
+
+    - data limite: busca binária (searchsorted) nas datas ordenadas -> as linhas válidas são um prefixo [0, k)
+      (com uma data inicial, outra busca binária corta o começo: um intervalo [i, k))
+    - colunas category: um bitmap (bits empacotados, 1 bit por linha) por valor; selecionar vários valores é um OU
+      dos bitmaps e combinar colunas é um E, feitos só sobre os bytes do prefixo
+    - colunas numéricas (distância): valores ordenados e a posição de cada um; uma faixa é uma busca binária em cada
+      ponta, e só as linhas dentro dela são marcadas
+
+    O resultado são posições de linha (ou um slice, quando só a data filtra), nunca uma cópia do dataframe.
+    """
+
+    def __init__(self, df1, dimensoes=DIMENSOES_FILTRO, intervalos=COLUNAS_INTERVALO):
+        if not df1["Order_Date"].is_monotonic_increasing:
+            raise ValueError("O índice de filtros exige o dataframe ordenado por Order_Date (use ordenar_por_data)")
+        self.linhas = len(df1)
+        self.datas = df1["Order_Date"].to_numpy()
+        self.bitmaps = {}
+        for dimensao in dimensoes:
+            if dimensao not in df1.columns:
+                continue
+            coluna = df1[dimensao].astype("category")
+            codigos = coluna.cat.codes.to_numpy()
+            self.bitmaps[dimensao] = {
+                valor: np.packbits(codigos == codigo)
+                for codigo, valor in enumerate(coluna.cat.categories)
+            }
+        self.ordens = {}
+        self.ordenados = {}
+        for coluna in intervalos:
+            if coluna not in df1.columns:
+                continue
+            valores = df1[coluna].to_numpy()
+            ordem = np.argsort(valores, kind="stable")
+            self.ordens[coluna] = ordem.astype(np.int32) if self.linhas < 2 ** 31 else ordem
+            self.ordenados[coluna] = valores[ordem]
+
+    def valores(self, dimensao):
+        """ Devolve os valores possíveis de uma dimensão (para montar as opções da sidebar).
+        """
+        return list(self.bitmaps[dimensao])
+
+    def limites(self, coluna):
+        """ Menor e maior valor de uma coluna numérica (para montar os limites do slider da sidebar).
+        """
+        ordenados = self.ordenados[coluna]
+        return (ordenados[0], ordenados[-1]) if len(ordenados) else (0.0, 0.0)
+
+    def limite_data(self, data_limite):
+        """ Quantidade de linhas com Order_Date <= data_limite (busca binária).
+        """
+        if data_limite is None:
+            return self.linhas
+        return int(np.searchsorted(self.datas, np.datetime64(pd.Timestamp(data_limite)), side="right"))
+
+    def inicio_data(self, data_inicial):
+        """ Quantidade de linhas com Order_Date < data_inicial (busca binária): a primeira linha do intervalo de datas.
+        """
+        if data_inicial is None:
+            return 0
+        return int(np.searchsorted(self.datas, np.datetime64(pd.Timestamp(data_inicial)), side="left"))
+
+    def _bitmap_dimensao(self, dimensao, selecionados, n_bytes):
+        bitmaps = self.bitmaps[dimensao]
+        resultado = np.zeros(n_bytes, dtype=np.uint8)
+        for valor in selecionados:
+            if valor in bitmaps:
+                np.bitwise_or(resultado, bitmaps[valor][:n_bytes], out=resultado)
+        return resultado
+
+    def _bitmap_intervalo(self, coluna, minimo, maximo, k):
+        ordenados = self.ordenados[coluna]
+        # limites em float64: a coluna (float32) é comparada promovida, como no SQL, e não com o limite arredondado
+        inicio = np.searchsorted(ordenados, np.float64(minimo), side="left")
+        fim = np.searchsorted(ordenados, np.float64(maximo), side="right")
+        dentro = self.ordens[coluna][inicio:fim]
+        marcadas = np.zeros(k, dtype=bool)
+        marcadas[dentro[dentro < k]] = True
+        return np.packbits(marcadas)
+
+    def posicoes(self, data_limite=None, selecoes=None, intervalos=None, data_inicial=None):
+        """ Calcula as linhas que passam nos filtros:
+        1 - a data limite vira um prefixo [0, k) por busca binária (e a data inicial, o começo i do intervalo [i, k))
+        2 - dimensões com todos os valores selecionados e faixas que cobrem todos os valores são ignoradas
+        3 - para as demais, OU dos bitmaps dos valores selecionados, bitmap das linhas dentro de cada faixa
+            e E entre tudo, só no prefixo
+
+        Entrada: data limite (ou None), dicionário {coluna: valores selecionados}, dicionário {coluna: (mínimo, máximo)},
+                 data inicial (ou None)
+        Saída: slice(i, k) quando só as datas filtram; senão vetor de posições (int64)
+        """
+        k = self.limite_data(data_limite)
+        i = min(self.inicio_data(data_inicial), k)
+        ativas = {
+            dimensao: selecionados for dimensao, selecionados in (selecoes or {}).items()
+            if set(self.bitmaps[dimensao]) - set(selecionados)
+        }
+        faixas = {}
+        for coluna, (minimo, maximo) in (intervalos or {}).items():
+            menor, maior = self.limites(coluna)
+            if minimo > menor or maximo < maior:
+                faixas[coluna] = (minimo, maximo)
+        if not ativas and not faixas:
+            return slice(i, k)
+
+        n_bytes = (k + 7) // 8
+        mascara = np.full(n_bytes, 0xFF, dtype=np.uint8)
+        for dimensao, selecionados in ativas.items():
+            np.bitwise_and(mascara, self._bitmap_dimensao(dimensao, selecionados, n_bytes), out=mascara)
+        for coluna, (minimo, maximo) in faixas.items():
+            np.bitwise_and(mascara, self._bitmap_intervalo(coluna, minimo, maximo, k), out=mascara)
+        posicoes = np.flatnonzero(np.unpackbits(mascara, count=k))
+        return posicoes[np.searchsorted(posicoes, i):] if i else posicoes
+
+    def filtrar(self, df1, data_limite=None, selecoes=None, intervalos=None, data_inicial=None):
+        """ Aplica os filtros ao dataframe indexado: um slice (iloc[i:k]) quando só as datas filtram, senão um take pelas posições.
+
+        Entrada: o mesmo dataframe usado para montar o índice, data limite, dicionário {coluna: valores selecionados},
+                 dicionário {coluna: (mínimo, máximo)}, data inicial
+        Saída: dataframe filtrado
+        """
+        if len(df1) != self.linhas:
+            raise ValueError("O dataframe não é o mesmo usado para montar o índice de filtros")
+        return df1.iloc[self.posicoes(data_limite, selecoes, intervalos, data_inicial)]
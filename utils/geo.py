@@ -0,0 +1,179 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import folium
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+from folium.plugins import HeatMap
+
+from utils import configuracao
+from utils.instrumentacao import trecho
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Colunas de coordenadas de cada tipo de ponto
+COLUNAS_PONTOS = {
+    "Entregas": ("Delivery_location_latitude", "Delivery_location_longitude"),
+    "Restaurantes": ("Restaurant_latitude", "Restaurant_longitude"),
+}
+
+# Tamanhos de célula oferecidos na página (km)
+OPCOES_TAMANHO_CELULA_KM = [0.5, 1.0, 2.0, 5.0, 10.0, 25.0]
+
+# Quilômetros por grau de latitude (e de longitude no equador)
+KM_POR_GRAU_LAT = 110.574
+KM_POR_GRAU_LON = 111.320
+
+# Deslocamento usado para juntar as duas coordenadas inteiras de uma célula numa chave int64 única
+# (cobre até um milhão de células para cada lado da origem, o suficiente para o planeta inteiro com células de 50 m)
+_DESLOCAMENTO_CHAVE = 1 << 20
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE PONTOS VÁLIDOS
+
+def pontos_validos(df1, pontos="Entregas"):
+    """ Função que separa latitude e longitude de um tipo de ponto, descartando coordenadas nulas ou zeradas
+    (o dataset usa 0 para localização desconhecida).
+
+    Entrada: dataframe, "Entregas" ou "Restaurantes"
+    Saída: vetores de latitude e longitude (float64)
+    """
+    coluna_lat, coluna_lon = COLUNAS_PONTOS[pontos]
+    lat = df1[coluna_lat].to_numpy(dtype=np.float64)
+    lon = df1[coluna_lon].to_numpy(dtype=np.float64)
+    validos = np.isfinite(lat) & np.isfinite(lon) & ((lat != 0) | (lon != 0))
+    return lat[validos], lon[validos]
+
+                                            # FUNÇÃO DE AGREGAÇÃO EM CÉLULAS
+
+def agregar_celulas(lat, lon, tamanho_km=None, forma="hex"):
+    """ Função que agrupa pontos em células de tamanho fixo no servidor, toda vetorizada em NumPy:
+    1 - projeta as coordenadas em km (equiretangular, com o cosseno da latitude média; a distorção dentro do país
+        é pequena perto do tamanho das células)
+    2 - calcula a célula de cada ponto: quadrado (piso de x/tamanho) ou hexágono (coordenadas axiais arredondadas
+        pelo arredondamento cúbico)
+    3 - conta os pontos por célula (factorize de uma chave int64 + bincount) e devolve o centro de cada célula
+
+    Entrada: vetores de latitude e longitude, lado da célula em km, "hex" ou "grade"
+    Saída: dataframe com lat e lon do centro e a quantidade de pontos de cada célula (maiores primeiro)
+    """
+    tamanho_km = tamanho_km or configuracao.TAMANHO_CELULA_KM
+    if len(lat) == 0:
+        return pd.DataFrame({"lat": [], "lon": [], "pedidos": []})
+
+    cosseno = np.cos(np.radians(lat.mean()))
+    x = lon * (KM_POR_GRAU_LON * cosseno)
+    y = lat * KM_POR_GRAU_LAT
+
+    if forma == "hex":
+        q_frac = (np.sqrt(3) / 3 * x - y / 3) / tamanho_km
+        r_frac = (2 / 3 * y) / tamanho_km
+        s_frac = -q_frac - r_frac
+        q, r, s = np.rint(q_frac), np.rint(r_frac), np.rint(s_frac)
+        dq, dr, ds = np.abs(q - q_frac), np.abs(r - r_frac), np.abs(s - s_frac)
+        corrigir_q = (dq > dr) & (dq > ds)
+        corrigir_r = ~corrigir_q & (dr > ds)
+        q = np.where(corrigir_q, -r - s, q)
+        r = np.where(corrigir_r, -q - s, r)
+        a, b = q.astype(np.int64), r.astype(np.int64)
+    else:
+        a = np.floor(x / tamanho_km).astype(np.int64)
+        b = np.floor(y / tamanho_km).astype(np.int64)
+
+    inverso, chaves = pd.factorize((a + _DESLOCAMENTO_CHAVE) * (2 * _DESLOCAMENTO_CHAVE) + (b + _DESLOCAMENTO_CHAVE))
+    contagens = np.bincount(inverso, minlength=len(chaves))
+    a = chaves // (2 * _DESLOCAMENTO_CHAVE) - _DESLOCAMENTO_CHAVE
+    b = chaves % (2 * _DESLOCAMENTO_CHAVE) - _DESLOCAMENTO_CHAVE
+
+    if forma == "hex":
+        centro_x = tamanho_km * np.sqrt(3) * (a + b / 2)
+        centro_y = tamanho_km * 1.5 * b
+    else:
+        centro_x = (a + 0.5) * tamanho_km
+        centro_y = (b + 0.5) * tamanho_km
+
+    celulas = pd.DataFrame({
+        "lat": centro_y / KM_POR_GRAU_LAT,
+        "lon": centro_x / (KM_POR_GRAU_LON * cosseno),
+        "pedidos": contagens,
+    })
+    return celulas.sort_values("pedidos", ascending=False, kind="stable").reset_index(drop=True)
+
+                                            # FUNÇÃO DE LIMITE DE CÉLULAS
+
+def limitar_celulas(celulas, limite=None):
+    """ Função que mantém só as células com mais pontos (as células já vêm ordenadas), para o navegador receber
+    no máximo CURRY_LIMITE_CELULAS_MAPA elementos.
+    """
+    limite = limite or configuracao.LIMITE_CELULAS_MAPA
+    return celulas.iloc[:limite]
+
+                                            # FUNÇÃO DE HTML DE UM MAPA FOLIUM
+
+def html_folium(mapa, altura=600):
+    """ Função que transforma um mapa folium no HTML que o streamlit mostra (o mesmo que o folium_static gera).
+    Guardar esse texto no cache evita montar e serializar o mapa de novo a cada rerun.
+    """
+    with trecho("html_folium", "visualizacao") as span:
+        html = folium.Figure(height=altura).add_child(mapa).render()
+        span.anotar(bytes=len(html))
+    return html
+
+                                            # FUNÇÃO DE MAPA FOLIUM DAS CÉLULAS
+
+def mapa_celulas_folium(celulas, modo="Mapa de calor", tamanho_km=None):
+    """ Função que desenha as células agregadas num mapa folium:
+    1 - "Mapa de calor": uma camada HeatMap com um ponto por célula, pesado pela quantidade de pedidos
+    2 - "Agrupamentos": um círculo por célula, com raio proporcional à raiz da contagem e a contagem no tooltip
+    3 - enquadra o mapa na extensão das células
+
+    Entrada: células (agregar_celulas), modo, tamanho da célula em km (para o texto do tooltip)
+    Saída: mapa folium
+    """
+    tamanho_km = tamanho_km or configuracao.TAMANHO_CELULA_KM
+    mapa = folium.Map()
+    mapa.fit_bounds([[celulas["lat"].min(), celulas["lon"].min()], [celulas["lat"].max(), celulas["lon"].max()]])
+    maximo = celulas["pedidos"].max()
+
+    if modo == "Mapa de calor":
+        pesos = celulas["pedidos"] / maximo
+        HeatMap(np.column_stack([celulas["lat"], celulas["lon"], pesos]).tolist(), radius=12, blur=10, min_opacity=0.3).add_to(mapa)
+    else:
+        for lat, lon, pedidos in zip(celulas["lat"], celulas["lon"], celulas["pedidos"]):
+            folium.CircleMarker(
+                location=[lat, lon],
+                radius=float(3 + 17 * np.sqrt(pedidos / maximo)),
+                color="#d9480f",
+                fill=True,
+                fill_opacity=0.6,
+                weight=1,
+                tooltip=f"{pedidos:,} pedidos (célula de {tamanho_km:g} km)",
+            ).add_to(mapa)
+    return mapa
+
+                                            # FUNÇÃO DE MAPA PYDECK DAS CÉLULAS
+
+def mapa_celulas_pydeck(celulas, modo="Mapa de calor", tamanho_km=None):
+    """ Função que desenha as mesmas células com pydeck (WebGL): HeatmapLayer pesado pela contagem ou um
+    ScatterplotLayer com um círculo por célula. Só as células vão para o navegador, nunca os pedidos.
+
+    Entrada: células (agregar_celulas), modo, tamanho da célula em km
+    Saída: pydeck.Deck
+    """
+    tamanho_km = tamanho_km or configuracao.TAMANHO_CELULA_KM
+    dados = celulas.assign(raio=tamanho_km * 500 * np.sqrt(celulas["pedidos"] / celulas["pedidos"].max()))
+    if modo == "Mapa de calor":
+        camada = pdk.Layer("HeatmapLayer", data=dados, get_position=["lon", "lat"], get_weight="pedidos", radius_pixels=40)
+    else:
+        camada = pdk.Layer(
+            "ScatterplotLayer", data=dados, get_position=["lon", "lat"], get_radius="raio",
+            radius_min_pixels=2, get_fill_color=[217, 72, 15, 160], pickable=True,
+        )
+    vista = pdk.data_utils.compute_view(dados[["lon", "lat"]].to_numpy().tolist())
+    return pdk.Deck(layers=[camada], initial_view_state=vista, map_style="light", tooltip={"text": "{pedidos} pedidos"})
@@ -0,0 +1,130 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from utils import configuracao
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Períodos tentados, do mais fino ao mais grosso, quando há dias demais no eixo (semanas começando no domingo, como a Week)
+PERIODOS = [("W-SAT", "Semana"), ("M", "Mês"), ("Q", "Trimestre"), ("Y", "Ano")]
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE REAMOSTRAGEM DO EIXO DE DATAS
+
+def reamostrar_datas(df, x, colunas, limite=None):
+    """ Função que limita as barras de um eixo de datas: com mais de `limite` dias, soma as colunas por semana,
+    mês, trimestre ou ano (o primeiro período que couber), com o primeiro dia do período no eixo.
+
+    Entrada: dataframe agregado por dia, coluna de datas, colunas somáveis (contagens), máximo de pontos
+    Saída: (dataframe reamostrado, rótulo do período: "Dia", "Semana", "Mês", ...)
+    """
+    limite = limite or configuracao.LIMITE_PONTOS_GRAFICO
+    if len(df) <= limite:
+        return df, "Dia"
+    for periodo, rotulo in PERIODOS:
+        inicio = df[x].dt.to_period(periodo).dt.start_time.rename(x)
+        reamostrado = df.groupby(inicio, sort=True)[list(colunas)].sum().reset_index()
+        if len(reamostrado) <= limite:
+            break
+    return reamostrado, rotulo
+
+                                            # FUNÇÃO DE REDUÇÃO DE BARRAS
+
+def reduzir_barras(df, x, colunas, limite=None):
+    """ Função que limita as barras de um eixo qualquer: datas são reamostradas por período (reamostrar_datas);
+    outros eixos ordenados (ex.: semanas) são somados em blocos de barras vizinhas, com o primeiro x de cada bloco.
+
+    Entrada: dataframe agregado, coluna do eixo x, colunas somáveis, máximo de pontos
+    Saída: dataframe com no máximo `limite` linhas
+    """
+    limite = limite or configuracao.LIMITE_PONTOS_GRAFICO
+    if len(df) <= limite:
+        return df
+    if pd.api.types.is_datetime64_any_dtype(df[x]):
+        return reamostrar_datas(df, x, colunas, limite)[0]
+    blocos = np.arange(len(df)) // int(np.ceil(len(df) / limite))
+    reduzido = df.groupby(blocos, sort=True).agg({x: "first", **{coluna: "sum" for coluna in colunas}})
+    return reduzido.reset_index(drop=True)
+
+                                            # FUNÇÃO DO LTTB
+
+def lttb(x, y, limite):
+    """ Função que escolhe `limite` pontos de uma série para um gráfico de linhas sem perder a forma dela
+    (Largest-Triangle-Three-Buckets): mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto que
+    forma o maior triângulo com o ponto escolhido no balde anterior e a média do balde seguinte.
+
+    Entrada: vetores x (números ou datas) e y, quantidade de pontos desejada
+    Saída: posições dos pontos escolhidos (crescentes)
+    """
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    x = np.asarray(x).astype(np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    bordas = np.linspace(1, n - 1, limite - 1).astype(np.int64)
+    escolhidos = np.empty(limite, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+
+    anterior = 0
+    for balde in range(limite - 2):
+        inicio, fim = bordas[balde], bordas[balde + 1]
+        proximo_fim = bordas[balde + 2] if balde + 2 < len(bordas) else n
+        media_x, media_y = x[fim:proximo_fim].mean(), y[fim:proximo_fim].mean()
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior]) - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[balde + 1] = anterior
+    return escolhidos
+
+                                            # FUNÇÃO DE REDUÇÃO DE LINHAS
+
+def reduzir_linha(df, x, y, limite=None):
+    """ Função que limita os pontos de um gráfico de linhas com o LTTB (o dataframe deve estar ordenado por x).
+
+    Entrada: dataframe, coluna x, coluna y, máximo de pontos
+    Saída: dataframe com no máximo `limite` linhas
+    """
+    limite = limite or configuracao.LIMITE_PONTOS_GRAFICO
+    if len(df) <= limite:
+        return df
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), limite)].reset_index(drop=True)
+
+                                            # FUNÇÃO DE RÓTULOS DAS BARRAS
+
+def rotulo_barras(df, coluna):
+    """ Função que devolve a coluna de texto das barras (px.bar(text=...)) só quando há poucas barras:
+    com muitas, os rótulos não cabem e só aumentam o JSON enviado ao navegador.
+    """
+    return coluna if len(df) <= configuracao.LIMITE_ROTULOS_GRAFICO else None
+
+                                            # FUNÇÃO DE SERIALIZAÇÃO DA FIGURA
+
+def figura_spec(fig):
+    """ Função que converte a figura Plotly no dicionário JSON puro (listas em vez de arrays) que o
+    st.plotly_chart recebe. As funções das páginas devolvem esse dicionário, que fica no cache de resultados:
+    num acerto, a figura não é montada de novo pelo plotly express.
+    """
+    return json.loads(pio.to_json(fig, validate=False))
+
+                                            # FUNÇÃO DE EXIBIÇÃO DA FIGURA
+
+def mostrar_figura(spec, use_container_width=True):
+    """ Função que mostra uma figura convertida por figura_spec no container ativo (colunas, abas, ...),
+    pela api pública do streamlit. O dicionário volta a ser um go.Figure antes do st.plotly_chart: com o dicionário,
+    uma figura sem traços (filtros sem pedidos) quebra o streamlit, e a figura vazia aparece como um gráfico vazio.
+
+    Entrada: dicionário da figura, largura do container
+    """
+    st.plotly_chart(go.Figure(spec, skip_invalid=True), use_container_width=use_container_width)
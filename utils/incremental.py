@@ -0,0 +1,267 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from utils import configuracao
+from utils.cubo import combinar_cubos, combinar_entregadores, montar_cubo, montar_entregadores_dia
+from utils.espacial import IndiceEspacial
+from utils.filtros import IndiceFiltro, ordenar_por_data
+from utils.ingestao import processar_bloco
+from utils.limpeza import concatenar_com_categorias
+from utils.perfil_entregadores import combinar_perfis, montar_dimensao, montar_perfil
+from utils.sketches import montar_sketches
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Bytes do csv logo antes do ponto já processado, usados para perceber se o começo do arquivo foi reescrito
+BYTES_ASSINATURA = 4096
+
+# Estado completo dos dados num instante: as páginas leem sempre de um mesmo instantâneo
+Instantaneo = namedtuple("Instantaneo", ["df", "cubo", "entregadores", "sketches", "perfil", "dimensao", "indice", "espacial", "versao"])
+
+# Leitura de um arquivo de lote: (tamanho, mtime) na última leitura, fim e assinatura do trecho lido e colunas do cabeçalho
+LoteLido = namedtuple("LoteLido", ["estado", "offset", "assinatura", "colunas"])
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE ASSINATURA DO TRECHO JÁ PROCESSADO
+
+def assinatura_trecho(caminho_csv, fim):
+    """ Função que resume os últimos bytes antes da posição `fim` do csv (detecta reescrita do trecho já processado).
+    """
+    with open(caminho_csv, "rb") as arquivo:
+        arquivo.seek(max(fim - BYTES_ASSINATURA, 0))
+        return hashlib.sha256(arquivo.read(min(fim, BYTES_ASSINATURA))).hexdigest()
+
+                                            # FUNÇÃO DE CONTAGEM DE LINHAS
+
+def contar_linhas(caminho_csv, fim, tamanho_leitura=1 << 24):
+    """ Função que conta as quebras de linha do csv até a posição `fim`, lendo em pedaços (memória constante).
+    Com o cabeçalho descontado, é a quantidade de linhas brutas: as linhas novas são numeradas a partir dela,
+    como seriam numa leitura completa do arquivo.
+    """
+    linhas = 0
+    ultimo = b"\n"
+    with open(caminho_csv, "rb") as arquivo:
+        while arquivo.tell() < fim:
+            pedaco = arquivo.read(min(tamanho_leitura, fim - arquivo.tell()))
+            linhas += pedaco.count(b"\n")
+            ultimo = pedaco[-1:]
+    return linhas + (ultimo != b"\n")
+
+                                            # FUNÇÃO DE LEITURA DO ACRÉSCIMO DO CSV
+
+def ler_acrescimo(caminho_csv, offset, assinatura, colunas_brutas):
+    """ Função que lê do csv só as linhas completas escritas depois do byte `offset` (o fim do trecho já processado):
+    1 - se o arquivo encolheu ou a assinatura do trecho antigo mudou, o csv foi reescrito e não há acréscimo
+    2 - senão, lê os bytes novos até a última quebra de linha (uma linha ainda sendo escrita fica para a próxima vez)
+
+    Entrada: caminho do csv, offset e assinatura do trecho processado, colunas do cabeçalho
+    Saída: None quando é preciso recarregar tudo; senão (brutos novos, em lista, novo offset, nova assinatura)
+    """
+    tamanho = os.path.getsize(caminho_csv)
+    if tamanho < offset or assinatura_trecho(caminho_csv, offset) != assinatura:
+        return None
+    if tamanho == offset:
+        return [], offset, assinatura
+
+    with open(caminho_csv, "rb") as arquivo:
+        arquivo.seek(offset)
+        conteudo = arquivo.read(tamanho - offset)
+    fim = conteudo.rfind(b"\n") + 1
+    if fim == 0:
+        return [], offset, assinatura
+    offset += fim
+    return [pd.read_csv(io.BytesIO(conteudo[:fim]), header=None, names=colunas_brutas)], offset, assinatura_trecho(caminho_csv, offset)
+
+                                            # FUNÇÃO DE ESTADO DE UM ARQUIVO
+
+def estado_arquivo(caminho):
+    """ Função que resume um arquivo pelo tamanho e mtime (muda quando ele cresce ou é reescrito).
+    """
+    estado = os.stat(caminho)
+    return estado.st_size, estado.st_mtime_ns
+
+                                            # FUNÇÃO DE LOTES ALTERADOS
+
+def lotes_alterados(caminho_csv, lotes):
+    """ Função que lista os arquivos de lote ao lado do csv principal (CURRY_PADRAO_LOTES) que ainda não foram lidos
+    ou que mudaram (tamanho ou mtime) desde a última leitura: um lote lido enquanto ainda era escrito volta a ser lido.
+
+    Entrada: caminho do csv principal, lotes já lidos ({nome: leitura com o campo estado})
+    Saída: caminhos dos lotes novos ou alterados, em ordem de nome
+    """
+    caminho_csv = Path(caminho_csv)
+    return [
+        caminho_lote for caminho_lote in sorted(caminho_csv.parent.glob(configuracao.PADRAO_LOTES))
+        if caminho_lote != caminho_csv and (caminho_lote.name not in lotes or lotes[caminho_lote.name].estado != estado_arquivo(caminho_lote))
+    ]
+
+                                            # FUNÇÃO DE LEITURA DE UM LOTE
+
+def ler_lote(caminho_lote, lido=None):
+    """ Função que lê de um arquivo de lote só as linhas completas que ainda não foram lidas:
+    1 - num lote novo, a leitura começa depois do cabeçalho (um cabeçalho ainda incompleto fica para a próxima vez)
+    2 - num lote já lido, continua do último byte lido, como no csv principal (ler_acrescimo)
+
+    Entrada: caminho do lote, leitura anterior (LoteLido) ou None
+    Saída: None quando o lote foi reescrito ou truncado; senão (brutos novos, em lista, novo LoteLido, ou None se
+           nem o cabeçalho está completo)
+    """
+    estado = estado_arquivo(caminho_lote)
+    if lido is None:
+        with open(caminho_lote, "rb") as arquivo:
+            cabecalho = arquivo.readline()
+        if not cabecalho.endswith(b"\n"):
+            return [], None
+        lido = LoteLido(estado, len(cabecalho), assinatura_trecho(caminho_lote, len(cabecalho)),
+                        list(pd.read_csv(io.BytesIO(cabecalho), nrows=0).columns))
+    acrescimo = ler_acrescimo(caminho_lote, lido.offset, lido.assinatura, lido.colunas)
+    if acrescimo is None:
+        return None
+    brutos, offset, assinatura = acrescimo
+    return brutos, LoteLido(estado, offset, assinatura, lido.colunas)
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class BaseIncremental:
+    """ Dados compartilhados do processo (pedidos limpos, cubo diário, entregadores por dia, sketches diários, perfil e
+    dimensão dos entregadores, índice de filtros e índice espacial) com atualização incremental:
+
+    - linhas acrescentadas ao fim do csv principal são lidas a partir do último byte processado
+    - arquivos de lote ao lado do csv (CURRY_PADRAO_LOTES) são acompanhados por tamanho e mtime: um lote novo é lido
+      depois do cabeçalho e um que cresceu, a partir do último byte lido (só linhas completas)
+    - só o delta passa pela limpeza; o cubo, os entregadores por dia, os sketches, o perfil e a dimensão são combinados
+      com os do delta
+    - se o trecho já processado do csv ou de um lote mudar (arquivo reescrito ou truncado), tudo é recarregado do zero
+      e os lotes são lidos de novo logo em seguida
+
+    Cada atualização troca o instantâneo inteiro de uma vez, então quem já leu um instantâneo continua consistente.
+    """
+
+    def __init__(self, caminho_csv, carregar):
+        self.caminho = Path(caminho_csv)
+        self._carregar = carregar
+        self._trava = threading.Lock()
+        self.ultima_verificacao = 0.0
+        self.atualizacoes = 0
+        self.linhas_incrementais = 0
+        self._recarregar()
+        self.atualizar()
+
+    def _recarregar(self):
+        """ Carrega o csv principal do zero (passando pelo cache em disco) e monta todas as estruturas derivadas.
+        """
+        self.offset = os.path.getsize(self.caminho)
+        df1 = ordenar_por_data(self._carregar(str(self.caminho)))
+        self.colunas_brutas = list(pd.read_csv(self.caminho, nrows=0).columns)
+        self.assinatura = assinatura_trecho(self.caminho, self.offset)
+        self.proximo_indice = contar_linhas(self.caminho, self.offset) - 1
+        self.lotes = {}
+        self.versao_base = df1.attrs.get("versao_dados", "")
+        perfil = montar_perfil(df1)
+        self._publicar(df1, montar_cubo(df1), montar_entregadores_dia(df1), montar_sketches(df1), perfil, montar_dimensao(df1, perfil))
+
+    def _publicar(self, df1, cubo, entregadores, sketches, perfil, dimensao):
+        versao = f"{self.versao_base}+{self.atualizacoes}"
+        df1.attrs["versao_dados"] = versao
+        self.atual = Instantaneo(df1, cubo, entregadores, sketches, perfil, dimensao, IndiceFiltro(df1), IndiceEspacial(df1), versao)
+
+    def _ler_acrescimo(self):
+        """ Lê do csv principal só as linhas completas escritas depois do último byte processado.
+        Devolve None quando o trecho antigo mudou e é preciso recarregar tudo.
+        """
+        lido = ler_acrescimo(self.caminho, self.offset, self.assinatura, self.colunas_brutas)
+        if lido is None:
+            return None
+        brutos, self.offset, self.assinatura = lido
+        return brutos
+
+    def _ler_lotes(self):
+        """ Lê dos lotes novos ou alterados só as linhas completas ainda não lidas.
+        Devolve None quando um lote já lido foi reescrito e é preciso recarregar tudo.
+        """
+        brutos = []
+        for caminho_lote in lotes_alterados(self.caminho, self.lotes):
+            lido = ler_lote(caminho_lote, self.lotes.get(caminho_lote.name))
+            if lido is None:
+                return None
+            novos, leitura = lido
+            brutos += novos
+            if leitura is not None:
+                self.lotes[caminho_lote.name] = leitura
+        return brutos
+
+    def atualizar(self):
+        """ Procura pedidos novos e, se houver, incorpora só eles:
+        1 - lê o acréscimo do csv principal e o que ainda não foi lido dos lotes; se o trecho já lido de algum deles
+            mudou, recarrega tudo e lê os lotes de novo
+        2 - numera as linhas novas depois da última e aplica a limpeza/enriquecimento apenas nelas
+        3 - junta aos pedidos (reordenando por data só se o delta não vier depois de tudo), combina cubo, entregadores,
+            sketches, perfil e dimensão e remonta os índices de filtros e espacial (as árvores deste só na primeira busca)
+
+        Saída: quantidade de pedidos novos incorporados (-1 quando foi preciso recarregar tudo)
+        """
+        with self._trava:
+            self.ultima_verificacao = time.monotonic()
+            brutos = self._ler_acrescimo()
+            lotes = None if brutos is None else self._ler_lotes()
+            recarregou = lotes is None
+            if recarregou:
+                self.atualizacoes += 1
+                self._recarregar()
+                # depois da recarga nenhum lote foi lido: todos entram de novo, desde o cabeçalho
+                brutos, lotes = [], self._ler_lotes() or []
+            brutos += lotes
+            if not brutos:
+                return -1 if recarregou else 0
+
+            # cada pedaço é limpo separadamente (como os blocos da ingestão): o pandas infere tipos diferentes em cada
+            # leitura, e juntar os brutos misturaria números e textos na mesma coluna
+            limpos = []
+            for bruto in brutos:
+                bruto.index = pd.RangeIndex(self.proximo_indice, self.proximo_indice + len(bruto))
+                self.proximo_indice += len(bruto)
+                limpos.append(processar_bloco(bruto))
+            delta = concatenar_com_categorias(limpos)
+            if delta.empty:
+                return -1 if recarregou else 0
+
+            atual = self.atual
+            df1 = concatenar_com_categorias([atual.df, delta])
+            if delta["Order_Date"].min() < atual.df["Order_Date"].max():
+                df1 = ordenar_por_data(df1)
+            cubo = combinar_cubos(atual.cubo, montar_cubo(delta))
+            entregadores = combinar_entregadores(atual.entregadores, montar_entregadores_dia(delta))
+            sketches = atual.sketches.combinar(montar_sketches(delta))
+            perfil_delta = montar_perfil(delta)
+            perfil = combinar_perfis(atual.perfil, perfil_delta)
+            dimensao = atual.dimensao.combinar(montar_dimensao(delta, perfil_delta))
+
+            self.atualizacoes += 1
+            self.linhas_incrementais += len(delta)
+            self._publicar(df1, cubo, entregadores, sketches, perfil, dimensao)
+            return -1 if recarregou else len(delta)
+
+    def atualizar_se_necessario(self, intervalo=None):
+        """ Chama atualizar() no máximo uma vez a cada `intervalo` segundos (CURRY_INTERVALO_ATUALIZACAO_S; 0 desliga).
+        """
+        intervalo = configuracao.INTERVALO_ATUALIZACAO_S if intervalo is None else intervalo
+        if intervalo and time.monotonic() - self.ultima_verificacao >= intervalo:
+            return self.atualizar()
+        return 0
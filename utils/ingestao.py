@@ -0,0 +1,191 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import configuracao
+from utils.enriquecimento import enriquecer_dados
+from utils.limpeza import limpar_dados
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Linhas lidas para estimar quanto cada linha do csv ocupa em memória
+LINHAS_AMOSTRA = 10_000
+
+# Quantas vezes o bloco bruto a limpeza ocupa no pico (bloco bruto + colunas convertidas + bloco limpo)
+FATOR_PICO_LIMPEZA = 3
+
+TAMANHO_BLOCO_MINIMO = 1_000
+
+# Tipos das colunas no parquet limpo (os que utils.limpeza e utils.enriquecimento produzem), declarados em vez de
+# inferidos do primeiro bloco: um bloco sem nenhuma linha válida não tem de onde tirar o tipo dos textos e categorias
+_CATEGORIA = pa.dictionary(pa.int8(), pa.string())
+TIPOS_PARQUET = {
+    "ID": pa.string(),
+    "Delivery_person_ID": pa.string(),
+    "Delivery_person_Age": pa.int8(),
+    "Delivery_person_Ratings": pa.float64(),
+    "Restaurant_latitude": pa.float64(),
+    "Restaurant_longitude": pa.float64(),
+    "Delivery_location_latitude": pa.float64(),
+    "Delivery_location_longitude": pa.float64(),
+    "Order_Date": pa.timestamp("ns"),
+    "Time_Orderd": pa.int32(),
+    "Time_Order_picked": pa.int32(),
+    "Weatherconditions": _CATEGORIA,
+    "Road_traffic_density": _CATEGORIA,
+    "Vehicle_condition": pa.int8(),
+    "Type_of_order": _CATEGORIA,
+    "Type_of_vehicle": _CATEGORIA,
+    "multiple_deliveries": pa.int8(),
+    "Festival": _CATEGORIA,
+    "City": _CATEGORIA,
+    "time_taken": pa.int16(),
+    "Week": pa.uint8(),
+    "age_range": pa.dictionary(pa.int8(), pa.string(), ordered=True),
+    "distance": pa.float32(),
+    "prep_time": pa.int16(),
+    "order_hour": pa.uint8(),
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DO PIPELINE DE UM BLOCO
+
+def processar_bloco(df):
+    """ Função que aplica ao dataframe bruto (inteiro ou um bloco do csv) as mesmas regras de limpeza e enriquecimento.
+
+    Entrada: dataframe lido do csv
+    Saída: dataframe limpo e enriquecido
+    """
+    return enriquecer_dados(limpar_dados(df))
+
+                                            # FUNÇÃO DE CARREGAMENTO E LIMPEZA (SEM CACHE)
+
+def ler_e_limpar_csv(caminho):
+    """ Função que lê o csv inteiro e aplica o pipeline completo de limpeza, padronização e enriquecimento.
+
+    Entrada: caminho do csv
+    Saída: dataframe limpo
+    """
+    return processar_bloco(pd.read_csv(caminho))
+
+                                            # FUNÇÃO DE TAMANHO DO BLOCO
+
+def calcular_tamanho_bloco(caminho_csv, tamanho_bloco=None, limite_memoria_mb=None):
+    """ Função que decide quantas linhas ler por bloco:
+    1 - se o tamanho do bloco foi informado (parâmetro ou CURRY_TAMANHO_BLOCO), usa ele
+    2 - senão, lê uma amostra do csv, mede os bytes por linha em memória e divide a memória alvo
+        pelo pico estimado de uma linha durante a limpeza
+
+    Entrada: caminho do csv, tamanho do bloco (opcional), memória alvo em MB (opcional)
+    Saída: linhas por bloco
+    """
+    tamanho_bloco = tamanho_bloco or configuracao.TAMANHO_BLOCO
+    if tamanho_bloco:
+        return int(tamanho_bloco)
+
+    limite_memoria_mb = limite_memoria_mb or configuracao.LIMITE_MEMORIA_BLOCO_MB
+    amostra = pd.read_csv(caminho_csv, nrows=LINHAS_AMOSTRA)
+    bytes_por_linha = amostra.memory_usage(deep=True).sum() / max(len(amostra), 1)
+    linhas = int(limite_memoria_mb * 1024 ** 2 / (bytes_por_linha * FATOR_PICO_LIMPEZA))
+    return max(linhas, TAMANHO_BLOCO_MINIMO)
+
+                                            # FUNÇÃO DE LEITURA EM BLOCOS
+
+def ler_em_blocos(caminho_csv, tamanho_bloco=None, limite_memoria_mb=None):
+    """ Função geradora que lê o csv em blocos e devolve cada bloco já limpo e enriquecido.
+    O índice de cada bloco continua a numeração das linhas do csv, igual à leitura inteira.
+
+    Entrada: caminho do csv, tamanho do bloco (opcional), memória alvo em MB (opcional)
+    Saída: blocos limpos (um por vez)
+    """
+    linhas = calcular_tamanho_bloco(caminho_csv, tamanho_bloco, limite_memoria_mb)
+    with pd.read_csv(caminho_csv, chunksize=linhas) as leitor:
+        for bloco in leitor:
+            yield processar_bloco(bloco)
+
+                                            # FUNÇÃO DO ESQUEMA DO PARQUET
+
+def esquema_parquet(bloco):
+    """ Função que monta o esquema do parquet limpo para as colunas do bloco: os tipos de TIPOS_PARQUET e, para uma
+    coluna fora dele, o tipo inferido do próprio bloco. O índice (a linha no csv) entra como inteiro.
+
+    Entrada: bloco limpo
+    Saída: esquema Arrow (sem metadados)
+    """
+    inferido = pa.Schema.from_pandas(bloco, preserve_index=True)
+    return pa.schema([
+        pa.field(campo.name, TIPOS_PARQUET.get(campo.name, pa.int64() if campo.name == "__index_level_0__" else campo.type))
+        for campo in inferido
+    ])
+
+                                            # FUNÇÃO DE INGESTÃO PARA O ARMAZENAMENTO COLUNAR
+
+def ingerir_para_parquet(caminho_csv, destino, metadados=None, tamanho_bloco=None, limite_memoria_mb=None):
+    """ Função que grava o csv limpo num parquet, um row group por bloco, sem nunca juntar o dataset inteiro em memória:
+    1 - lê e limpa o csv bloco a bloco
+    2 - todos os blocos são convertidos para o mesmo esquema declarado (esquema_parquet), mesmo que o primeiro venha
+        vazio; cada row group guarda o seu próprio dicionário de categorias
+    3 - grava num arquivo temporário e troca de nome no final, junto com os metadados (chave do cache); se algo falhar
+        no meio, o temporário é apagado
+
+    Entrada: caminho do csv, caminho do parquet, metadados extras do esquema, tamanho do bloco, memória alvo em MB
+    Saída: quantidade de linhas gravadas
+    """
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    escritor = None
+    linhas = 0
+    try:
+        try:
+            for bloco in ler_em_blocos(caminho_csv, tamanho_bloco, limite_memoria_mb):
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=True, schema=esquema_parquet(bloco))
+                    esquema = tabela.schema.with_metadata({**tabela.schema.metadata, **(metadados or {})})
+                    escritor = pq.ParquetWriter(temporario, esquema)
+                    tabela = tabela.replace_schema_metadata(esquema.metadata)
+                else:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=True, schema=esquema)
+                escritor.write_table(tabela)
+                linhas += len(bloco)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        if escritor is None:
+            raise ValueError(f"O csv {caminho_csv} não tem linhas")
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return linhas
+
+                                            # FUNÇÃO DE AGREGAÇÃO EM BLOCOS
+
+def agregar_em_blocos(caminho_csv, parcial, combinar="sum", tamanho_bloco=None, limite_memoria_mb=None):
+    """ Função que dobra o csv direto em pré-agregados, sem guardar as linhas:
+    1 - para cada bloco limpo, calcula o agregado parcial (dataframe indexado pelas chaves do agregado)
+    2 - junta o parcial ao acumulado e reagrega pelas chaves, mantendo o acumulado pequeno
+
+    Entrada: caminho do csv, função bloco -> agregado parcial, regra de combinação (ex.: "sum" ou
+             {"n": "sum", "minimo": "min"}), tamanho do bloco, memória alvo em MB
+    Saída: agregado final
+    """
+    acumulado = None
+    for bloco in ler_em_blocos(caminho_csv, tamanho_bloco, limite_memoria_mb):
+        parte = parcial(bloco)
+        if acumulado is None:
+            acumulado = parte
+            continue
+        juntos = pd.concat([acumulado, parte])
+        niveis = list(range(juntos.index.nlevels))
+        acumulado = juntos.groupby(level=niveis, observed=True, sort=True).agg(combinar)
+    return acumulado
@@ -0,0 +1,261 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from utils import configuracao
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Etapas de uma execução da página, na ordem do painel
+ETAPAS = ["carga", "filtro", "agregacao", "visualizacao", "render"]
+
+# Parâmetro da url que liga a instrumentação só numa sessão (ex.: http://localhost:8501/?instrumentacao=1)
+PARAMETRO_URL = "instrumentacao"
+
+# Cada span vira uma linha de log (JSON) neste logger, em nível DEBUG
+_LOGGER = logging.getLogger("curry.instrumentacao")
+
+# Rastreador da execução em andamento: cada sessão roda o script da página na sua própria thread
+_ATUAL = threading.local()
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class _TrechoNulo:
+    """ Trecho devolvido quando a instrumentação está desligada: aceita e descarta as anotações (custo quase zero).
+    """
+    __slots__ = ()
+
+    def __setattr__(self, nome, valor):
+        pass
+
+    def anotar(self, **atributos):
+        pass
+
+
+_NULO = _TrechoNulo()
+
+
+class Trecho:
+    """ Um span: nome, etapa, início e duração (segundos desde o começo da execução), linhas de entrada e de saída,
+    memória alocada no trecho (MB, só com CURRY_INSTRUMENTACAO_MEMORIA) e anotações livres.
+    """
+    __slots__ = ("nome", "etapa", "inicio", "duracao", "linhas_entrada", "linhas_saida", "memoria_mb", "atributos", "pai", "_memoria_inicial")
+
+    def __init__(self, nome, etapa, inicio, linhas_entrada, atributos, pai):
+        self.nome = nome
+        self.etapa = etapa
+        self.inicio = inicio
+        self.duracao = None
+        self.linhas_entrada = linhas_entrada
+        self.linhas_saida = None
+        self.memoria_mb = None
+        self.atributos = atributos
+        self.pai = pai
+        self._memoria_inicial = None
+
+    def anotar(self, **atributos):
+        self.atributos.update(atributos)
+
+
+class Rastreador:
+    """ Spans de uma execução (rerun) de uma página. Os spans abertos formam uma pilha: o tempo próprio de cada um
+    é a duração menos a dos filhos diretos (ex.: a montagem da figura Plotly é o span da visualização menos a agregação).
+    """
+
+    def __init__(self, pagina, memoria=False):
+        self.pagina = pagina
+        self.memoria = memoria
+        self.origem = time.perf_counter()
+        self.inicio_epoca = time.time()
+        self.trechos = []
+        self._pilha = []
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def abrir(self, nome, etapa, linhas_entrada=None, **atributos):
+        pai = self._pilha[-1] if self._pilha else None
+        trecho = Trecho(nome, etapa, time.perf_counter() - self.origem, linhas_entrada, atributos, pai)
+        if self.memoria:
+            trecho._memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self.trechos.append(trecho)
+        self._pilha.append(trecho)
+        return trecho
+
+    def fechar(self, trecho):
+        trecho.duracao = time.perf_counter() - self.origem - trecho.inicio
+        if self.memoria and trecho._memoria_inicial is not None:
+            trecho.memoria_mb = (tracemalloc.get_traced_memory()[0] - trecho._memoria_inicial) / 1024 ** 2
+        if self._pilha and self._pilha[-1] is trecho:
+            self._pilha.pop()
+        _LOGGER.debug("%s", json.dumps(self._registro(trecho), default=str))
+
+    def _registro(self, trecho):
+        return {
+            "pagina": self.pagina,
+            "nome": trecho.nome,
+            "etapa": trecho.etapa,
+            "inicio_ms": round(trecho.inicio * 1000, 3),
+            "duracao_ms": round((trecho.duracao or 0.0) * 1000, 3),
+            "linhas_entrada": trecho.linhas_entrada,
+            "linhas_saida": trecho.linhas_saida,
+            "memoria_mb": None if trecho.memoria_mb is None else round(trecho.memoria_mb, 3),
+            "pai": trecho.pai.nome if trecho.pai is not None else None,
+            **trecho.atributos,
+        }
+
+    def tabela(self):
+        """ Um span por linha, na ordem de abertura, com a duração total e a própria (sem os filhos) em ms.
+        """
+        filhos = {}
+        for trecho in self.trechos:
+            if trecho.pai is not None and trecho.duracao is not None:
+                filhos[id(trecho.pai)] = filhos.get(id(trecho.pai), 0.0) + trecho.duracao
+        linhas = []
+        for trecho in self.trechos:
+            if trecho.duracao is None:
+                continue
+            registro = self._registro(trecho)
+            registro["proprio_ms"] = round((trecho.duracao - filhos.get(id(trecho), 0.0)) * 1000, 3)
+            linhas.append(registro)
+        colunas = ["etapa", "nome", "duracao_ms", "proprio_ms", "linhas_entrada", "linhas_saida", "memoria_mb", "inicio_ms", "pai"]
+        tabela = pd.DataFrame(linhas)
+        return tabela.reindex(columns=colunas + [coluna for coluna in tabela.columns if coluna not in colunas + ["pagina"]])
+
+    def logs_json(self):
+        """ Logs estruturados: uma linha JSON por span (JSON Lines).
+        """
+        return "\n".join(json.dumps(self._registro(trecho), default=str) for trecho in self.trechos if trecho.duracao is not None) + "\n"
+
+    def chrome_trace(self):
+        """ Os spans no formato Trace Event do Chrome (eventos completos "X", tempos em microssegundos), para abrir no
+        chrome://tracing ou no Perfetto. Todos ficam na mesma faixa, aninhados como um flame chart, e a etapa vai na categoria.
+        """
+        eventos = [
+            {"name": "process_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": self.pagina}},
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": 1, "args": {"name": "execucao"}},
+        ]
+        for trecho in self.trechos:
+            if trecho.duracao is None:
+                continue
+            registro = self._registro(trecho)
+            eventos.append({
+                "name": trecho.nome,
+                "cat": trecho.etapa,
+                "ph": "X",
+                "ts": round((self.inicio_epoca + trecho.inicio) * 1e6),
+                "dur": round(trecho.duracao * 1e6),
+                "pid": 1,
+                "tid": 1,
+                "args": {chave: valor for chave, valor in registro.items() if chave not in ("nome", "etapa", "inicio_ms", "duracao_ms") and valor is not None},
+            })
+        return json.dumps({"traceEvents": eventos, "displayTimeUnit": "ms"}, default=str)
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO QUE DIZ SE A INSTRUMENTAÇÃO ESTÁ LIGADA
+
+def instrumentacao_ligada():
+    """ Função que diz se a execução atual deve ser instrumentada: CURRY_INSTRUMENTACAO=1 liga para todas as sessões
+    e ?instrumentacao=1 na url liga só para a sessão que abriu a página.
+    """
+    if configuracao.INSTRUMENTACAO:
+        return True
+    try:
+        return st.query_params.get(PARAMETRO_URL) == "1"
+    except Exception:
+        return False
+
+                                            # FUNÇÃO DE INÍCIO DA EXECUÇÃO
+
+def iniciar_execucao(pagina):
+    """ Função chamada no começo de cada página: cria o rastreador da execução (ou desliga os spans, se a
+    instrumentação não está ligada) e abre o span da página inteira, fechado por mostrar_painel_instrumentacao.
+
+    Entrada: nome da página
+    Saída: Rastreador (None quando desligada)
+    """
+    if not instrumentacao_ligada():
+        _ATUAL.rastreador = None
+        return None
+    rastreador = Rastreador(pagina, memoria=bool(configuracao.INSTRUMENTACAO_MEMORIA))
+    rastreador.abrir(pagina, "pagina")
+    _ATUAL.rastreador = rastreador
+    return rastreador
+
+                                            # FUNÇÃO DE SPAN
+
+@contextmanager
+def trecho(nome, etapa, linhas_entrada=None, **atributos):
+    """ Context manager que mede um trecho da execução atual:
+
+        with trecho("filtrar_cubo", "filtro", linhas_entrada=len(cubo)) as span:
+            filtrado = ...
+            span.linhas_saida = len(filtrado)
+
+    Fora de uma página instrumentada (instrumentação desligada, benchmarks, processos do pool) não mede nada.
+
+    Entrada: nome do span, etapa (carga, filtro, agregacao, visualizacao, render), linhas de entrada, anotações
+    Saída: o span, para preencher linhas_saida e anotar outros atributos (span.anotar(cache="falha"))
+    """
+    rastreador = getattr(_ATUAL, "rastreador", None)
+    if rastreador is None:
+        yield _NULO
+        return
+    span = rastreador.abrir(nome, etapa, linhas_entrada, **atributos)
+    try:
+        yield span
+    finally:
+        rastreador.fechar(span)
+
+                                            # FUNÇÃO DE CONTAGEM DE LINHAS
+
+def contar_linhas(valor):
+    """ Função que devolve as linhas de um resultado (dataframe, série ou sequência) ou None para o resto (figuras, HTML).
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series, list, tuple)):
+        return len(valor)
+    return None
+
+                                            # FUNÇÃO DO PAINEL NA SIDEBAR
+
+def mostrar_painel_instrumentacao():
+    """ Função chamada no fim de cada página instrumentada:
+    1 - fecha o span da página e encerra a coleta desta execução
+    2 - mostra, num expander fechado da sidebar, o tempo por etapa e a tabela de spans
+    3 - oferece os spans para download como logs estruturados (JSON Lines) e como Chrome trace (JSON)
+    """
+    rastreador = getattr(_ATUAL, "rastreador", None)
+    if rastreador is None:
+        return
+    _ATUAL.rastreador = None
+    rastreador.fechar(rastreador.trechos[0])
+
+    tabela = rastreador.tabela()
+    with st.sidebar.expander("Instrumentação", expanded=False):
+        total_ms = tabela["duracao_ms"].iloc[0]
+        st.caption(f"Execução: {total_ms:,.1f} ms em {len(tabela) - 1} spans")
+        por_etapa = tabela.iloc[1:].groupby("etapa")["proprio_ms"].sum().reindex(ETAPAS).fillna(0.0)
+        st.caption(" | ".join(f"{etapa}: {tempo:,.1f} ms" for etapa, tempo in por_etapa.items()))
+        if not rastreador.memoria:
+            st.caption("Memória: ligue CURRY_INSTRUMENTACAO_MEMORIA=1 (tracemalloc, deixa tudo mais lento)")
+        st.dataframe(tabela.drop(columns=["pai"]), hide_index=True, use_container_width=True)
+
+        arquivo = f"{rastreador.pagina}_{time.strftime('%Y%m%d_%H%M%S', time.localtime(rastreador.inicio_epoca))}".replace(" ", "_").lower()
+        st.download_button("Logs (JSON Lines)", rastreador.logs_json(), file_name=f"{arquivo}.jsonl", mime="application/x-ndjson")
+        st.download_button("Chrome trace (JSON)", rastreador.chrome_trace(), file_name=f"{arquivo}.trace.json", mime="application/json")
+        st.caption("Abra o trace em chrome://tracing ou ui.perfetto.dev")
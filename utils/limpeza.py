@@ -0,0 +1,184 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+COLUNAS_NUMERICAS = ["Delivery_person_Age", "Delivery_person_Ratings", "multiple_deliveries", "Time_taken(min)"]
+COLUNAS_HORARIO = ["Time_Orderd", "Time_Order_picked"]
+COLUNAS_CATEGORICAS = ["Weatherconditions", "Road_traffic_density", "Type_of_order", "Type_of_vehicle", "Festival", "City"]
+
+# Tipos inteiros compactos usados depois do dropna (caem para int64 se algum valor não couber)
+TIPOS_INTEIROS = {
+    "Delivery_person_Age": np.int8,
+    "Vehicle_condition": np.int8,
+    "multiple_deliveries": np.int8,
+    "Time_taken(min)": np.int16,
+    "Time_Orderd": np.int32,
+    "Time_Order_picked": np.int32,
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES AUXILIARES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE LIMPEZA DOS VALORES ÚNICOS DE TEXTO
+
+def _texto_limpo(unicos):
+    """ Aplica a regra antiga de texto (strip, casefold e "nan" -> NaN) sobre os valores únicos de uma coluna.
+    """
+    limpos = unicos.str.strip().str.casefold()
+    return limpos.where(limpos != "nan")
+
+                                            # FUNÇÕES DE CONVERSÃO DOS VALORES ÚNICOS
+
+def _numero(unicos, coluna):
+    if coluna == "Time_taken(min)":
+        unicos = unicos.str.removeprefix("(min)")
+    return pd.to_numeric(unicos, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _data(unicos, coluna):
+    return pd.to_datetime(unicos, format="%d-%m-%Y", errors="coerce").to_numpy(dtype="datetime64[ns]")
+
+
+def _horario(unicos, coluna):
+    horarios = pd.to_datetime(unicos, format="%H:%M:%S", errors="coerce")
+    return (horarios.hour * 3600 + horarios.minute * 60 + horarios.second).to_numpy(dtype=np.float64)
+
+                                            # FUNÇÃO DE CONVERSÃO POR CÓDIGOS
+
+def _converter_por_codigos(coluna, nome, conversor):
+    """ Converte uma coluna de texto trabalhando só nos seus valores únicos:
+    1 - factoriza a coluna (uma passada) em códigos inteiros + valores únicos
+    2 - limpa e converte apenas os valores únicos (poucas dezenas na maioria das colunas)
+    3 - espalha o resultado de volta pelas linhas indexando pelos códigos (código -1 cai no valor nulo do final)
+
+    Entrada: série, nome da coluna, função de conversão (ou None para manter texto)
+    Saída: vetor NumPy convertido
+    """
+    codigos, unicos = pd.factorize(coluna, use_na_sentinel=True)
+    limpos = _texto_limpo(pd.Index(unicos, dtype=object))
+
+    if conversor is None:
+        valores = limpos.to_numpy(dtype=object)
+        return np.append(valores, np.nan)[codigos]
+
+    valores = conversor(limpos, nome)
+    nulo = np.datetime64("NaT") if valores.dtype.kind == "M" else np.nan
+    return np.append(valores, nulo)[codigos]
+
+                                            # FUNÇÃO DE CONVERSÃO PARA CATEGORIA
+
+def _categoria_por_codigos(coluna, nome):
+    """ Converte uma coluna de texto de baixa cardinalidade direto para category, também só pelos valores únicos.
+    """
+    codigos, unicos = pd.factorize(coluna, use_na_sentinel=True)
+    limpos = _texto_limpo(pd.Index(unicos, dtype=object))
+    if nome == "Weatherconditions":
+        limpos = limpos.str.removeprefix("conditions ")
+
+    codigos_limpos, categorias = pd.factorize(limpos, sort=True, use_na_sentinel=True)
+    codigos_finais = np.append(codigos_limpos, -1)[codigos]
+    return pd.Categorical.from_codes(codigos_finais, categories=categorias)
+
+                                            # FUNÇÃO DE INTEIRO COMPACTO
+
+def _inteiro_compacto(valores, tipo):
+    info = np.iinfo(tipo)
+    if len(valores) and (valores.min() < info.min or valores.max() > info.max):
+        tipo = np.int64
+    return valores.astype(tipo)
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE LIMPEZA E PADRONIZAÇÃO EM UMA PASSADA
+
+def limpar_dados(df):
+    """ Função que limpa e padroniza o dataframe bruto do csv, substituindo limpar_colunas_texto + padronizar_colunas:
+    1 - converte cada coluna de texto uma única vez, trabalhando sobre os seus valores únicos
+        (strip/casefold/"nan", números, datas e horários são tratados juntos nessa etapa)
+    2 - colunas de baixa cardinalidade (cidade, tráfego, clima, tipo de pedido, veículo e festival) viram category
+    3 - os horários viram inteiros com os segundos desde a meia-noite, em vez de objetos datetime.time
+    4 - monta uma única máscara de linhas válidas (o antigo dropna) e seleciona as linhas uma vez só
+    5 - reduz os inteiros para tipos compactos e renomeia Time_taken(min) para time_taken
+
+    As linhas, o índice e os valores são os mesmos do pipeline antigo; mudam apenas os tipos.
+    Latitudes, longitudes e avaliações continuam em float64 para não alterar nenhum valor.
+
+    Entrada: dataframe lido do csv
+    Saída: dataframe limpo e padronizado
+    """
+    colunas = {}
+    for nome in df.columns:
+        coluna = df[nome]
+        texto = coluna.dtype == object
+
+        if nome in COLUNAS_CATEGORICAS and texto:
+            colunas[nome] = _categoria_por_codigos(coluna, nome)
+        elif nome in COLUNAS_NUMERICAS and texto:
+            colunas[nome] = _converter_por_codigos(coluna, nome, _numero)
+        elif nome in COLUNAS_HORARIO and texto:
+            colunas[nome] = _converter_por_codigos(coluna, nome, _horario)
+        elif nome == "Order_Date" and texto:
+            colunas[nome] = _converter_por_codigos(coluna, nome, _data)
+        elif texto:
+            colunas[nome] = _converter_por_codigos(coluna, nome, None)
+        else:
+            colunas[nome] = coluna.to_numpy()
+
+    validas = np.ones(len(df), dtype=bool)
+    for valores in colunas.values():
+        validas &= pd.notna(valores) if not isinstance(valores, pd.Categorical) else valores.codes != -1
+
+    df_limpo = {}
+    for nome, valores in colunas.items():
+        valores = valores[validas]
+        if nome in TIPOS_INTEIROS:
+            valores = _inteiro_compacto(valores, TIPOS_INTEIROS[nome])
+        df_limpo[nome] = valores
+
+    df_limpo = pd.DataFrame(df_limpo, index=df.index[validas])
+    return df_limpo.rename(columns={"Time_taken(min)": "time_taken"})
+
+                                            # FUNÇÃO DE ORDENAÇÃO DAS CATEGORIAS
+
+def ordenar_categorias(df1):
+    """ Função que deixa as categorias das colunas category não ordenadas em ordem alfabética (como no limpar_dados).
+    Necessária quando o dataframe é montado a partir de blocos, cujas categorias vêm na ordem em que apareceram.
+
+    Entrada: dataframe
+    Saída: o mesmo dataframe, com as categorias ordenadas
+    """
+    for coluna in df1.select_dtypes(include="category").columns:
+        categorias = df1[coluna].cat.categories
+        if not df1[coluna].cat.ordered and not categorias.is_monotonic_increasing:
+            df1[coluna] = df1[coluna].cat.reorder_categories(categorias.sort_values())
+    return df1
+
+                                            # FUNÇÃO DE CONCATENAÇÃO COM CATEGORIAS ALINHADAS
+
+def concatenar_com_categorias(frames):
+    """ Função que concatena dataframes mantendo as colunas category como category:
+    1 - para cada coluna category, junta as categorias de todos os dataframes (em ordem alfabética se não for ordenada)
+    2 - aplica as mesmas categorias em todos antes do concat (senão o pandas converte a coluna para object)
+
+    Entrada: lista de dataframes com as mesmas colunas
+    Saída: dataframe concatenado
+    """
+    frames = [frame for frame in frames if frame is not None]
+    colunas = frames[0].select_dtypes(include="category").columns
+    alinhados = [frame.copy(deep=False) for frame in frames]
+    for coluna in colunas:
+        if frames[0][coluna].cat.ordered:
+            continue
+        categorias = pd.Index(sorted(set().union(*(frame[coluna].cat.categories for frame in frames))))
+        for frame in alinhados:
+            frame[coluna] = frame[coluna].cat.set_categories(categorias)
+    return pd.concat(alinhados)
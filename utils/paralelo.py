@@ -0,0 +1,197 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils import configuracao
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Pool de processos do servidor, criado na primeira agregação grande e reaproveitado depois
+_TRAVA_POOL = threading.Lock()
+_POOL = {"executor": None, "processos": 0}
+
+# Nanossegundos por dia (datas viram números de dias para entrar na chave inteira)
+_NS_POR_DIA = 86_400 * 10 ** 9
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE QUANTIDADE DE PROCESSOS
+
+def quantidade_processos():
+    """ Função que devolve quantos processos usar (CURRY_PROCESSOS; 0 = um por núcleo).
+    """
+    return configuracao.PROCESSOS or os.cpu_count() or 1
+
+                                            # FUNÇÃO DE DECISÃO DO CAMINHO PARALELO
+
+def usar_paralelo(linhas):
+    """ Função que decide se uma agregação vale o custo do pool: só com pelo menos CURRY_LINHAS_MINIMAS_PARALELO
+    linhas e mais de um processo. Abaixo disso, copiar colunas e trocar mensagens custa mais que o groupby.
+    """
+    return linhas >= configuracao.LINHAS_MINIMAS_PARALELO and quantidade_processos() > 1
+
+                                            # FUNÇÃO DO POOL DE PROCESSOS
+
+def executor():
+    """ Função que devolve o pool de processos compartilhado (contexto spawn: o servidor do streamlit tem threads,
+    e um fork no meio delas pode herdar travas presas).
+    """
+    processos = quantidade_processos()
+    with _TRAVA_POOL:
+        if _POOL["executor"] is None or _POOL["processos"] != processos:
+            if _POOL["executor"] is not None:
+                _POOL["executor"].shutdown(wait=False)
+            _POOL["executor"] = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context("spawn"))
+            _POOL["processos"] = processos
+        return _POOL["executor"]
+
+                                            # FUNÇÃO DE DESCARTE DO POOL
+
+def descartar_executor():
+    """ Função que fecha o pool de processos (o próximo uso cria outro).
+    """
+    with _TRAVA_POOL:
+        if _POOL["executor"] is not None:
+            _POOL["executor"].shutdown(wait=False, cancel_futures=True)
+        _POOL["executor"] = None
+
+                                            # FUNÇÃO DE CODIFICAÇÃO DAS CHAVES
+
+def _codificar_chave(coluna):
+    """ Função que transforma uma coluna de chave em códigos inteiros pequenos (-1 = nulo) e nos valores de cada código:
+    category usa os próprios códigos, datas viram dias desde a menor data e o resto passa por factorize.
+
+    Saída: códigos (int), função que converte códigos de volta em valores
+    """
+    if isinstance(coluna.dtype, pd.CategoricalDtype):
+        categorias = coluna.cat.categories
+        return coluna.cat.codes.to_numpy(), len(categorias), lambda codigos: pd.Categorical.from_codes(codigos, dtype=coluna.dtype)
+
+    if pd.api.types.is_datetime64_any_dtype(coluna):
+        nanossegundos = coluna.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        nulos = coluna.isna().to_numpy()
+        inicio = int(nanossegundos[~nulos].min()) if (~nulos).any() else 0
+        dias = np.where(nulos, -1, (nanossegundos - inicio) // _NS_POR_DIA)
+        tipo = coluna.dtype
+        return dias, int(dias.max()) + 1, lambda codigos: pd.DatetimeIndex(inicio + codigos * _NS_POR_DIA).astype(tipo)
+
+    codigos, valores = pd.factorize(coluna)
+    return codigos, len(valores), lambda codigos_grupo: valores.take(codigos_grupo)
+
+                                            # FUNÇÃO DE AGREGAÇÃO DE UMA PARTIÇÃO
+
+def _agregar_particao(colunas, inicio, fim, passos, medidas):
+    """ Roda num processo do pool: agrega as linhas [inicio, fim) lidas direto da memória compartilhada.
+    1 - junta os códigos das chaves numa chave int64 única (raiz mista) e descarta linhas com chave nula
+    2 - agrupa pela chave: contagem e, por medida, soma, soma dos quadrados, mínimo e máximo
+
+    Entrada: {nome: (nome da memória compartilhada, dtype, linhas)}, intervalo de linhas, passos das chaves, medidas
+    Saída: dataframe parcial indexado pela chave int64
+    """
+    blocos = {}
+    try:
+        vetores = {}
+        for nome, (nome_memoria, tipo, linhas) in colunas.items():
+            blocos[nome] = shared_memory.SharedMemory(name=nome_memoria)
+            vetores[nome] = np.ndarray(linhas, dtype=tipo, buffer=blocos[nome].buf)[inicio:fim]
+
+        chave = np.zeros(fim - inicio, dtype=np.int64)
+        validas = np.ones(fim - inicio, dtype=bool)
+        for nome, passo in passos.items():
+            codigos = vetores[nome].astype(np.int64)
+            validas &= codigos >= 0
+            chave += codigos * passo
+
+        parcial = {"chave": chave[validas], "n": np.ones(int(validas.sum()), dtype=np.int64)}
+        combinacao = {"n": "sum"}
+        for medida in medidas:
+            valores = vetores[medida][validas].astype(np.float64)
+            parcial.update({
+                f"{medida}_soma": valores,
+                f"{medida}_soma_quad": valores * valores,
+                f"{medida}_min": valores,
+                f"{medida}_max": valores,
+            })
+            combinacao.update({f"{medida}_soma": "sum", f"{medida}_soma_quad": "sum", f"{medida}_min": "min", f"{medida}_max": "max"})
+        return pd.DataFrame(parcial).groupby("chave", sort=False).agg(combinacao)
+    finally:
+        vetores = None
+        for bloco in blocos.values():
+            bloco.close()
+
+                                            # FUNÇÃO DE AGREGAÇÃO PARTICIONADA
+
+def agregar_particionado(df1, chaves, medidas, particoes=None):
+    """ Função que agrega estatísticas suficientes (n, soma, soma dos quadrados, mínimo e máximo) por chaves,
+    dividindo as linhas entre os processos do pool:
+    1 - codifica as chaves em inteiros pequenos e copia chaves e medidas, uma vez, para memória compartilhada
+    2 - divide as linhas em partições contíguas (com o dataframe ordenado por data, cada partição é um intervalo
+        de datas) e agrega cada uma num processo, lendo as colunas sem cópia
+    3 - combina as parciais (soma das contagens e somas, mínimo dos mínimos, máximo dos máximos) e decodifica as chaves
+
+    Como as estatísticas são as do cubo diário, médias e desvios saem exatamente com resumir_cubo.
+
+    Entrada: dataframe, lista de chaves, {nome da medida: coluna}, quantidade de partições (padrão = processos)
+    Saída: dataframe indexado pelas chaves (ordenado), com n e {medida}_soma/_soma_quad/_min/_max
+    """
+    particoes = particoes or quantidade_processos()
+    linhas = len(df1)
+
+    codificadas, decodificadores, cardinalidades, passos = {}, {}, {}, {}
+    passo = 1
+    for chave in reversed(chaves):
+        codigos, cardinalidade, decodificar = _codificar_chave(df1[chave])
+        codificadas[chave] = codigos
+        decodificadores[chave] = decodificar
+        cardinalidades[chave] = max(cardinalidade, 1)
+        passos[chave] = passo
+        passo *= cardinalidades[chave]
+
+    vetores = dict(codificadas)
+    for medida, coluna in medidas.items():
+        vetores[medida] = df1[coluna].to_numpy()
+
+    blocos, colunas = [], {}
+    try:
+        for nome, vetor in vetores.items():
+            vetor = np.ascontiguousarray(vetor)
+            bloco = shared_memory.SharedMemory(create=True, size=max(vetor.nbytes, 1))
+            blocos.append(bloco)
+            np.ndarray(vetor.shape, dtype=vetor.dtype, buffer=bloco.buf)[:] = vetor
+            colunas[nome] = (bloco.name, vetor.dtype.str, linhas)
+
+        limites = np.linspace(0, linhas, particoes + 1).astype(np.int64)
+        intervalos = [(int(inicio), int(fim)) for inicio, fim in zip(limites[:-1], limites[1:]) if fim > inicio]
+        try:
+            futuros = [executor().submit(_agregar_particao, colunas, inicio, fim, passos, list(medidas)) for inicio, fim in intervalos]
+            parciais = [futuro.result() for futuro in futuros]
+        except BrokenProcessPool:
+            # um processo do pool morreu (falta de memória, por exemplo): descarta o pool e agrega as mesmas
+            # partições aqui mesmo, para a página não quebrar
+            descartar_executor()
+            parciais = [_agregar_particao(colunas, inicio, fim, passos, list(medidas)) for inicio, fim in intervalos]
+    finally:
+        for bloco in blocos:
+            bloco.close()
+            bloco.unlink()
+
+    combinacao = {coluna: ("min" if coluna.endswith("_min") else "max" if coluna.endswith("_max") else "sum") for coluna in parciais[0].columns}
+    agregado = pd.concat(parciais).groupby(level=0, sort=True).agg(combinacao)
+
+    chave = agregado.index.to_numpy()
+    niveis = [decodificadores[nome]((chave // passos[nome]) % cardinalidades[nome]) for nome in chaves]
+    agregado.index = pd.MultiIndex.from_arrays(niveis, names=chaves)
+    return agregado
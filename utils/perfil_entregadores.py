@@ -0,0 +1,239 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from utils.cubo import chaves_agrupamento
+from utils.enriquecimento import ROTULOS_IDADE
+from utils.limpeza import concatenar_com_categorias
+from utils.paralelo import agregar_particionado, usar_paralelo
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Chaves do perfil dos entregadores: uma linha por entregador em cada dia, tráfego e cidade em que trabalhou.
+# Idade, condição do veículo e cidade mudam de um pedido para outro do mesmo entregador, e os filtros da sidebar
+# (data limite e tráfego) precisam continuar exatos: por isso o perfil não tem uma linha só por entregador
+CHAVES_PERFIL = ["Delivery_person_ID", "Order_Date", "Road_traffic_density", "City"]
+
+# Medidas guardadas no perfil (nome no perfil -> coluna do dataframe de pedidos)
+MEDIDAS_PERFIL = {
+    "time_taken": "time_taken",
+    "ratings": "Delivery_person_Ratings",
+    "age": "Delivery_person_Age",
+    "vehicle_condition": "Vehicle_condition",
+}
+
+# Pedidos do entregador em cada faixa etária (age_range), uma coluna por faixa: > 0 = o entregador esteve na faixa
+COLUNAS_FAIXA = [f"faixa_{posicao}" for posicao in range(len(ROTULOS_IDADE))]
+
+# Como cada coluna do perfil se combina ao juntar linhas (reagregar, juntar lotes novos)
+COMBINACAO_PERFIL = {"n": "sum"}
+for _medida in MEDIDAS_PERFIL:
+    COMBINACAO_PERFIL.update({
+        f"{_medida}_soma": "sum",
+        f"{_medida}_soma_quad": "sum",
+        f"{_medida}_min": "min",
+        f"{_medida}_max": "max",
+    })
+COMBINACAO_PERFIL.update({coluna: "sum" for coluna in COLUNAS_FAIXA})
+
+# Recortes da dimensão dos entregadores: para cada coluna, as estatísticas do perfil separadas por valor, lado a lado
+# na linha do entregador (tráfego e cidade são os filtros da sidebar e dos relatórios que a dimensão ainda responde)
+RECORTES_DIMENSAO = ["Road_traffic_density", "City"]
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE MONTAGEM DO PERFIL DOS ENTREGADORES
+
+def montar_perfil(df1, paralelo=None):
+    """ Função que materializa o perfil dos entregadores a partir dos pedidos:
+    1 - para cada medida (tempo, nota, idade e condição do veículo), monta soma, soma dos quadrados, mínimo e máximo
+    2 - conta os pedidos de cada faixa etária
+    3 - agrupa uma única vez por entregador, dia, tráfego e cidade (só as combinações que existem)
+
+    O tamanho do perfil é limitado por entregadores x dias (x tráfegos e cidades em que cada um trabalhou), não pela
+    quantidade de pedidos. Dataframes grandes são agregados no pool de processos (utils.paralelo), como o cubo.
+
+    Entrada: dataframe de pedidos (limpo e enriquecido), paralelo (None = decidir pelo tamanho)
+    Saída: perfil indexado pelas chaves
+    """
+    # entregadores como category: as chaves do perfil viram códigos inteiros nos agrupamentos das consultas
+    entregadores = df1["Delivery_person_ID"].astype("category").array
+    codigos_faixa = df1["age_range"].cat.codes.to_numpy()
+    faixas = {coluna: (codigos_faixa == posicao).astype(np.int64) for posicao, coluna in enumerate(COLUNAS_FAIXA)}
+
+    if usar_paralelo(len(df1)) if paralelo is None else paralelo:
+        base = pd.DataFrame({
+            **{chave: df1[chave].array for chave in CHAVES_PERFIL},
+            "Delivery_person_ID": entregadores,
+            **{coluna: df1[coluna].to_numpy() for coluna in MEDIDAS_PERFIL.values()},
+            **faixas,
+        })
+        agregado = agregar_particionado(base, CHAVES_PERFIL, MEDIDAS_PERFIL | {coluna: coluna for coluna in COLUNAS_FAIXA})
+        # das faixas só interessa a contagem (soma das marcações)
+        agregado = agregado.rename(columns={f"{coluna}_soma": coluna for coluna in COLUNAS_FAIXA})
+        return agregado.loc[:, list(COMBINACAO_PERFIL)].astype({coluna: np.int64 for coluna in COLUNAS_FAIXA})
+
+    colunas = {chave: df1[chave].array for chave in CHAVES_PERFIL}
+    colunas["Delivery_person_ID"] = entregadores
+    colunas["n"] = np.ones(len(df1), dtype=np.int64)
+    for medida, coluna in MEDIDAS_PERFIL.items():
+        valores = df1[coluna].to_numpy(dtype=np.float64)
+        colunas[f"{medida}_soma"] = valores
+        colunas[f"{medida}_soma_quad"] = valores * valores
+        colunas[f"{medida}_min"] = valores
+        colunas[f"{medida}_max"] = valores
+    colunas.update(faixas)
+
+    base = pd.DataFrame(colunas)
+    return base.groupby(CHAVES_PERFIL, observed=True, sort=True).agg(COMBINACAO_PERFIL)
+
+                                            # FUNÇÃO DE MONTAGEM DA DIMENSÃO DOS ENTREGADORES
+
+def montar_dimensao(df1, perfil=None):
+    """ Função que monta a dimensão dos entregadores, com uma linha por entregador:
+    1 - primeiro e último dia com pedidos e o veículo do pedido mais recente (dos pedidos)
+    2 - para cada recorte (tráfego e cidade), reagrupa o perfil por entregador e valor do recorte e põe os valores
+        lado a lado nas colunas: contagens, somas, mínimos, máximos e pedidos por faixa etária de cada um
+
+    O tamanho é limitado pela quantidade de entregadores, não pela de dias ou pedidos.
+
+    Entrada: dataframe de pedidos (limpo e enriquecido), perfil dos mesmos pedidos (None = montar)
+    Saída: DimensaoEntregadores
+    """
+    perfil = montar_perfil(df1) if perfil is None else perfil
+    pedidos = df1.loc[:, ["Delivery_person_ID", "Order_Date", "Type_of_vehicle"]]
+    pedidos = pedidos.assign(Delivery_person_ID=pedidos["Delivery_person_ID"].astype("category"))
+    # o pedido mais recente de cada entregador: o último na ordem estável por data
+    ultimos = pedidos.sort_values("Order_Date", kind="stable").groupby("Delivery_person_ID", observed=True, sort=True).last()
+    entregadores = pd.DataFrame({
+        "primeira_data": pedidos.groupby("Delivery_person_ID", observed=True, sort=True)["Order_Date"].min(),
+        "ultima_data": ultimos["Order_Date"],
+        "Type_of_vehicle": ultimos["Type_of_vehicle"],
+    })
+    recortes = {
+        chave: perfil.groupby(level=["Delivery_person_ID", chave], observed=True, sort=True).agg(COMBINACAO_PERFIL).unstack(chave)
+        for chave in RECORTES_DIMENSAO
+    }
+    return DimensaoEntregadores(entregadores, recortes)
+
+                                            # FUNÇÃO DE CONTAGEM DE ENTREGADORES PELO PERFIL
+
+def contar_entregadores(perfil, grupos):
+    """ Função que conta entregadores distintos (Delivery_person_ID.nunique()) direto do perfil, exatamente:
+    1 - monta as chaves de agrupamento (chaves do perfil ou derivadas, como Week)
+    2 - com age_range nos grupos, repete cada linha do perfil para cada faixa em que o entregador teve pedidos
+    3 - conta os entregadores distintos por grupo
+
+    Entrada: perfil (já filtrado), lista de grupos (chaves do perfil, derivadas e age_range; vazia = total geral)
+    Saída: dataframe com os grupos como colunas e Delivery_person_ID com a contagem
+    """
+    outros = [grupo for grupo in grupos if grupo != "age_range"]
+    base = pd.DataFrame({chave.name: chave for chave in chaves_agrupamento(perfil, outros)})
+    base["Delivery_person_ID"] = perfil.index.get_level_values("Delivery_person_ID")
+
+    if "age_range" in grupos:
+        presentes = perfil[COLUNAS_FAIXA].to_numpy() > 0
+        faixas = pd.CategoricalDtype(ROTULOS_IDADE, ordered=True)
+        base = pd.concat(
+            [base.loc[presentes[:, posicao]].assign(age_range=pd.Categorical.from_codes(
+                np.full(int(presentes[:, posicao].sum()), posicao), dtype=faixas)) for posicao in range(len(ROTULOS_IDADE))],
+            ignore_index=True,
+        )
+
+    if not grupos:
+        return pd.DataFrame({"Delivery_person_ID": [base["Delivery_person_ID"].nunique()]})
+    return base.groupby(list(grupos), observed=True, sort=True)["Delivery_person_ID"].nunique().reset_index()
+
+                                            # FUNÇÃO DE COMBINAÇÃO DE PERFIS
+
+def combinar_perfis(*perfis):
+    """ Função que junta perfis montados sobre pedidos diferentes (lotes novos) num perfil só: como o perfil guarda somas,
+    contagens, mínimos e máximos, basta reagregar pelas chaves (o custo depende do tamanho dos perfis).
+
+    Entrada: perfis
+    Saída: perfil combinado
+    """
+    juntos = pd.concat([perfil for perfil in perfis if perfil is not None])
+    return juntos.groupby(level=CHAVES_PERFIL, observed=True, sort=True).agg(COMBINACAO_PERFIL)
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class DimensaoEntregadores:
+    """ Dimensão dos entregadores: uma linha por entregador (dezenas de milhares, contra milhões de pedidos) com
+
+    - entregadores: primeiro e último dia com pedidos e o veículo do pedido mais recente
+    - recortes: para tráfego e cidade, as estatísticas do perfil (COMBINACAO_PERFIL) de cada valor, em colunas
+      (estatística, valor)
+
+    Responde o perfil sem os dias: vale quando o filtro de datas inclui todos os pedidos (cobre) e quando só um dos
+    recortes é filtrado ou agrupado (tráfego e cidade juntos precisam do perfil por entregador x dia x tráfego x cidade).
+    Como guarda somas, contagens, mínimos e máximos, é exatamente combinável com a de pedidos novos.
+    """
+
+    def __init__(self, entregadores, recortes):
+        self.entregadores = entregadores
+        self.recortes = recortes
+        # cada recorte também em linhas (entregador, valor), montadas uma vez: as consultas só filtram linhas
+        self._linhas = {chave: self._empilhar(tabela, chave) for chave, tabela in recortes.items()}
+
+    def __len__(self):
+        return len(self.entregadores)
+
+    def cobre(self, data_limite, data_inicial=None):
+        """ Diz se o filtro de datas (data limite e data inicial; None = sem data inicial) inclui todos os pedidos.
+        """
+        if len(self) == 0:
+            return True
+        if pd.Timestamp(data_limite) < self.entregadores["ultima_data"].max():
+            return False
+        return data_inicial is None or pd.Timestamp(data_inicial) <= self.entregadores["primeira_data"].min()
+
+    def valores(self, chave):
+        """ Valores do recorte presentes na dimensão (ex.: os tipos de tráfego).
+        """
+        return list(self.recortes[chave].columns.unique(level=chave))
+
+    @staticmethod
+    def _empilhar(tabela, chave):
+        longo = tabela.stack(chave, future_stack=True)
+        longo = longo.loc[longo["n"].fillna(0).to_numpy() > 0]
+        # as colunas ficam float ao pôr os valores lado a lado (combinações sem pedidos viram NaN): contagens voltam a inteiros
+        return longo.astype({coluna: np.int64 for coluna in ["n"] + COLUNAS_FAIXA})
+
+    def perfil(self, chave, valores=None):
+        """ Perfil sem os dias, indexado por entregador e valor do recorte (só as combinações com pedidos),
+        com as mesmas colunas do perfil (COMBINACAO_PERFIL): serve ao resumir_cubo e ao contar_entregadores.
+
+        Entrada: coluna do recorte, valores mantidos (None = todos)
+        Saída: dataframe indexado por Delivery_person_ID e a coluna do recorte (somente leitura)
+        """
+        longo = self._linhas[chave]
+        if valores is None:
+            return longo
+        linhas = longo.index.get_level_values(chave).isin(valores)
+        return longo if linhas.all() else longo.loc[linhas]
+
+    def combinar(self, outra):
+        """ Junta esta dimensão à de outros pedidos (lotes novos): datas por mínimo e máximo, o veículo do pedido mais
+        recente (a outra vence empates: seus pedidos chegaram depois) e as estatísticas reagregadas por entregador e valor.
+        """
+        juntos = concatenar_com_categorias([self.entregadores.reset_index(), outra.entregadores.reset_index()])
+        juntos = juntos.sort_values("ultima_data", kind="stable").groupby("Delivery_person_ID", observed=True, sort=True)
+        entregadores = pd.DataFrame({
+            "primeira_data": juntos["primeira_data"].min(),
+            "ultima_data": juntos["ultima_data"].last(),
+            "Type_of_vehicle": juntos["Type_of_vehicle"].last(),
+        })
+        recortes = {}
+        for chave in RECORTES_DIMENSAO:
+            longo = pd.concat([self.perfil(chave), outra.perfil(chave)])
+            recortes[chave] = longo.groupby(level=["Delivery_person_ID", chave], observed=True, sort=True).agg(COMBINACAO_PERFIL).unstack(chave)
+        return DimensaoEntregadores(entregadores, recortes)
@@ -0,0 +1,234 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import threading
+import time
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils import configuracao
+from utils.consultas import consulta
+from utils.cubo import DERIVADAS_CUBO
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Séries previstas: pedidos e entregadores distintos em cada período (dia ou semana), por cidade e no total
+CONSULTAS_PREVISAO = {
+    "dia": consulta(["Order_Date", "City"], pedidos=("count", None), entregadores=("nunique", "Delivery_person_ID")),
+    "dia_total": consulta(["Order_Date"], pedidos=("count", None), entregadores=("nunique", "Delivery_person_ID")),
+    "semana": consulta(["Week", "City"], pedidos=("count", None), entregadores=("nunique", "Delivery_person_ID")),
+    "semana_total": consulta(["Week"], pedidos=("count", None), entregadores=("nunique", "Delivery_person_ID")),
+}
+MEDIDAS_PREVISAO = ["pedidos", "entregadores"]
+
+# Frequências das séries: frequência do pandas das datas e período sazonal (a semana, nas séries diárias). As semanas
+# são marcadas pelo domingo em que começam, por isso "W-SUN"
+FREQUENCIAS_PREVISAO = {"dia": ("D", 7), "semana": ("W-SUN", None)}
+
+# Nome da série com todas as cidades juntas
+TODAS_CIDADES = "Todas"
+
+# Nível do intervalo de previsão (80%: a faixa que o planejamento de capacidade costuma usar)
+NIVEL_PREVISAO = 0.8
+
+# Pontos mínimos para estimar tendência e ciclos sazonais mínimos para estimar a sazonalidade; com menos de
+# MINIMO_PONTOS_MODELO pontos a previsão repete o último valor
+MINIMO_PONTOS_TENDENCIA = 10
+MINIMO_CICLOS_SAZONAIS = 3
+MINIMO_PONTOS_MODELO = 4
+
+# Previsões ajustadas de uma versão dos dados
+Previsoes = namedtuple("Previsoes", ["versao", "tabela", "segundos"])
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE INÍCIO DA SEMANA
+
+def inicio_semana(datas):
+    """ Função que devolve o domingo de cada data (semanas começando no domingo, como a Week das páginas).
+    """
+    datas = pd.DatetimeIndex(datas).normalize()
+    return datas - pd.to_timedelta((datas.dayofweek + 1) % 7, unit="D")
+
+                                            # FUNÇÃO DE MONTAGEM DAS SÉRIES
+
+def series_previsao(backend):
+    """ Função que monta as séries históricas das previsões a partir das agregações do backend (cubo e perfil no pandas,
+    SQL no DuckDB), com todos os pedidos, sem os filtros da sidebar:
+    1 - pedidos e entregadores distintos por dia e por semana, por cidade e no total
+    2 - a Week (semana do ano) vira o domingo da semana; semanas incompletas nas pontas do período ficam de fora
+        (uma semana com três dias de dados puxaria a previsão para baixo)
+    3 - períodos sem pedidos entram com zero
+
+    Entrada: backend de consultas
+    Saída: dataframe longo com frequencia, City, medida, data e real
+    """
+    data_inicial, data_final = backend.limites_data()
+    trafegos = backend.valores("Road_traffic_density")
+    dias = pd.date_range(data_inicial.normalize(), data_final.normalize(), freq="D")
+    calendario = pd.DataFrame({"data": inicio_semana(dias), "Week": DERIVADAS_CUBO["Week"](dias.to_series())})
+    completas = calendario.groupby("data").filter(lambda semana: len(semana) == 7).drop_duplicates("Week")
+    datas = {"dia": dias, "semana": pd.DatetimeIndex(completas["data"])}
+
+    series = []
+    for frequencia in FREQUENCIAS_PREVISAO:
+        por_cidade = backend.agregar(CONSULTAS_PREVISAO[frequencia], data_final, trafegos)
+        total = backend.agregar(CONSULTAS_PREVISAO[f"{frequencia}_total"], data_final, trafegos).assign(City=TODAS_CIDADES)
+        agregado = pd.concat([por_cidade.astype({"City": str}), total], ignore_index=True)
+        if frequencia == "semana":
+            agregado = agregado.merge(completas, on="Week").drop(columns="Week")
+        else:
+            agregado = agregado.rename(columns={"Order_Date": "data"})
+        for cidade, grupo in agregado.groupby("City", sort=True):
+            grupo = grupo.set_index("data")[MEDIDAS_PREVISAO].reindex(datas[frequencia], fill_value=0).rename_axis("data")
+            for medida in MEDIDAS_PREVISAO:
+                series.append(pd.DataFrame({
+                    "frequencia": frequencia, "City": cidade, "medida": medida, "data": grupo.index, "real": grupo[medida].to_numpy(dtype=np.float64),
+                }))
+    colunas = ["frequencia", "City", "medida", "data", "real"]
+    return pd.concat(series, ignore_index=True) if series else pd.DataFrame(columns=colunas)
+
+                                            # FUNÇÃO DE AJUSTE DE UMA SÉRIE
+
+def ajustar_serie(serie, frequencia, horizonte):
+    """ Função que ajusta um modelo de suavização exponencial (ETS do statsmodels, erro aditivo) a uma série e projeta
+    os próximos períodos com o intervalo de previsão:
+    1 - escolhe o modelo pelo tamanho da série: sazonalidade semanal nas séries diárias com MINIMO_CICLOS_SAZONAIS
+        semanas, tendência amortecida com MINIMO_PONTOS_TENDENCIA pontos e só o nível abaixo disso
+    2 - séries curtas demais (ou em que o ajuste falha, como uma série toda zerada) repetem o último valor
+    3 - contagens não ficam negativas
+
+    Entrada: série indexada pelas datas (frequência regular), frequência ("dia" ou "semana"), períodos projetados
+    Saída: (dataframe com data, previsto, inferior e superior; nome do modelo)
+    """
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    passo, periodo_sazonal = FREQUENCIAS_PREVISAO[frequencia]
+    datas = pd.date_range(serie.index[-1], periods=horizonte + 1, freq=passo)[1:]
+    if len(serie) >= MINIMO_PONTOS_MODELO and serie.std() > 0:
+        sazonal = periodo_sazonal is not None and len(serie) >= MINIMO_CICLOS_SAZONAIS * periodo_sazonal
+        tendencia = len(serie) >= MINIMO_PONTOS_TENDENCIA
+        try:
+            with warnings.catch_warnings():
+                # avisos de convergência do otimizador em séries curtas: o modelo ainda serve e o intervalo mostra a incerteza
+                warnings.simplefilter("ignore")
+                modelo = ETSModel(
+                    serie.set_axis(pd.DatetimeIndex(serie.index, freq=passo)),
+                    error="add",
+                    trend="add" if tendencia else None,
+                    damped_trend=tendencia,
+                    seasonal="add" if sazonal else None,
+                    seasonal_periods=periodo_sazonal if sazonal else None,
+                ).fit(disp=False)
+                projecao = modelo.get_prediction(start=len(serie), end=len(serie) + horizonte - 1).summary_frame(alpha=1 - NIVEL_PREVISAO)
+            nome = "ETS " + " + ".join(["nível"] + ["tendência amortecida"] * tendencia + ["sazonalidade semanal"] * sazonal)
+            previsto = pd.DataFrame({
+                "data": datas,
+                "previsto": projecao["mean"].to_numpy(),
+                "inferior": projecao["pi_lower"].to_numpy(),
+                "superior": projecao["pi_upper"].to_numpy(),
+            })
+            return previsto.assign(**{coluna: previsto[coluna].clip(lower=0) for coluna in ["previsto", "inferior", "superior"]}), nome
+        except (ValueError, np.linalg.LinAlgError):
+            pass
+    ultimo = float(serie.iloc[-1]) if len(serie) else np.nan
+    return pd.DataFrame({"data": datas, "previsto": ultimo, "inferior": np.nan, "superior": np.nan}), "último valor"
+
+                                            # FUNÇÃO DE AJUSTE DAS PREVISÕES
+
+def ajustar_previsoes(series, horizonte_semanas=None):
+    """ Função que ajusta um modelo por frequência, cidade e medida e junta histórico e projeção numa tabela só,
+    pronta para desenhar: as linhas do histórico têm `real` e as da projeção têm previsto, inferior e superior.
+
+    Entrada: séries (series_previsao), semanas projetadas (padrão: CURRY_HORIZONTE_PREVISAO_SEMANAS; as diárias
+             projetam os mesmos dias)
+    Saída: dataframe com frequencia, City, medida, data, real, previsto, inferior, superior e modelo
+    """
+    horizonte_semanas = configuracao.HORIZONTE_PREVISAO_SEMANAS if horizonte_semanas is None else horizonte_semanas
+    horizontes = {"dia": 7 * horizonte_semanas, "semana": horizonte_semanas}
+    partes = []
+    for (frequencia, cidade, medida), historico in series.groupby(["frequencia", "City", "medida"], sort=True):
+        projecao, modelo = ajustar_serie(historico.set_index("data")["real"], frequencia, horizontes[frequencia])
+        projecao = projecao.assign(frequencia=frequencia, City=cidade, medida=medida)
+        partes.append(pd.concat([historico, projecao], ignore_index=True).assign(modelo=modelo))
+    colunas = ["frequencia", "City", "medida", "data", "real", "previsto", "inferior", "superior", "modelo"]
+    return pd.concat(partes, ignore_index=True).loc[:, colunas] if partes else pd.DataFrame(columns=colunas)
+
+                                            # FUNÇÃO DAS PREVISÕES COMPARTILHADAS
+
+@st.cache_resource(show_spinner=False)
+def previsoes_compartilhadas():
+    """ Guarda, uma vez por processo, as previsões ajustadas (PrevisoesCompartilhadas): todas as sessões usam os mesmos modelos.
+    """
+    return PrevisoesCompartilhadas()
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class PrevisoesCompartilhadas:
+    """ Previsões de pedidos e entregadores do processo, ajustadas fora do caminho das páginas:
+
+    - a primeira página que pede as previsões de uma versão dos dados monta as séries (poucas agregações do backend)
+      e dispara o ajuste dos modelos numa thread; ela e as outras sessões seguem sem esperar
+    - enquanto a thread trabalha, quem pede recebe as previsões da versão anterior (ou None na primeira vez)
+    - os modelos só são reajustados quando a versão dos dados muda (recarga ou pedidos novos incorporados); se o ajuste
+      de uma versão falhar, o erro fica em `erro` e ela não é tentada de novo
+
+    Mostrar uma previsão pronta custa só filtrar a tabela e desenhar as linhas.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.prontas = None
+        self.ajustando = None
+        self.erro = None
+
+    def obter(self, backend):
+        """ Devolve as previsões disponíveis e dispara o ajuste da versão atual dos dados, se ainda não foi feito.
+
+        Entrada: backend de consultas
+        Saída: (Previsoes ou None, True quando elas são da versão atual dos dados)
+        """
+        versao = backend.versao
+        with self._trava:
+            prontas = self.prontas
+            if prontas is not None and prontas.versao == versao:
+                return prontas, True
+            falhou = self.erro is not None and self.erro[0] == versao
+            disparar = self.ajustando != versao and not falhou
+            if disparar:
+                self.ajustando = versao
+        if disparar:
+            try:
+                series = series_previsao(backend)
+            except Exception:
+                with self._trava:
+                    self.ajustando = None
+                raise
+            threading.Thread(target=self._ajustar, args=(versao, series), name="curry-previsao", daemon=True).start()
+        return prontas, False
+
+    def _ajustar(self, versao, series):
+        inicio = time.perf_counter()
+        try:
+            tabela = ajustar_previsoes(series)
+        except Exception as erro:
+            with self._trava:
+                self.erro = (versao, f"{type(erro).__name__}: {erro}")
+                if self.ajustando == versao:
+                    self.ajustando = None
+            return
+        with self._trava:
+            self.prontas = Previsoes(versao, tabela, time.perf_counter() - inicio)
+            self.erro = None
+            if self.ajustando == versao:
+                self.ajustando = None
@@ -0,0 +1,100 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from utils.consultas import consulta
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Métricas por entregador que podem ordenar o ranking (coluna da tabela de estatísticas -> menor valor é melhor?)
+METRICAS_RANKING = {
+    "time_taken": True,
+    "time_taken_p90": True,
+    "ratings": False,
+    "entregas": False,
+}
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DA CONSULTA DE ESTATÍSTICAS POR ENTREGADOR
+
+def consulta_estatisticas_entregadores(grupo="City", quantis=True):
+    """ Função que descreve, como uma consulta (utils.consultas), tudo o que os rankings usam por (grupo, entregador):
+    quantidade de entregas, tempo médio, avaliação média e, com quantis=True, percentil 90 do tempo.
+    Sem o percentil, o backend pandas responde tudo pelo perfil dos entregadores, sem voltar aos pedidos (com todas as
+    datas e todos os tráfegos, pela dimensão dos entregadores, com uma linha por entregador).
+    """
+    medidas = {
+        "entregas": ("count", None),
+        "time_taken": ("mean", "time_taken"),
+        "ratings": ("mean", "Delivery_person_Ratings"),
+    }
+    if quantis:
+        medidas["time_taken_p90"] = ("p90", "time_taken")
+    return consulta([grupo, "Delivery_person_ID"], **medidas)
+
+                                            # FUNÇÃO DE ESTATÍSTICAS POR ENTREGADOR
+
+def estatisticas_entregadores(consultas, grupo="City", quantis=True):
+    """ Função que calcula, numa única consulta agrupada por (grupo, entregador), tudo o que os rankings usam.
+    O resultado é pequeno (uma linha por entregador e cidade) e serve para qualquer métrica e qualquer k.
+
+    Entrada: consultas com os filtros da sidebar (utils.consultas.ConsultasFiltradas), coluna que separa os rankings,
+             se calcula o percentil 90 (só o ranking por p90 precisa dele)
+    Saída: dataframe com grupo, Delivery_person_ID, entregas, time_taken, ratings e time_taken_p90 (com quantis=True)
+    """
+    return consultas.agregar(consulta_estatisticas_entregadores(grupo, quantis))
+
+                                            # FUNÇÃO DE SELEÇÃO PARCIAL
+
+def _menores_k(valores, k):
+    """ Posições dos k menores valores em ordem crescente: argpartition (O(n)) e ordenação só dos k escolhidos.
+    Empates saem na ordem original das linhas.
+    """
+    if k <= 0 or len(valores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(valores):
+        escolhidos = np.argpartition(valores, k - 1)[:k]
+        # o argpartition não garante quais empatados no k-ésimo valor entram: completa com todos os empatados
+        # e corta depois da ordenação estável
+        empatados = np.flatnonzero(valores == valores[escolhidos].max())
+        escolhidos = np.union1d(escolhidos, empatados)
+    else:
+        escolhidos = np.arange(len(valores))
+    ordem = np.lexsort((escolhidos, valores[escolhidos]))
+    return escolhidos[ordem][:k]
+
+                                            # FUNÇÃO DE RANKING DOS EXTREMOS
+
+def ranking_extremos(estatisticas, metrica="time_taken", k=10, minimo_entregas=1, grupo="City"):
+    """ Função que devolve as duas pontas do ranking de entregadores de cada grupo numa passada só:
+    1 - descarta entregadores com menos de minimo_entregas entregas e sem valor para a métrica
+    2 - para cada grupo, seleciona os k menores e os k maiores valores com seleção parcial (argpartition),
+        sem ordenar todos os entregadores
+    3 - ordena os extremos do melhor para o pior, conforme a métrica (menor tempo é melhor, maior nota é melhor)
+
+    Entrada: estatísticas por entregador (estatisticas_entregadores), métrica, k, mínimo de entregas, coluna do grupo
+    Saída: (melhores, piores), dataframes com grupo, Delivery_person_ID, a métrica e as entregas
+    """
+    colunas = [grupo, "Delivery_person_ID", metrica] + (["entregas"] if metrica != "entregas" else [])
+    validos = estatisticas.loc[(estatisticas["entregas"] >= minimo_entregas) & estatisticas[metrica].notna(), colunas]
+    menor_melhor = METRICAS_RANKING[metrica]
+
+    melhores, piores = [], []
+    for _, linhas in validos.groupby(grupo, observed=True, sort=True):
+        valores = linhas[metrica].to_numpy(dtype=np.float64)
+        menores = linhas.iloc[_menores_k(valores, k)]
+        maiores = linhas.iloc[_menores_k(-valores, k)]
+        melhores.append(menores if menor_melhor else maiores)
+        piores.append(maiores if menor_melhor else menores)
+
+    if not melhores:
+        vazio = validos.iloc[:0].reset_index(drop=True)
+        return vazio, vazio.copy()
+    return pd.concat(melhores, ignore_index=True), pd.concat(piores, ignore_index=True)
@@ -0,0 +1,288 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import configuracao
+from utils.comparacao import GERAL, comparar_festival, tabela_festival
+from utils.consultas import CONSULTAS_PAGINAS, ConsultasFiltradas, criar_backend
+from utils.dados import CAMINHO_DATASET
+from utils.graficos import reamostrar_datas, reduzir_barras, reduzir_linha
+from utils.paralelo import descartar_executor, executor, quantidade_processos
+from utils.relatorio_pdf import desenhar_pdf
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Um relatório: título, intervalo de datas (inclusivo), tipos de tráfego e cidades (None = todas)
+Relatorio = namedtuple("Relatorio", ["titulo", "data_inicial", "data_limite", "trafegos", "cidades"])
+
+# Como um lote pode ser dividido (--por): um relatório por cidade, por mês ou por semana (semanas começando no domingo,
+# como a Week das páginas); "total" é um relatório só com o período inteiro
+PERIODOS_RELATORIO = {"mes": ("M", "%m/%Y"), "semana": ("W-SAT", "semana de %d/%m/%Y")}
+DIVISOES_RELATORIO = ["total", "cidade", *PERIODOS_RELATORIO]
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE PLANEJAMENTO DO LOTE
+
+def planejar_relatorios(backend, data_inicial, data_limite, trafegos, por=("total",)):
+    """ Função que monta a lista de relatórios de um lote:
+    1 - divide o intervalo de datas em meses ou semanas (com "mes" ou "semana" em `por`), cortados nas pontas do intervalo
+    2 - com "cidade" em `por`, faz um relatório por cidade do dataset
+    3 - combina as duas divisões (ex.: por=("cidade", "mes") = um relatório por cidade e mês)
+
+    Entrada: backend de consultas, data inicial, data limite, tipos de tráfego, divisões (DIVISOES_RELATORIO)
+    Saída: lista de Relatorio
+    """
+    desconhecidas = set(por) - set(DIVISOES_RELATORIO)
+    if desconhecidas:
+        raise ValueError(f"Divisão de relatórios desconhecida: {', '.join(sorted(desconhecidas))} (use {', '.join(DIVISOES_RELATORIO)})")
+    data_inicial, data_limite = pd.Timestamp(data_inicial), pd.Timestamp(data_limite)
+
+    periodos = [(data_inicial, data_limite, None)]
+    for divisao, (frequencia, formato) in PERIODOS_RELATORIO.items():
+        if divisao in por:
+            periodos = [
+                (max(inicio, periodo.start_time), min(fim, periodo.end_time.normalize()), periodo.start_time.strftime(formato))
+                for inicio, fim, _ in periodos
+                for periodo in pd.period_range(inicio, fim, freq=frequencia)
+            ]
+    cidades = [[cidade] for cidade in backend.valores("City")] if "cidade" in por else [None]
+
+    relatorios = []
+    for (inicio, fim, rotulo), selecionadas in product(periodos, cidades):
+        partes = ["Relatório Cury Company"] + (selecionadas or []) + ([rotulo] if rotulo else [])
+        relatorios.append(Relatorio(" - ".join(partes), inicio, fim, list(trafegos), selecionadas))
+    return relatorios
+
+                                            # FUNÇÃO DE DADOS DE UM RELATÓRIO
+
+def dados_relatorio(consultas):
+    """ Função que calcula tudo o que um relatório mostra, com as mesmas consultas (CONSULTAS_PAGINAS) e as mesmas
+    reduções de pontos (utils.graficos) das páginas Visão Empresa e Visão Restaurante:
+    1 - métricas da Análise Geral (pedidos, entregadores únicos, distância média, tempo com e sem festival)
+    2 - tabelas dos gráficos da Visão Empresa e da Visão Restaurante (com a comparação do festival, utils.comparacao)
+
+    O resultado é pequeno (tabelas agregadas) e vai para os processos que desenham os PDFs.
+
+    Entrada: consultas com os filtros do relatório
+    Saída: dicionário nome -> tabela (ou (tabela, período) para os pedidos por período; lista de pares para as métricas)
+    """
+    pedidos_por_trafego = consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_trafego"])
+    entregadores = consultas.agregar(CONSULTAS_PAGINAS["entregadores_unicos"])["Delivery_person_ID"].iloc[0]
+    distancia = consultas.agregar(CONSULTAS_PAGINAS["distancia_media"])["distance"].iloc[0]
+    festival = comparar_festival(consultas.agregar(CONSULTAS_PAGINAS["tempo_por_festival"]))
+    geral = festival[festival["dimensao"] == GERAL]
+    geral = geral.iloc[0] if not geral.empty else pd.Series(np.nan, index=["media_com", "std_com", "media_sem", "std_sem"])
+
+    def minutos(valor):
+        return "-" if pd.isna(valor) else f"{valor:.2f} min"
+
+    metricas = [
+        ("Pedidos", f"{int(pedidos_por_trafego['ID'].sum()):,}"),
+        ("Entregadores Únicos", f"{0 if pd.isna(entregadores) else int(entregadores):,}"),
+        ("Distância Média", "-" if pd.isna(distancia) else f"{distancia:.2f} km"),
+        ("Tempo Médio (c/ Festival)", minutos(geral["media_com"])),
+        ("Desvio Padrão (c/ Festival)", minutos(geral["std_com"])),
+        ("Tempo Médio (s/ Festival)", minutos(geral["media_sem"])),
+        ("Desvio Padrão (s/ Festival)", minutos(geral["std_sem"])),
+    ]
+
+    por_entregador = consultas.agregar(CONSULTAS_PAGINAS["pedidos_e_entregadores_por_semana"])
+    por_entregador["order_by_deliver"] = por_entregador["ID"] / por_entregador["Delivery_person_ID"]
+
+    tempo_por_pedido = consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade_e_pedido"])
+    tempo_por_pedido.columns = ["Cidade", "Tipo de Pedido", "Tempo Médio", "Desvio Padrão"]
+    tempo_por_trafego = consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade_e_trafego"])
+    tempo_por_trafego.columns = ["Cidade", "Tráfego", "Tempo Médio", "Desvio Padrão"]
+    percentis = consultas.agregar(CONSULTAS_PAGINAS["percentis_por_cidade"]).round(1)
+    percentis.columns = ["Cidade", "Pedidos", "p50 (min)", "p90 (min)", "p99 (min)"]
+
+    return {
+        "metricas": metricas,
+        "pedidos_por_periodo": reamostrar_datas(consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_dia"]), "Order_Date", ["ID"]),
+        "pedidos_por_trafego": pedidos_por_trafego,
+        "pedidos_por_cidade_trafego": consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_cidade_trafego"]),
+        "pedidos_por_semana": reduzir_barras(consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_semana"]), "Week", ["ID"]),
+        "pedidos_por_entregador": reduzir_linha(por_entregador, "Week", "order_by_deliver"),
+        "distancia_por_cidade": consultas.agregar(CONSULTAS_PAGINAS["distancia_por_cidade"]),
+        "tempo_por_cidade": consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade"]),
+        "tempo_por_cidade_e_pedido": tempo_por_pedido,
+        "tempo_por_cidade_e_trafego": tempo_por_trafego,
+        "efeito_festival": tabela_festival(festival),
+        "percentis_por_cidade": percentis,
+    }
+
+                                            # FUNÇÃO DE NOME DE ARQUIVO
+
+def nome_arquivo(titulo):
+    """ Função que transforma o título de um relatório num nome de arquivo (sem acentos, espaços ou barras).
+    """
+    sem_acentos = unicodedata.normalize("NFKD", titulo).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", sem_acentos.lower()).strip("_")
+
+                                            # FUNÇÃO DE DESENHO DE UM PDF
+
+def _desenhar(tarefa):
+    """ Função que desenha um PDF aqui mesmo (sem o pool) e devolve a situação: "ok" ou a mensagem do erro.
+    """
+    try:
+        desenhar_pdf(*tarefa)
+        return "ok"
+    except Exception as erro:
+        return f"erro: {erro}"
+
+                                            # FUNÇÃO DE ESPERA DOS PDFS DO POOL
+
+def _esperar(futuros, prazo, situacoes):
+    """ Função que espera os PDFs enviados ao pool até o prazo:
+    1 - os que não começaram até lá são cancelados (os que já estão desenhando terminam o relatório atual)
+    2 - se um processo do pool morreu, descarta o pool e desenha aqui mesmo os que falharam por isso, se ainda houver tempo
+
+    Entrada: {futuro: (posição, tarefa)}, prazo (time.monotonic), lista de situações (atualizada)
+    """
+    feitos, pendentes = wait(futuros, timeout=max(prazo - time.monotonic(), 0))
+    for futuro in pendentes:
+        futuro.cancel()
+    refazer = []
+    for futuro in feitos:
+        posicao, tarefa = futuros[futuro]
+        erro = futuro.exception()
+        if isinstance(erro, BrokenProcessPool):
+            refazer.append((posicao, tarefa))
+        else:
+            situacoes[posicao] = "ok" if erro is None else f"erro: {erro}"
+    if refazer:
+        descartar_executor()
+    for posicao, tarefa in sorted(refazer, key=lambda item: item[0]):
+        if time.monotonic() < prazo:
+            situacoes[posicao] = _desenhar(tarefa)
+
+                                            # FUNÇÃO DE JUNÇÃO DOS PDFS
+
+def juntar_pdfs(arquivos, titulos, destino):
+    """ Função que junta os PDFs de um lote num arquivo só (PyPDF2), com um marcador por relatório.
+
+    Entrada: arquivos, títulos dos marcadores, caminho do PDF final
+    """
+    from PyPDF2 import PdfWriter
+
+    escritor = PdfWriter()
+    for arquivo, titulo in zip(arquivos, titulos):
+        escritor.append(str(arquivo), outline_item=titulo)
+    with open(destino, "wb") as saida:
+        escritor.write(saida)
+
+                                            # FUNÇÃO DE GERAÇÃO DO LOTE
+
+def gerar_relatorios(relatorios, pasta, caminho=CAMINHO_DATASET, tempo_limite=None, arquivo_unico=None, backend=None):
+    """ Função que gera um lote de relatórios em PDF sem servidor do streamlit:
+    1 - carrega o backend uma vez, fora do cache do streamlit (criar_backend; no pandas, a base limpa vem do cache em
+        disco e o cubo, os sketches e o perfil são montados uma vez e servem todos os relatórios)
+    2 - calcula os dados de cada relatório aqui mesmo (consultas de milissegundos sobre as estruturas pré-agregadas)
+        e já manda o PDF para o pool de processos (utils.paralelo), que desenha enquanto os próximos são consultados
+    3 - o lote inteiro tem um prazo (CURRY_TEMPO_LIMITE_RELATORIOS_S): relatórios não consultados ou não desenhados
+        até lá ficam como "tempo esgotado" no resumo
+    4 - opcionalmente junta os PDFs prontos num arquivo só
+
+    Com um processo só (CURRY_PROCESSOS=1 ou máquina de um núcleo), os PDFs são desenhados aqui mesmo, um a um.
+
+    Entrada: lista de Relatorio, pasta de saída, caminho do csv, tempo limite (s), caminho do PDF único, backend já carregado
+    Saída: dataframe com título, arquivo e situação de cada relatório e os tempos do lote (attrs)
+    """
+    tempo_limite = configuracao.TEMPO_LIMITE_RELATORIOS_S if tempo_limite is None else tempo_limite
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    prazo = time.monotonic() + tempo_limite
+    backend = backend or criar_backend(caminho)
+    carga = time.perf_counter() - inicio
+
+    arquivos = [pasta / f"{nome_arquivo(relatorio.titulo)}.pdf" for relatorio in relatorios]
+    situacoes = ["tempo esgotado"] * len(relatorios)
+    paralelo = quantidade_processos() > 1 and len(relatorios) > 1
+    futuros, consultas_s = {}, 0.0
+    for posicao, relatorio in enumerate(relatorios):
+        if time.monotonic() >= prazo:
+            break
+        antes = time.perf_counter()
+        consultas = ConsultasFiltradas(
+            backend, relatorio.data_limite, relatorio.trafegos, data_inicial=relatorio.data_inicial, cidades=relatorio.cidades,
+        )
+        tarefa = (relatorio, dados_relatorio(consultas), arquivos[posicao])
+        consultas_s += time.perf_counter() - antes
+        if paralelo:
+            try:
+                futuros[executor().submit(desenhar_pdf, *tarefa)] = (posicao, tarefa)
+                continue
+            except BrokenProcessPool:
+                descartar_executor()
+                paralelo = False
+        situacoes[posicao] = _desenhar(tarefa)
+    _esperar(futuros, prazo, situacoes)
+
+    resumo = pd.DataFrame({"titulo": [relatorio.titulo for relatorio in relatorios], "arquivo": [str(arquivo) for arquivo in arquivos], "situacao": situacoes})
+    prontos = resumo[resumo["situacao"] == "ok"]
+    if arquivo_unico and not prontos.empty:
+        juntar_pdfs(prontos["arquivo"], prontos["titulo"], arquivo_unico)
+    resumo.attrs.update({"carga_s": carga, "consultas_s": consultas_s, "total_s": time.perf_counter() - inicio})
+    return resumo
+
+                                            # FUNÇÃO PRINCIPAL
+
+def main():
+    """ Gera relatórios em PDF das visões Empresa e Restaurante sem subir o streamlit, para um intervalo de datas e
+    condições de trânsito, opcionalmente um por cidade, mês ou semana (ex.: python -m utils.relatorio --por cidade mes).
+    Sai com código 1 se algum relatório não ficou pronto.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--csv", default=CAMINHO_DATASET)
+    parser.add_argument("--de", help="data inicial (AAAA-MM-DD; padrão: primeira data do dataset)")
+    parser.add_argument("--ate", help="data limite (AAAA-MM-DD; padrão: última data do dataset)")
+    parser.add_argument("--trafegos", nargs="*", help="condições de trânsito (padrão: todas)")
+    parser.add_argument("--por", nargs="+", default=["total"], choices=DIVISOES_RELATORIO, help="um relatório por cidade, mês e/ou semana")
+    parser.add_argument("--saida", default="relatorios", help="pasta dos PDFs")
+    parser.add_argument("--juntar", help="caminho de um PDF único com todos os relatórios")
+    parser.add_argument("--tempo-limite", type=float, default=None, help="segundos para o lote inteiro (padrão: CURRY_TEMPO_LIMITE_RELATORIOS_S)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    backend = criar_backend(args.csv)
+    carga = time.perf_counter() - inicio
+    data_inicial, data_final = backend.limites_data()
+    trafegos = backend.valores("Road_traffic_density") if args.trafegos is None else args.trafegos
+    relatorios = planejar_relatorios(backend, args.de or data_inicial, args.ate or data_final, trafegos, args.por)
+
+    resumo = gerar_relatorios(relatorios, args.saida, args.csv, args.tempo_limite, args.juntar, backend=backend)
+    for linha in resumo.itertuples(index=False):
+        print(f"{linha.situacao:>15} | {linha.arquivo}")
+    tempos = resumo.attrs
+    print(
+        f"{(resumo['situacao'] == 'ok').sum()}/{len(resumo)} relatórios em {time.perf_counter() - inicio:.1f} s "
+        f"(carga {carga:.1f} s, consultas {tempos['consultas_s']:.1f} s, processos: {quantidade_processos()})"
+    )
+    if args.juntar and (resumo["situacao"] == "ok").any():
+        print(f"PDF único: {args.juntar}")
+    if (resumo["situacao"] != "ok").any():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
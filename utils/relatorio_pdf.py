@@ -0,0 +1,284 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import math
+
+import pandas as pd
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import KeepTogether, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+# Este módulo só desenha: recebe as tabelas já agregadas (utils.relatorio) e não importa o streamlit nem os backends,
+# para que os processos do pool que desenham os PDFs subam rápido
+
+# Página A4 deitada, como as páginas do dashboard (layout wide)
+TAMANHO_PAGINA = landscape(A4)
+MARGEM = 1.5 * cm
+LARGURA_UTIL = TAMANHO_PAGINA[0] - 2 * MARGEM
+
+# Cores das séries (as mesmas da paleta padrão do Plotly usada nas páginas)
+CORES = [colors.HexColor(cor) for cor in ("#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A", "#19D3F3", "#FF6692", "#B6E880")]
+
+# Máximo de rótulos no eixo x dos gráficos (com mais categorias, só alguns aparecem)
+LIMITE_ROTULOS_EIXO = 16
+
+# Mensagem das seções sem dados (a mesma das páginas)
+SEM_DADOS = "Nenhum dado disponível para os filtros selecionados."
+
+_ESTILOS = getSampleStyleSheet()
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE FORMATAÇÃO DOS RÓTULOS
+
+def _rotulo(valor):
+    """ Função que transforma um valor do eixo (data, semana, categoria) em texto curto.
+    """
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime("%d/%m/%y")
+    return str(valor)
+
+                                            # FUNÇÃO DE DESENHO DO TÍTULO
+
+def _desenho(titulo, altura):
+    desenho = Drawing(LARGURA_UTIL, altura)
+    desenho.add(String(0, altura - 12, titulo, fontName="Helvetica-Bold", fontSize=11))
+    return desenho
+
+                                            # FUNÇÃO DE GRÁFICO DE BARRAS
+
+def grafico_barras(titulo, categorias, series, altura=6 * cm, largura=None):
+    """ Função que desenha um gráfico de barras (agrupadas quando há mais de uma série), com legenda para várias séries
+    e no máximo LIMITE_ROTULOS_EIXO rótulos no eixo x.
+
+    Entrada: título, categorias do eixo x, dicionário nome da série -> valores, altura e largura do desenho
+    Saída: Drawing (flowable do reportlab)
+    """
+    largura = largura or LARGURA_UTIL
+    desenho = _desenho(titulo, altura)
+    desenho.width = largura
+    grafico = VerticalBarChart()
+    grafico.x, grafico.y = 40, 30
+    grafico.width = largura - (150 if len(series) > 1 else 60)
+    grafico.height = altura - 60
+    grafico.data = [[0.0 if pd.isna(valor) else float(valor) for valor in valores] for valores in series.values()]
+    passo = max(1, math.ceil(len(categorias) / LIMITE_ROTULOS_EIXO))
+    grafico.categoryAxis.categoryNames = [_rotulo(valor) if posicao % passo == 0 else "" for posicao, valor in enumerate(categorias)]
+    grafico.categoryAxis.labels.fontSize = 7
+    grafico.categoryAxis.labels.angle = 30 if passo > 1 or len(categorias) > 8 else 0
+    grafico.categoryAxis.labels.boxAnchor = "ne" if grafico.categoryAxis.labels.angle else "n"
+    grafico.valueAxis.labels.fontSize = 7
+    grafico.valueAxis.valueMin = 0
+    grafico.barSpacing = 1
+    grafico.groupSpacing = 4 if len(categorias) > 30 else 8
+    for posicao in range(len(series)):
+        grafico.bars[posicao].fillColor = CORES[posicao % len(CORES)]
+        grafico.bars[posicao].strokeColor = None
+    if len(categorias) * len(series) <= 24:
+        grafico.barLabelFormat = "%.0f" if all(float(valor).is_integer() for valores in grafico.data for valor in valores) else "%.2f"
+        grafico.barLabels.fontSize = 6
+        grafico.barLabels.nudge = 6
+    desenho.add(grafico)
+    if len(series) > 1:
+        desenho.add(_legenda(list(series), largura - 100, altura - 30))
+    return desenho
+
+                                            # FUNÇÃO DE GRÁFICO DE LINHAS
+
+def grafico_linha(titulo, categorias, valores, altura=6 * cm):
+    """ Função que desenha um gráfico de linhas de uma série (no máximo LIMITE_ROTULOS_EIXO rótulos no eixo x).
+
+    Entrada: título, categorias do eixo x, valores
+    Saída: Drawing
+    """
+    desenho = _desenho(titulo, altura)
+    grafico = HorizontalLineChart()
+    grafico.x, grafico.y = 40, 30
+    grafico.width, grafico.height = LARGURA_UTIL - 60, altura - 60
+    grafico.data = [[0.0 if pd.isna(valor) else float(valor) for valor in valores]]
+    passo = max(1, math.ceil(len(categorias) / LIMITE_ROTULOS_EIXO))
+    grafico.categoryAxis.categoryNames = [_rotulo(valor) if posicao % passo == 0 else "" for posicao, valor in enumerate(categorias)]
+    grafico.categoryAxis.labels.fontSize = 7
+    grafico.valueAxis.labels.fontSize = 7
+    grafico.lines[0].strokeColor = CORES[0]
+    grafico.lines[0].strokeWidth = 1.5
+    desenho.add(grafico)
+    return desenho
+
+                                            # FUNÇÃO DE GRÁFICO DE PIZZA
+
+def grafico_pizza(titulo, rotulos, valores, altura=6 * cm, largura=None):
+    """ Função que desenha um gráfico de pizza com a porcentagem de cada fatia na legenda.
+
+    Entrada: título, rótulos das fatias, valores
+    Saída: Drawing
+    """
+    largura = largura or LARGURA_UTIL / 2
+    desenho = _desenho(titulo, altura)
+    desenho.width = largura
+    valores = [0.0 if pd.isna(valor) else float(valor) for valor in valores]
+    total = sum(valores) or 1.0
+    pizza = Pie()
+    pizza.x, pizza.y = 20, 15
+    pizza.width = pizza.height = altura - 45
+    pizza.data = valores
+    pizza.slices.strokeColor = colors.white
+    for posicao in range(len(valores)):
+        pizza.slices[posicao].fillColor = CORES[posicao % len(CORES)]
+    desenho.add(pizza)
+    desenho.add(_legenda([f"{rotulo} ({valor / total:.1%})" for rotulo, valor in zip(rotulos, valores)], pizza.x + pizza.width + 30, altura - 30))
+    return desenho
+
+                                            # FUNÇÃO DE LEGENDA
+
+def _legenda(nomes, x, y):
+    legenda = Legend()
+    legenda.x, legenda.y = x, y
+    legenda.fontSize = 7
+    legenda.boxAnchor = "nw"
+    legenda.columnMaximum = 12
+    legenda.colorNamePairs = [(CORES[posicao % len(CORES)], str(nome)) for posicao, nome in enumerate(nomes)]
+    return legenda
+
+                                            # FUNÇÃO DE TABELA
+
+def tabela(df, casas=2):
+    """ Função que transforma um dataframe pequeno numa tabela do PDF (números com `casas` casas decimais).
+
+    Entrada: dataframe, casas decimais
+    Saída: Table (flowable do reportlab)
+    """
+    linhas = [[str(coluna) for coluna in df.columns]]
+    for registro in df.itertuples(index=False):
+        linhas.append([
+            "-" if pd.isna(valor) else f"{valor:,.{casas}f}" if isinstance(valor, float) else _rotulo(valor)
+            for valor in registro
+        ])
+    resultado = Table(linhas, repeatRows=1, hAlign="LEFT")
+    resultado.setStyle(TableStyle([
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#E8EAF6")),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F7F7F7")]),
+        ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
+        ("ALIGN", (0, 0), (0, -1), "LEFT"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#CCCCCC")),
+    ]))
+    return resultado
+
+                                            # FUNÇÃO DE DESENHOS LADO A LADO
+
+def _lado_a_lado(esquerda, direita):
+    """ Função que põe dois desenhos de meia largura lado a lado (uma tabela de uma linha, sem bordas nem espaçamento).
+    """
+    largura = LARGURA_UTIL / 2
+    resultado = Table([[esquerda, direita]], colWidths=[largura, largura])
+    resultado.setStyle(TableStyle([("LEFTPADDING", (0, 0), (-1, -1), 0), ("RIGHTPADDING", (0, 0), (-1, -1), 0)]))
+    return resultado
+
+                                            # FUNÇÃO DE SEÇÃO
+
+def _secao(titulo, df, desenhar):
+    """ Função que devolve uma seção inteira na mesma página: os flowables de desenhar(), ou a mensagem de sem dados
+    quando a tabela está vazia (um KeepTogether só: aninhados, o reportlab quebra a página sem precisar).
+    """
+    if df is None or df.empty:
+        return KeepTogether([Paragraph(titulo, _ESTILOS["Heading4"]), Paragraph(SEM_DADOS, _ESTILOS["Normal"])])
+    return KeepTogether([*desenhar(), Spacer(1, 0.4 * cm)])
+
+                                            # FUNÇÃO DE MONTAGEM DO PDF
+
+def desenhar_pdf(relatorio, dados, arquivo):
+    """ Função que desenha o PDF de um relatório (roda nos processos do pool de utils.paralelo):
+    1 - página de resumo: filtros e métricas gerais (as da Análise Geral da Visão Restaurante)
+    2 - Visão Empresa: pedidos por período, por tráfego, por cidade e tráfego, por semana e por entregador
+    3 - Visão Restaurante: distância e tempo por cidade, tabelas de tempo por tipo de pedido e tráfego, percentis e
+        efeito do festival
+
+    Entrada: Relatorio (utils.relatorio), dicionário com as tabelas de dados_relatorio, caminho do PDF
+    Saída: caminho do PDF
+    """
+    def rodape(canvas, documento):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        canvas.drawString(MARGEM, MARGEM / 2, f"Cury Company - {relatorio.titulo}")
+        canvas.drawRightString(TAMANHO_PAGINA[0] - MARGEM, MARGEM / 2, f"Página {documento.page}")
+        canvas.restoreState()
+
+    cidades = ", ".join(relatorio.cidades) if relatorio.cidades is not None else "todas"
+    elementos = [
+        Paragraph(relatorio.titulo, _ESTILOS["Title"]),
+        Paragraph(
+            f"Período: {relatorio.data_inicial:%d/%m/%Y} a {relatorio.data_limite:%d/%m/%Y}<br/>"
+            f"Condições de trânsito: {', '.join(relatorio.trafegos) or 'nenhuma'}<br/>Cidades: {cidades}",
+            _ESTILOS["Normal"],
+        ),
+        Spacer(1, 0.6 * cm),
+        Paragraph("Análise Geral", _ESTILOS["Heading2"]),
+        tabela(pd.DataFrame(dados["metricas"], columns=["Métrica", "Valor"])),
+        PageBreak(),
+        Paragraph("Visão Empresa", _ESTILOS["Heading1"]),
+    ]
+
+    df, periodo = dados["pedidos_por_periodo"]
+    elementos.append(_secao(f"Pedidos por {periodo}", df, lambda: [grafico_barras(f"Pedidos por {periodo}", df["Order_Date"].tolist(), {"Pedidos": df["ID"]})]))
+
+    trafego, cidade_trafego = dados["pedidos_por_trafego"], dados["pedidos_por_cidade_trafego"]
+
+    def lado_a_lado_trafego():
+        largura = LARGURA_UTIL / 2
+        por_cidade = cidade_trafego.pivot(index="City", columns="Road_traffic_density", values="ID").fillna(0)
+        return [_lado_a_lado(
+            grafico_pizza("Distribuição por Tipo de Tráfego", trafego["Road_traffic_density"].astype(str).tolist(), trafego["ID"], largura=largura),
+            grafico_barras(
+                "Pedidos por Cidade e Tráfego",
+                por_cidade.index.astype(str).tolist(),
+                {str(nivel): por_cidade[nivel].tolist() for nivel in por_cidade.columns},
+                largura=largura,
+            ),
+        )]
+    elementos.append(_secao("Pedidos por Tipo de Tráfego", trafego, lado_a_lado_trafego))
+
+    df = dados["pedidos_por_semana"]
+    elementos.append(_secao("Total de Pedidos por Semana do Ano", df, lambda: [grafico_barras("Total de Pedidos por Semana do Ano", df["Week"].tolist(), {"Pedidos": df["ID"]})]))
+    df_entregador = dados["pedidos_por_entregador"]
+    elementos.append(_secao(
+        "Média de Pedidos por Entregador a cada Semana", df_entregador,
+        lambda: [grafico_linha("Média de Pedidos por Entregador a cada Semana", df_entregador["Week"].tolist(), df_entregador["order_by_deliver"])],
+    ))
+
+    elementos += [PageBreak(), Paragraph("Visão Restaurante", _ESTILOS["Heading1"])]
+    distancia, tempo = dados["distancia_por_cidade"], dados["tempo_por_cidade"]
+    largura = LARGURA_UTIL / 2
+    elementos.append(_secao("Distância e Tempo por Cidade", distancia, lambda: [_lado_a_lado(
+        grafico_pizza("Distância Média por Cidade (km)", distancia["City"].astype(str).tolist(), distancia["distance"], largura=largura),
+        grafico_barras("Tempo Médio de Entrega por Cidade (min)", tempo["City"].astype(str).tolist(), {"Tempo Médio": tempo["time_mean"]}, largura=largura),
+    )]))
+
+    for titulo, chave in (
+        ("Tempo Médio por Tipo de Entrega", "tempo_por_cidade_e_pedido"),
+        ("Tempo Médio por Cidade e Tráfego", "tempo_por_cidade_e_trafego"),
+        ("Percentis do Tempo de Entrega por Cidade", "percentis_por_cidade"),
+        ("Efeito do Festival no Tempo de Entrega", "efeito_festival"),
+    ):
+        df = dados[chave]
+        elementos.append(_secao(titulo, df, lambda df=df, titulo=titulo: [Paragraph(titulo, _ESTILOS["Heading4"]), tabela(df)]))
+
+    documento = SimpleDocTemplate(
+        str(arquivo), pagesize=TAMANHO_PAGINA, leftMargin=MARGEM, rightMargin=MARGEM, topMargin=MARGEM, bottomMargin=MARGEM,
+        title=relatorio.titulo, author="Cury Company",
+    )
+    documento.build(elementos, onFirstPage=rodape, onLaterPages=rodape)
+    return arquivo
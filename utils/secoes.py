@@ -0,0 +1,29 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import streamlit as st
+
+from utils import configuracao
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE ESCOLHA DAS SEÇÕES VISÍVEIS
+
+def secoes_visiveis(nomes, chave, abas=True):
+    """ Função que decide quais seções de uma página são calculadas nesta execução:
+    1 - no modo "preguicosa" (CURRY_RENDERIZACAO, padrão), mostra um seletor e devolve só a seção escolhida:
+        as outras não executam nada (as abas do st.tabs executam todas, mesmo as escondidas)
+    2 - no modo "completa", devolve todas as seções, em abas (abas=True) ou uma embaixo da outra
+
+    Entrada: nomes das seções (na ordem da página), chave do seletor no session_state, se o modo completo usa abas
+    Saída: dicionário nome da seção -> container onde ela é desenhada
+    """
+    if configuracao.RENDERIZACAO == "completa":
+        containers = st.tabs(nomes) if abas else [st.container() for _ in nomes]
+        return dict(zip(nomes, containers))
+    if configuracao.RENDERIZACAO != "preguicosa":
+        raise ValueError(f"CURRY_RENDERIZACAO desconhecida: {configuracao.RENDERIZACAO} (use preguicosa ou completa)")
+    escolhida = st.radio("Seção", nomes, horizontal=True, key=chave, label_visibility="collapsed")
+    return {escolhida: st.container()}
@@ -0,0 +1,235 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import numpy as np
+import pandas as pd
+
+from utils import configuracao
+from utils.cubo import DERIVADAS_CUBO
+from utils.limpeza import concatenar_com_categorias
+
+#===========================================================================================================================================================================
+                                                                                # CONSTANTES
+#===========================================================================================================================================================================
+
+# Chaves dos sketches diários: cada linha guarda os sketches dos pedidos de um dia para uma combinação destas colunas
+CHAVES_SKETCH = ["Order_Date", "City", "Road_traffic_density", "age_range"]
+
+# Faixa de valores coberta pelo sketch de quantis do tempo de entrega (minutos); valores fora dela são truncados
+VALOR_MINIMO_QUANTIL = 1.0
+VALOR_MAXIMO_QUANTIL = 24 * 60.0
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE REGISTROS DO HYPERLOGLOG
+
+def posicoes_hll(valores, precisao):
+    """ Função que calcula, para cada valor, o registro e o posto do HyperLogLog:
+    1 - hash de 64 bits de cada valor (pd.util.hash_array, determinístico entre execuções)
+    2 - os `precisao` bits mais altos escolhem o registro
+    3 - o posto é a posição do primeiro bit 1 nos bits restantes (zeros à esquerda + 1)
+
+    Entrada: vetor de valores (ids), precisão p (2**p registros)
+    Saída: vetor de registros (int64) e vetor de postos (uint8)
+    """
+    hashes = pd.util.hash_array(np.asarray(valores, dtype=object))
+    bits_restantes = 64 - precisao
+    registros = (hashes >> np.uint64(bits_restantes)).astype(np.int64)
+    resto = (hashes & np.uint64((1 << bits_restantes) - 1)).astype(np.float64)
+    # frexp devolve o expoente e com resto = m * 2**e, 0.5 <= m < 1: e é a quantidade de bits significativos do resto
+    # (exato, já que o resto tem no máximo 53 bits)
+    _, bits_significativos = np.frexp(resto)
+    postos = (bits_restantes - bits_significativos + 1).astype(np.uint8)
+    return registros, postos
+
+                                            # FUNÇÃO DE ESTIMATIVA DO HYPERLOGLOG
+
+def estimar_hll(registros):
+    """ Função que estima a quantidade de valores distintos de cada linha de registros do HyperLogLog:
+    estimador harmônico com a correção de contagem linear para cardinalidades pequenas (Flajolet et al. 2007).
+    Com hashes de 64 bits a correção de cardinalidades grandes não é necessária.
+
+    Entrada: matriz (grupos x 2**p) de registros
+    Saída: vetor de estimativas (float64)
+    """
+    m = registros.shape[1]
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(np.exp2(-registros.astype(np.float64)), axis=1)
+    zeros = np.count_nonzero(registros == 0, axis=1)
+    pequena = (estimativa <= 2.5 * m) & (zeros > 0)
+    estimativa[pequena] = m * np.log(m / zeros[pequena])
+    return estimativa
+
+                                            # FUNÇÃO DE BALDES DO SKETCH DE QUANTIS
+
+def baldes_quantis(alfa):
+    """ Função que devolve a base gama dos baldes logarítmicos e a quantidade de baldes do sketch de quantis.
+    O balde i cobre (gama**(i-1), gama**i]; representar o balde pelo valor 2 * gama**i / (gama + 1) garante erro
+    relativo de no máximo alfa para qualquer valor dentro dele (como no DDSketch).
+    """
+    gama = (1 + alfa) / (1 - alfa)
+    return gama, int(np.ceil(np.log(VALOR_MAXIMO_QUANTIL) / np.log(gama))) + 1
+
+                                            # FUNÇÃO DO POSTO DO QUANTIL
+
+def posto_quantil(n, quantil):
+    """ Função que define o quantil usado em todo o dashboard (sketches, pedidos e SQL): o quantil discreto, o menor valor
+    com pelo menos q * n valores menores ou iguais a ele ("inverted_cdf" no NumPy, QUANTILE_DISC no DuckDB). É sempre
+    um valor observado, então não depende de interpolação entre pedidos.
+
+    Entrada: quantidade de valores (número ou vetor), quantil
+    Saída: posição do quantil nos valores ordenados (0 a n - 1)
+    """
+    return np.maximum(np.ceil(quantil * np.asarray(n, dtype=np.float64)) - 1, 0)
+
+                                            # FUNÇÃO DE QUANTIS A PARTIR DOS BALDES
+
+def quantis_histograma(histogramas, quantis, alfa):
+    """ Função que lê quantis de histogramas de baldes logarítmicos (um por linha):
+    o quantil q é o valor representativo do balde onde cai o posto posto_quantil(n, q), ou seja,
+    o quantil discreto com erro relativo de no máximo alfa.
+
+    Entrada: matriz (grupos x baldes) de contagens, lista de quantis, alfa
+    Saída: matriz (grupos x quantis) de valores (NaN para grupos vazios)
+    """
+    gama, _ = baldes_quantis(alfa)
+    acumulado = np.cumsum(histogramas, axis=1)
+    total = acumulado[:, -1]
+    valores = np.full((len(histogramas), len(quantis)), np.nan)
+    for coluna, quantil in enumerate(quantis):
+        posto = posto_quantil(total, quantil)
+        balde = np.argmax(acumulado > posto[:, None], axis=1)
+        valores[:, coluna] = 2 * gama ** balde / (gama + 1)
+    valores[total == 0] = np.nan
+    return valores
+
+                                            # FUNÇÃO DE MONTAGEM DOS SKETCHES DIÁRIOS
+
+def montar_sketches(df1, precisao=None, alfa=None):
+    """ Função que monta os sketches diários a partir dos pedidos:
+    1 - numera as combinações das chaves (dia, cidade, tráfego, faixa etária) que existem
+    2 - HyperLogLog dos entregadores: o maior posto de cada (grupo, registro)
+    3 - histograma de baldes logarítmicos do time_taken: contagem de cada (grupo, balde)
+
+    Entrada: dataframe de pedidos, precisão do HyperLogLog, erro relativo alfa dos quantis
+    Saída: SketchesDiarios
+    """
+    precisao = precisao or configuracao.PRECISAO_HLL
+    alfa = alfa or configuracao.ERRO_RELATIVO_QUANTIS
+    gama, n_baldes = baldes_quantis(alfa)
+    m = 1 << precisao
+
+    agrupado = df1.groupby(CHAVES_SKETCH, observed=True, sort=True, dropna=False)
+    grupo = agrupado.ngroup().to_numpy()
+    chaves = agrupado.size().index.to_frame(index=False)
+    n_grupos = len(chaves)
+
+    registro, posto = posicoes_hll(df1["Delivery_person_ID"].to_numpy(), precisao)
+    maiores = pd.Series(posto).groupby(grupo * m + registro).max()
+    registros = np.zeros(n_grupos * m, dtype=np.uint8)
+    registros[maiores.index.to_numpy()] = maiores.to_numpy()
+
+    tempos = np.clip(df1["time_taken"].to_numpy(dtype=np.float64), VALOR_MINIMO_QUANTIL, VALOR_MAXIMO_QUANTIL)
+    balde = np.ceil(np.log(tempos) / np.log(gama)).astype(np.int64)
+    histogramas = np.bincount(grupo * n_baldes + balde, minlength=n_grupos * n_baldes).astype(np.uint32)
+
+    return SketchesDiarios(chaves, registros.reshape(n_grupos, m), histogramas.reshape(n_grupos, n_baldes), alfa)
+
+#===========================================================================================================================================================================
+                                                                                # CLASSES
+#===========================================================================================================================================================================
+
+class SketchesDiarios:
+    """ Sketches combináveis por dia e dimensão, para responder intervalos de datas e semanas juntando sketches
+    pequenos em vez de voltar aos pedidos:
+
+    - entregadores distintos: HyperLogLog com 2**p registros de 1 byte; erro padrão relativo ~ 1.04 / sqrt(2**p)
+      (p=11: ~2.3%; 99% das estimativas dentro de ~3 erros padrões). Juntar = máximo registro a registro
+    - quantis do time_taken: histograma de baldes logarítmicos; o valor devolvido tem erro relativo de no máximo
+      alfa em relação ao quantil discreto exato (posto_quantil). Juntar = soma das contagens
+
+    Ambos são exatamente combináveis: juntar os sketches de vários dias dá o mesmo sketch que montá-lo sobre
+    todos os pedidos desses dias.
+    """
+
+    def __init__(self, chaves, registros, histogramas, alfa):
+        self.chaves = chaves
+        self.registros = registros
+        self.histogramas = histogramas
+        self.alfa = alfa
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def filtrar(self, data_limite, trafegos, data_inicial=None, cidades=None):
+        """ Mesmos filtros da sidebar (data limite e condições de trânsito), aplicados às linhas de sketches, e os dos
+        relatórios (data inicial e cidades; None = sem filtro).
+        """
+        linhas = (self.chaves["Order_Date"] <= data_limite) & self.chaves["Road_traffic_density"].isin(trafegos)
+        if data_inicial is not None:
+            linhas &= self.chaves["Order_Date"] >= data_inicial
+        if cidades is not None:
+            linhas &= self.chaves["City"].isin(cidades)
+        linhas = linhas.to_numpy()
+        return SketchesDiarios(self.chaves.loc[linhas].reset_index(drop=True), self.registros[linhas], self.histogramas[linhas], self.alfa)
+
+    def agrupar(self, grupos):
+        """ Junta os sketches das linhas de cada grupo (chaves ou derivadas, como Week; vazio = total geral):
+        ordena as linhas pelo grupo e reduz cada trecho contíguo (máximo dos registros, soma dos histogramas).
+
+        Saída: dataframe com os grupos, registros juntados e histogramas juntados
+        """
+        if not grupos:
+            return pd.DataFrame(index=[0]), self.registros.max(axis=0, initial=0)[None, :], self.histogramas.sum(axis=0)[None, :]
+
+        colunas = {}
+        for grupo in grupos:
+            if grupo in DERIVADAS_CUBO:
+                colunas[grupo] = DERIVADAS_CUBO[grupo](self.chaves["Order_Date"])
+            else:
+                colunas[grupo] = self.chaves[grupo].array
+        agrupado = pd.DataFrame(colunas).groupby(grupos, observed=True, sort=True, dropna=False)
+        codigos = agrupado.ngroup().to_numpy()
+        ordem = np.argsort(codigos, kind="stable")
+        inicios = np.flatnonzero(np.r_[True, np.diff(codigos[ordem]) != 0])
+        registros = np.maximum.reduceat(self.registros[ordem], inicios, axis=0)
+        histogramas = np.add.reduceat(self.histogramas[ordem], inicios, axis=0)
+        return agrupado.size().index.to_frame(index=False), registros, histogramas
+
+    def distintos(self, grupos, nome="Delivery_person_ID"):
+        """ Estimativa de entregadores distintos por grupo (HyperLogLog).
+
+        Saída: dataframe com os grupos e a coluna `nome` (estimativa arredondada)
+        """
+        if len(self) == 0:
+            return pd.DataFrame(columns=list(grupos) + [nome])
+        resumo, registros, _ = self.agrupar(grupos)
+        resumo[nome] = np.rint(estimar_hll(registros)).astype(np.int64)
+        return resumo
+
+    def quantis(self, grupos, quantis=(0.5, 0.9, 0.99)):
+        """ Quantis aproximados do time_taken por grupo, com erro relativo de no máximo alfa.
+
+        Saída: dataframe com os grupos, a quantidade de pedidos (n) e uma coluna pXX por quantil
+        """
+        nomes = [f"p{round(quantil * 100):02d}" for quantil in quantis]
+        if len(self) == 0:
+            return pd.DataFrame(columns=list(grupos) + ["n"] + nomes)
+        resumo, _, histogramas = self.agrupar(grupos)
+        resumo["n"] = histogramas.sum(axis=1, dtype=np.int64)
+        resumo[nomes] = quantis_histograma(histogramas, quantis, self.alfa)
+        return resumo
+
+    def combinar(self, outro):
+        """ Junta estes sketches aos de outros pedidos (lotes novos): linhas com as mesmas chaves são reduzidas.
+        """
+        juntos = SketchesDiarios(
+            concatenar_com_categorias([self.chaves, outro.chaves]).reset_index(drop=True),
+            np.concatenate([self.registros, outro.registros]),
+            np.concatenate([self.histogramas, outro.histogramas]),
+            self.alfa,
+        )
+        chaves, registros, histogramas = juntos.agrupar(CHAVES_SKETCH)
+        return SketchesDiarios(chaves, registros, histogramas, self.alfa)
@@ -0,0 +1,350 @@
+# ==================================================================================================================================================================#
+                                                                            # BIBLIOTECAS E IMPORT
+# ==================================================================================================================================================================#
+import folium
+import plotly.express as px
+
+from utils.comparacao import comparar_festival
+from utils.consultas import CONSULTAS_PAGINAS
+from utils.geo import COLUNAS_PONTOS, agregar_celulas, html_folium, limitar_celulas, mapa_celulas_folium, mapa_celulas_pydeck, pontos_validos
+from utils.graficos import figura_spec, reamostrar_datas, reduzir_barras, reduzir_linha, rotulo_barras
+from utils.instrumentacao import trecho
+from utils.previsao import NIVEL_PREVISAO
+
+#===========================================================================================================================================================================
+                                                                                # FUNÇÕES
+#===========================================================================================================================================================================
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR DIA
+
+def order_by_date(consultas):
+    """ Função para criar um gráfico de barras de quantidade de pedidos por dia:
+    1 - cria uma variavel (df_aux) que recebe a contagem de pedidos por data
+    2 - com dias demais no período, soma os pedidos por semana ou mês (utils.graficos) antes de montar a figura
+    3 - cria uma variavel (fig) para receber o grafico de barras (rótulos de texto só com poucas barras)
+
+    Entrada: consultas com os filtros da sidebar
+    Saída: gráfico (JSON da figura)
+
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_dia"])
+    df_aux, periodo = reamostrar_datas(df_aux, "Order_Date", ["ID"])
+    fig = px.bar(df_aux, x="Order_Date", y="ID", text=rotulo_barras(df_aux, "ID"), title=f"Pedidos por {periodo}")
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE DISTRIBUIÇÃO DE ENTREGAS POR TIPO DE TRÁFEGO
+
+def order_by_traffic(consultas):
+    """ Função que desenha um gráfico de pizza da distribuição de entregas por tipo de tráfego
+    1- cria uma variavel auxiliar (df_aux) que recebe a contagem de pedidos por tipo de tráfego
+    2- cria uma variavel (fig) que recebe um gráfico de pizza dos ids por tipo de tráfego
+
+    Entrada: consultas com os filtros da sidebar
+    saída: gráfico (JSON da figura)
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_trafego"])
+    fig = px.pie(df_aux, values='ID', names='Road_traffic_density', title="Distribuição por Tipo de Tráfego")
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRÁFICO DA QUANTIDADE DE ENTREGAS POR CIDADE E TIPO DE TRAFEGO
+
+def order_by_city_and_traffic(consultas):
+    """ Função que desenha um gráfico de pizza da quantidade de entregas por tipo de tráfego
+        1- cria uma variavel auxiliar (df_aux) que recebe a contagem de pedidos por cidade e tipo de tráfego
+        2- cria uma variavel (fig) que recebe um gráfico de barras da quantidade de entregas por cidade e tipo de tráfego
+
+        Entrada: consultas com os filtros da sidebar
+        saída: gráfico (JSON da figura)
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_cidade_trafego"])
+    fig = px.bar(df_aux, x="City", y="ID", color='Road_traffic_density', barmode='group', text='ID', title="Pedidos por Cidade e Tráfego")
+    fig.update_traces(textposition='outside', texttemplate='%{y}', cliponaxis=False)
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR SEMANA
+
+def order_by_week(consultas):
+    """ Função que desenha um gráfico de barras da quantidade de entregas por semana
+    1- cria uma variavel auxiliar (df_aux) que recebe a contagem de pedidos por semana
+    2- limita as barras (utils.graficos) e cria uma variavel (fig) que recebe um gráfico de barras da quantidade de pedidos por semana
+
+    Entrada: consultas com os filtros da sidebar
+    saída: gráfico (JSON da figura)
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["pedidos_por_semana"])
+    df_aux = reduzir_barras(df_aux, "Week", ["ID"])
+    fig = px.bar(df_aux, x='Week', y='ID', text=rotulo_barras(df_aux, "ID"), title="Total de Pedidos por Semana do Ano")
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PEDIDOS POR QUANTIDADE DE ENTREGADORES NA SEMANA
+
+def order_by_deliver(consultas):
+    """ Função que desenha um gráfico de linhas da quantidade de entregadores a cada semana
+    1- cria uma variavel auxiliar (df_final) que recebe, numa só consulta, os pedidos e os entregadores distintos
+       por semana (no backend pandas, a contagem distinta é exata ou aproximada conforme CURRY_CONTAGEM_DISTINTA)
+    2 - divide os pedidos pelos entregadores de cada semana e limita os pontos da linha com o LTTB (utils.graficos)
+    3- cria uma variavel (fig) que recebe um gráfico de linhas da quantidade de entregas feitas por entregadores na semana
+
+    Entrada: consultas com os filtros da sidebar
+    saída: gráfico (JSON da figura)
+    """
+    df_final = consultas.agregar(CONSULTAS_PAGINAS["pedidos_e_entregadores_por_semana"])
+    df_final["order_by_deliver"] = df_final["ID"] / df_final["Delivery_person_ID"]
+    df_final = reduzir_linha(df_final, "Week", "order_by_deliver")
+    fig = px.line(df_final, x="Week", y="order_by_deliver", title="Média de Pedidos por Entregador a cada Semana")
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO GRAFICO DE PREVISÃO POR CIDADE
+
+def order_forecast(previsoes, frequencia, cidade, medida):
+    """ Função que desenha o histórico e a previsão de pedidos ou entregadores de uma cidade
+    1- cria uma variavel auxiliar (df_aux) que recebe, da tabela de previsões já ajustadas (utils.previsao), as linhas da série escolhida
+    2- cria uma variavel (fig) que recebe um gráfico de linhas do histórico e da previsão
+    3- acrescenta a faixa do intervalo de previsão embaixo das linhas
+
+    Entrada: previsões ajustadas, frequência ("dia" ou "semana"), cidade, medida ("pedidos" ou "entregadores")
+    saída: gráfico (JSON da figura)
+    """
+    tabela = previsoes.tabela
+    df_aux = tabela[(tabela["frequencia"] == frequencia) & (tabela["City"] == cidade) & (tabela["medida"] == medida)]
+    fig = px.line(
+        df_aux.melt(id_vars="data", value_vars=["real", "previsto"], var_name="serie", value_name=medida).dropna(subset=[medida]),
+        x="data", y=medida, color="serie", title=f"{medida.capitalize()} por {frequencia} - {cidade}",
+    )
+    fig.update_traces(selector={"name": "previsto"}, line_dash="dash")
+    faixa = df_aux.dropna(subset=["inferior", "superior"])
+    if not faixa.empty:
+        fig.add_scatter(x=faixa["data"], y=faixa["superior"], mode="lines", line_width=0, showlegend=False, hoverinfo="skip")
+        fig.add_scatter(
+            x=faixa["data"], y=faixa["inferior"], mode="lines", line_width=0, fill="tonexty",
+            fillcolor="rgba(239, 85, 59, 0.2)", name=f"intervalo de {NIVEL_PREVISAO:.0%}",
+        )
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO MAPA DOS LOCAIS DE ENTREGA
+
+def map(consultas):
+    """ Função que desenha um mapa da distância média dos locais de entrega
+    1- cria uma variavel auxiliar (df1_aux) que recebe as medianas da latitude e longitude dos locais de entrega por cidade e tráfego
+    2 - realiza um if para verificar se a coluna contem dados
+    3 - realiza um for para cada linha da coluna de latitude e longitude para adicionar ao mapa
+    4 - devolve o HTML do mapa (que fica no cache de resultados em vez de ser montado a cada rerun)
+
+    Entrada: consultas com os filtros da sidebar
+    saída: HTML do mapa (None quando não há dados)
+    """
+    df1_aux = consultas.agregar(CONSULTAS_PAGINAS["localizacao_mediana"])
+
+    if df1_aux.empty:
+        return None
+
+    mapa = folium.Map(location=[df1_aux['Delivery_location_latitude'].iloc[0], df1_aux['Delivery_location_longitude'].iloc[0]], zoom_start=11)
+
+    for index, local in df1_aux.iterrows():
+        folium.Marker(
+            location=[local['Delivery_location_latitude'], local['Delivery_location_longitude']],
+            popup=f"{local['City']} - {local['Road_traffic_density']}"
+        ).add_to(mapa)
+
+    return html_folium(mapa)
+
+                                            # FUNÇÃO DE CRIAÇÃO DO MAPA AGREGADO DOS PONTOS
+
+def mapa_agregado(consultas, pontos, modo, forma, tamanho_km, renderizador):
+    """ Função que desenha todos os pontos (entregas ou restaurantes) agregados em células no servidor
+    1 - lê só as coordenadas do tipo de ponto escolhido (filtradas) e separa as válidas
+    2 - agrupa os pontos em hexágonos ou quadrados de tamanho_km (utils.geo, vetorizado) e mantém as células mais cheias
+    3 - desenha as células como mapa de calor ou círculos com contagem, no folium (HTML) ou no pydeck
+
+    Entrada: consultas com os filtros da sidebar, tipo de ponto, modo, forma da célula, tamanho da célula em km, renderizador
+    saída: HTML do mapa (folium) ou pydeck.Deck (None quando não há dados)
+    """
+    lat, lon = pontos_validos(consultas.selecionar(COLUNAS_PONTOS[pontos]), pontos)
+    with trecho("agregar_celulas", "agregacao", linhas_entrada=len(lat), forma=forma) as span:
+        celulas = limitar_celulas(agregar_celulas(lat, lon, tamanho_km, forma))
+        span.linhas_saida = len(celulas)
+    if celulas.empty:
+        return None
+
+    if renderizador == "pydeck":
+        return mapa_celulas_pydeck(celulas, modo, tamanho_km)
+    return html_folium(mapa_celulas_folium(celulas, modo, tamanho_km))
+
+                                            # FUNÇÃO DE GRAFICO DA MEDIA DE NOTAS POR DENSIDADE DE TRAFEGO
+
+def media_de_notas_por_trafego(consultas):
+    """
+    Função que realiza a média de avaliações dos enrtegadores por tipo de tráfego e plota um gráfico de barras.
+
+    1- Recebe as consultas com os filtros da sidebar
+    2- consulta a média e o desvio padrão das notas de avaliação por tipo de tráfego
+    3- plota um gráfico de barras com as médias e os desvios padrões por cada tipo
+
+    Entrada: consultas com os filtros da sidebar
+    Saída: gráfico (JSON da figura)
+    """
+    df_avg_std_traffic = consultas.agregar(CONSULTAS_PAGINAS["notas_por_trafego"])
+
+    fig = px.bar(
+        df_avg_std_traffic,
+        x='Road_traffic_density',
+        y='ratings_mean',
+        error_y='ratings_std',
+        labels={'Road_traffic_density': 'Densidade do Tráfego', 'ratings_mean': 'Avaliação Média'},
+        text_auto='.2f',
+    )
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE GRAFICO DA QUANTIDADE DE ENTREGADORES POR RANGE DE IDADE
+
+def delivery_by_age(consultas):
+    """
+    Função que realiza um range de idades dos entregadores e gera um gráfico de pizza da quantidade de entregadores por cada range
+    de idade.
+
+    1- Recebe as consultas com os filtros da sidebar (a coluna age_range é calculada no carregamento)
+    2- consulta a contagem única de entregadores por range de idade
+       (no backend pandas, junta os HyperLogLogs diários por faixa quando CURRY_CONTAGEM_DISTINTA = aproximada)
+    3- plota um gráfico de pizza com a quantidade de entregadores por cada range de idade
+
+    Entrada: consultas com os filtros da sidebar
+    Saída: gráfico (JSON da figura)
+    """
+    df_age_range = consultas.agregar(CONSULTAS_PAGINAS["entregadores_por_faixa_etaria"])
+
+    fig = px.pie(
+        df_age_range,
+        values="Delivery_person_ID",
+        names="age_range",
+    )
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE GRÁFICO DA DISTANCIA MÉDIA POR CIDADE
+
+def distancia_media(consultas):
+    """
+    Função para calcular a distância média de entrega por cidade e gerar um gráfico de pizza.
+
+    1 - Consulta a distância média por cidade.
+    2 - Cria um gráfico de pizza com as distâncias médias por cidade.
+
+    Entrada: Consultas com os filtros da sidebar
+    Saída: Gráfico (JSON da figura).
+    """
+    distancia_media_cidade = consultas.agregar(CONSULTAS_PAGINAS["distancia_por_cidade"])
+    fig = px.pie(distancia_media_cidade,
+                 values='distance',
+                 names='City',
+                 hover_data=['distance'],
+                 labels={'distance':'Distância Média'})
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE GRÁFICO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR CIDADE
+
+def time_by_city(consultas):
+    """
+    Função para calcular a média e desvio padrão do tempo de entrega por cidade e gerar um gráfico de barras.
+
+    1 - Consulta a média e desvio padrão do tempo por cidade.
+    2 - Cria um gráfico de barras com a média como altura e o desvio padrão como barra de erro.
+
+    Entrada: Consultas com os filtros da sidebar
+    Saída: Gráfico de barras (JSON da figura)
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade"])
+    fig = px.bar(df_aux,
+                 x='City',
+                 y='time_mean',
+                 error_y='time_std',
+                 labels={'City': 'Cidade', 'time_mean': 'Tempo Médio de Entrega (min)'},
+                 text='time_mean')
+    fig.update_traces(texttemplate='%{text:.2f}', textposition='outside')
+    return figura_spec(fig)
+
+                                            # FUNÇÃO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR TIPO DE PEDIDO
+
+def meantime_by_delivery(consultas):
+    """
+    Função para calcular a média e desvio padrão do tempo de entrega, agrupando por cidade e tipo de pedido.
+
+    1 - Consulta a média e desvio padrão do tempo por cidade e tipo de pedido.
+    2 - Renomeia as colunas do dataframe resultante.
+
+    Entrada: Consultas com os filtros da sidebar
+    Saída: Dataframe
+    """
+    df1_time = consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade_e_pedido"])
+    df1_time.columns = ["Cidade", "Tipo de Pedido", "Tempo Médio", "Desvio Padrão"]
+    return df1_time
+
+                                            # FUNÇÃO DE MÉDIA E DESVIO PADRÃO DE TEMPO POR TRÁFEGO
+
+def meantime_by_citytrafic(consultas):
+    """
+    Função para calcular a média e desvio padrão do tempo de entrega por cidade e densidade de tráfego, e gerar um gráfico sunburst.
+
+    1 - Consulta a média e desvio padrão do tempo por cidade e densidade de tráfego.
+    2 - Cria um gráfico sunburst mostrando a hierarquia e os valores.
+
+    Entrada: Consultas com os filtros da sidebar
+    Saída: Gráfico (JSON da figura)
+    """
+    df_aux = consultas.agregar(CONSULTAS_PAGINAS["tempo_por_cidade_e_trafego"])
+    fig = px.sunburst(df_aux,
+                      path=['City', 'Road_traffic_density'],
+                      values='time_mean',
+                      color='time_std',
+                      color_continuous_scale='RdBu',
+                      hover_name="City")
+    return figura_spec(fig)
+                                            # FUNÇÃO DE TABELA DE PERCENTIS DO TEMPO POR CIDADE
+
+def percentis_por_cidade(consultas):
+    """
+    Função que calcula os percentis 50, 90 e 99 do tempo de entrega por cidade.
+
+    1- Recebe as consultas com os filtros da sidebar
+    2- consulta os percentis por cidade (no backend pandas, juntando os histogramas diários dos sketches, com erro
+       relativo de no máximo alfa; no DuckDB, exatos)
+    3- Renomeia as colunas do dataframe resultante.
+
+    Entrada: consultas com os filtros da sidebar
+    Saída: dataframe
+    """
+    df_percentis = consultas.agregar(CONSULTAS_PAGINAS["percentis_por_cidade"]).round(1)
+    df_percentis.columns = ["Cidade", "Pedidos", "p50 (min)", "p90 (min)", "p99 (min)"]
+    return df_percentis
+
+                                            # FUNÇÃO DE COMPARAÇÃO DO TEMPO COM E SEM FESTIVAL
+
+def festival_comparison(consultas):
+    """
+    Função que compara o tempo de entrega com e sem festival no total e por cidade, tráfego e tipo de pedido.
+
+    1- Consulta n, média e desvio do tempo por cidade, tráfego, tipo de pedido e festival (uma consulta só, no cubo diário)
+    2- Soma as estatísticas suficientes para cada recorte e aplica o teste t de Welch a todos de uma vez (utils.comparacao)
+
+    Entrada: consultas com os filtros da sidebar
+    Saída: dataframe da comparação (a linha "Geral" alimenta as métricas da Análise Geral)
+    """
+    return comparar_festival(consultas.agregar(CONSULTAS_PAGINAS["tempo_por_festival"]))
+
+                                            # FUNÇÃO DE BUSCA DE ENTREGAS E RESTAURANTES EM VOLTA DE UM PONTO
+
+def entregas_no_raio(consultas, lat, lon, raio_km, k):
+    """
+    Função que resume as entregas em volta de um ponto e lista os restaurantes mais próximos dele.
+
+    1- Busca as entregas (com os filtros da sidebar) cujo local fica a até raio_km do ponto
+       (no backend pandas, pela KD-tree do índice espacial; no DuckDB, pela caixa envolvente e pelo haversine)
+    2- Resume a quantidade, o tempo médio e a distância média até o restaurante dessas entregas
+    3- Busca os k restaurantes mais próximos do ponto (entre todos os restaurantes do dataset)
+
+    Entrada: consultas com os filtros da sidebar, latitude, longitude, raio em km, quantidade de restaurantes
+    Saída: (dicionário com o resumo das entregas, dataframe dos restaurantes mais próximos)
+    """
+    entregas = consultas.selecionar_no_raio(["time_taken", "distance"], lat, lon, raio_km)
+    resumo = {"entregas": len(entregas), "tempo": entregas["time_taken"].mean(), "distancia": entregas["distance"].mean()}
+    proximos = consultas.backend.restaurantes_proximos(lat, lon, k).round({"distancia_km": 2})
+    proximos.columns = ["Latitude", "Longitude", "Distância (km)", "Pedidos"]
+    return resumo, proximos